@@ -0,0 +1,114 @@
+"""
+Accuracy and speed of single-precision (complex64) simulation against complex128.
+
+For every qubit count and layer count, the same QASMNeuralNetwork is
+built in both precisions on the NumPy engine and evaluated on the same
+random parameters and inputs. Reported per configuration:
+
+  output_error     largest absolute difference of predict_batch outputs
+  gradient_error   largest absolute difference of adjoint batch gradients,
+                   relative to the largest complex128 gradient entry
+  infidelity       1 - |<psi_128|psi_64>|**2 of the first sample's statevector
+  norm_error       | ||psi_64|| - 1 |, the drift of the single-precision norm
+  speedup          complex128 / complex64 best time of one predict_batch call
+
+Every timing runs once to warm up and is then repeated --repeat times; the
+best time is kept.
+
+    python benchmarks/precision.py [--qubits 4 8 12 16 18] [--layers 1 4] [--batch-size 16]
+        [--entangler ring] [--repeat 3] [--output results.json] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, REPOSITORY)
+from qasm_ml import QASMNeuralNetwork  # noqa: E402
+
+
+def best_time(function, repeat):
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def compare_precisions(num_qubits, num_layers, batch_size, entangler, repeat, rng):
+    """
+    Return the accuracy and timing record of one configuration
+    """
+    networks = {precision: QASMNeuralNetwork(num_qubits=num_qubits, num_classes=2, num_layers=num_layers,
+                                             rotations=("ry", "rz"), entangler=entangler, precision=precision)
+                for precision in ("complex128", "complex64")}
+    parameters = rng.random(networks["complex128"].num_parameters) * 2 * np.pi
+    data = rng.random((batch_size, num_qubits)) * 2 * np.pi
+    labels = np.eye(2)[rng.integers(0, 2, batch_size)]
+
+    outputs, gradients, statevectors, seconds = {}, {}, {}, {}
+    for precision, network in networks.items():
+        outputs[precision] = network.predict_batch(data, parameters)
+        gradients[precision] = network.calculate_batch_gradient(data, parameters, labels)
+        statevectors[precision] = np.array(network.simulate(data[0], parameters), dtype=complex)
+        seconds[precision] = best_time(lambda: network.predict_batch(data, parameters), repeat)
+
+    overlap = np.vdot(statevectors["complex128"], statevectors["complex64"])
+    return {
+        "num_qubits": num_qubits, "num_layers": num_layers, "batch_size": batch_size,
+        "output_error": float(np.max(np.abs(outputs["complex64"] - outputs["complex128"]))),
+        "gradient_error": float(np.max(np.abs(gradients["complex64"] - gradients["complex128"]))
+                                / max(np.max(np.abs(gradients["complex128"])), np.finfo(float).tiny)),
+        "infidelity": float(max(1 - abs(overlap) ** 2, 0.0)),
+        "norm_error": float(abs(np.linalg.norm(statevectors["complex64"]) - 1)),
+        "seconds_complex128": seconds["complex128"], "seconds_complex64": seconds["complex64"],
+        "speedup": seconds["complex128"] / seconds["complex64"],
+    }
+
+
+def format_record(record):
+    return (f"{record['num_qubits']:>3}q L={record['num_layers']:<2} batch={record['batch_size']:<4} "
+            f"output {record['output_error']:.1e}  gradient {record['gradient_error']:.1e}  "
+            f"infidelity {record['infidelity']:.1e}  norm {record['norm_error']:.1e}  "
+            f"{record['seconds_complex128'] * 1e3:>9.2f} ms -> {record['seconds_complex64'] * 1e3:>9.2f} ms "
+            f"({record['speedup']:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[4, 8, 12, 16, 18])
+    parser.add_argument("--layers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--entangler", default="ring")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per configuration (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write machine-readable results to this file")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for num_layers in args.layers:
+        for num_qubits in sorted(args.qubits):
+            record = compare_precisions(num_qubits, num_layers, args.batch_size, args.entangler, args.repeat, rng)
+            results.append(record)
+            if not args.json:
+                print(format_record(record), flush=True)
+
+    report = {"numpy": np.__version__, "arguments": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
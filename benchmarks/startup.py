@@ -0,0 +1,124 @@
+"""
+Startup-time benchmark for the command-line entry points.
+
+Every entry point is loaded in a fresh interpreter, which then builds its
+core model and runs it once on the NumPy engine, as a short-lived scoring
+job would. The report compares this with a bare "import numpy" baseline.
+The run fails (exit status 1) if an entry point loads a deferred
+dependency along the way, or if importing it takes longer than the budget.
+
+    python benchmarks/startup.py [--repeat 5] [--budget 1.0] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Heavy modules the NumPy code paths must not import
+DEFERRED_MODULES = ("qiskit", "qiskit_aer", "sklearn", "pytz", "scipy")
+
+# (entry point, code run against its module namespace after import)
+ENTRY_POINTS = [
+    ("Enhanced_ML.py",
+     "net = build_network(); net.predict_batch(np.zeros((2, 4)), np.zeros(net.num_parameters))"),
+    ("ML/Enhanced_ML.py",
+     "net = build_network(); net.predict_batch(np.zeros((2, 4)), np.zeros(net.num_parameters))"),
+    ("ML/Enhanced_ML_2.py",
+     "net = build_network(); net.predict_batch(np.zeros((2, 4)), np.zeros(net.num_parameters))"),
+    ("ML/embeded_with_python.py",
+     "net = build_network(); net.predict_batch(np.zeros((2, 4)), np.zeros(net.num_parameters))"),
+    ("IAN_HU_Masterbate_Estimation/main.py",
+     "net = build_network(); net.predict_batch(np.zeros((2, 5)), np.zeros(net.num_parameters))"),
+    ("tech_solution/main.py",
+     "TechSolutionEvaluator(exact=True).evaluate_solution(np.array([0.7, 0.5, 0.3, 0.4]))"),
+]
+
+PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("entry_point", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+exec(sys.argv[2], vars(module))
+finished = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_run_seconds": finished - imported,
+    "deferred_modules_loaded": sorted(name for name in json.loads(sys.argv[3]) if name in sys.modules),
+}))
+"""
+
+
+def run_probe(path, code):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, path, code, json.dumps(DEFERRED_MODULES)],
+        check=True, capture_output=True, text=True, cwd=REPOSITORY
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["wall_seconds"] = time.perf_counter() - start
+    return result
+
+
+def measure(path, code, repeat):
+    """
+    Best-of-repeat timings of one entry point in fresh interpreters
+    """
+    runs = [run_probe(path, code) for _ in range(repeat)]
+    best = {key: min(run[key] for run in runs) for key in ("import_seconds", "first_run_seconds", "wall_seconds")}
+    best["deferred_modules_loaded"] = sorted({name for run in runs for name in run["deferred_modules_loaded"]})
+    return best
+
+
+def measure_baseline(repeat):
+    """
+    Best-of-repeat wall time of a fresh interpreter that only imports NumPy
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import numpy"], check=True, cwd=REPOSITORY)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point (best is kept)")
+    parser.add_argument("--budget", type=float, default=1.0, help="maximum import time per entry point, in seconds")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    baseline = measure_baseline(args.repeat)
+    results = {}
+    for relative_path, code in ENTRY_POINTS:
+        results[relative_path] = measure(os.path.join(REPOSITORY, relative_path), code, args.repeat)
+
+    failures = []
+    for name, result in results.items():
+        if result["deferred_modules_loaded"]:
+            failures.append(f"{name} loaded {', '.join(result['deferred_modules_loaded'])}")
+        if result["import_seconds"] > args.budget:
+            failures.append(f"{name} took {result['import_seconds']:.3f}s to import (budget {args.budget:.3f}s)")
+
+    if args.json:
+        print(json.dumps({"numpy_baseline_seconds": baseline, "budget_seconds": args.budget,
+                          "entry_points": results, "failures": failures}, indent=2))
+    else:
+        print(f"Baseline (python -c 'import numpy'): {baseline:.3f}s wall")
+        print(f"{'entry point':<40} {'wall':>8} {'import':>8} {'first run':>10}  deferred modules loaded")
+        for name, result in results.items():
+            print(f"{name:<40} {result['wall_seconds']:>7.3f}s {result['import_seconds']:>7.3f}s "
+                  f"{result['first_run_seconds']:>9.3f}s  {', '.join(result['deferred_modules_loaded']) or '-'}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Throughput benchmarks for simulation, gradients, training and solution evaluation.
+
+Suites (select with --suites):
+  forward    QASMNeuralNetwork.predict / predict_batch latency
+  gradient   batch gradient per gradient method (adjoint runs on the NumPy engine whatever the backend)
+  epoch      one full train_network epoch over --epoch-samples rows
+  evaluator  TechSolutionEvaluator.evaluate_batch, exact and shot-sampled
+
+The density_matrix and trajectories backends simulate NOISE_MODEL, with
+shift-rule gradients, and have no evaluator variants.
+
+Every configuration runs once to warm up and is then timed --repeat times;
+the best time is kept. Configurations whose statevectors would exceed
+--max-amplitudes are skipped, as are larger qubit counts of a series once
+one size took longer than --time-limit; a density matrix counts as 4**n
+amplitudes, a trajectory run as one 2**n statevector per trajectory and
+an MPS run as num_qubits tensors at the default bond-dimension cap.
+Backends that are not installed are reported as skipped.
+
+With --compare, results are matched against an earlier --output file and
+the run fails (exit status 1) if any configuration got slower than the
+baseline by more than --tolerance.
+
+    python benchmarks/throughput.py [--qubits 4 8 12 16 20] [--layers 1 2] [--batch-sizes 1 64]
+        [--backends numpy qiskit aer density_matrix trajectories mps] [--suites forward gradient epoch evaluator]
+        [--repeat 3] [--output results.json] [--json] [--compare baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, REPOSITORY)
+from qasm_ml import BACKENDS, NOISE_ENGINES, NoiseModel, QASMNeuralNetwork  # noqa: E402
+
+SUITES = ("forward", "gradient", "epoch", "evaluator")
+# Result fields that identify a configuration across runs
+KEY_FIELDS = ("suite", "backend", "variant", "num_qubits", "num_layers", "batch_size")
+# Errors simulated by the noisy backends
+NOISE_MODEL = NoiseModel(depolarizing=0.001, two_qubit_depolarizing=0.01, amplitude_damping=0.001,
+                         readout_error=0.02)
+# NoisyBackend's default num_trajectories
+TRAJECTORIES = 256
+
+
+def best_time(function, repeat):
+    """
+    Best wall time of repeat calls, after one untimed warm-up call that
+    builds templates and allocates registers
+    """
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def amplitudes_per_row(backend, num_qubits):
+    if backend == "density_matrix":
+        return 4 ** num_qubits
+    if backend == "trajectories":
+        return TRAJECTORIES * 2 ** num_qubits
+    if backend == "mps":
+        # A chain at MPSBackend's default bond-dimension cap, not 2**n
+        return num_qubits * 2 * 64 ** 2
+    return 2 ** num_qubits
+
+
+def load_evaluator_module():
+    spec = importlib.util.spec_from_file_location("tech_solution_main", os.path.join(REPOSITORY, "tech_solution", "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def network_case(suite, backend, variant, num_qubits, num_layers, batch_size, epoch_samples, rng):
+    """
+    Return (function to time, items processed per call) for one network
+    configuration
+    """
+    noisy = backend in NOISE_ENGINES
+    gradient_method = variant if suite == "gradient" else "parameter_shift" if noisy or backend == "mps" else "adjoint"
+    network = QASMNeuralNetwork(num_qubits=num_qubits, num_classes=2, num_layers=num_layers, backend=backend,
+                                gradient_method=gradient_method, noise=NOISE_MODEL if noisy else None)
+    parameters = rng.random(network.num_parameters) * 2 * np.pi
+    data = rng.random((batch_size, num_qubits)) * 2 * np.pi
+    labels = np.eye(2)[rng.integers(0, 2, batch_size)]
+
+    if suite == "forward":
+        if batch_size == 1:
+            return lambda: network.predict(data[0], parameters), 1
+        return lambda: network.predict_batch(data, parameters), batch_size
+    if suite == "gradient":
+        if batch_size == 1:
+            return lambda: network.calculate_gradient(data[0], parameters, labels[0]), 1
+        return lambda: network.calculate_batch_gradient(data, parameters, labels), batch_size
+
+    data = rng.random((epoch_samples, num_qubits)) * 2 * np.pi
+    labels = np.eye(2)[rng.integers(0, 2, epoch_samples)]
+    return lambda: network.train_network(data, labels, epochs=1, batch_size=batch_size, log_every=0), epoch_samples
+
+
+def evaluator_case(module, backend, variant, num_qubits, batch_size, rng):
+    # "qiskit" evaluates exactly with Statevector, "aer" samples shots on Aer
+    evaluator = module.TechSolutionEvaluator(num_qubits=num_qubits, exact=variant == "exact",
+                                             backend="numpy" if backend == "numpy" else "qiskit", seed=0)
+    solutions = rng.random((batch_size, 4))
+    if batch_size == 1:
+        return lambda: evaluator.evaluate_solution(solutions[0]), 1
+    return lambda: evaluator.evaluate_batch(solutions), batch_size
+
+
+def variants(suite, backend):
+    if suite == "gradient":
+        # Adjoint gradients never touch the backend, so time them once
+        return ("adjoint", "parameter_shift") if backend == "numpy" else ("parameter_shift",)
+    if suite == "evaluator":
+        return {"numpy": ("exact", "shots"), "qiskit": ("exact",), "aer": ("shots",)}.get(backend, ())
+    return ("default",)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    evaluator_module = load_evaluator_module() if "evaluator" in args.suites else None
+    results = []
+    for suite in args.suites:
+        for backend in args.backends:
+            for variant in variants(suite, backend):
+                layer_counts = (None,) if suite == "evaluator" else args.layers
+                for num_layers in layer_counts:
+                    for batch_size in args.batch_sizes:
+                        # Qubit counts run smallest first; once one is too slow, larger ones are skipped
+                        too_slow = None
+                        for num_qubits in sorted(args.qubits):
+                            record = {"suite": suite, "backend": backend, "variant": variant,
+                                      "num_qubits": num_qubits, "num_layers": num_layers, "batch_size": batch_size}
+                            rows = args.epoch_samples if suite == "epoch" else batch_size
+                            if too_slow is not None:
+                                record["skipped"] = too_slow
+                            elif rows * amplitudes_per_row(backend, num_qubits) > args.max_amplitudes:
+                                record["skipped"] = (f"{rows} x {amplitudes_per_row(backend, num_qubits)} "
+                                                     "amplitudes exceed --max-amplitudes")
+                            else:
+                                try:
+                                    if suite == "evaluator":
+                                        function, items = evaluator_case(evaluator_module, backend, variant,
+                                                                         num_qubits, batch_size, rng)
+                                    else:
+                                        function, items = network_case(suite, backend, variant, num_qubits,
+                                                                       num_layers, batch_size,
+                                                                       args.epoch_samples, rng)
+                                    seconds = best_time(function, args.repeat)
+                                except ImportError as error:
+                                    # Optional dependency missing, e.g. qiskit-aer
+                                    record["skipped"] = f"{type(error).__name__}: {error}"
+                                else:
+                                    record.update(seconds=seconds, items_per_second=items / seconds)
+                                    if seconds > args.time_limit:
+                                        too_slow = f"{num_qubits} qubits took {seconds:.2f}s (--time-limit)"
+                            results.append(record)
+                            if not args.json:
+                                print(format_record(record), flush=True)
+    return results
+
+
+def environment():
+    info = {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    for name in ("qiskit", "qiskit_aer"):
+        module = sys.modules.get(name)
+        if module is not None:
+            info[name] = getattr(module, "__version__", "unknown")
+    return info
+
+
+def format_record(record):
+    layers = "-" if record["num_layers"] is None else record["num_layers"]
+    head = (f"{record['suite']:<10} {record['backend']:<14} {record['variant']:<16} {record['num_qubits']:>3}q "
+            f"L={layers:<2} batch={record['batch_size']:<5}")
+    if "skipped" in record:
+        return f"{head} skipped ({record['skipped']})"
+    return f"{head} {record['seconds'] * 1e3:>10.3f} ms {record['items_per_second']:>12.1f}/s"
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return (configuration name, seconds / baseline seconds) for every result
+    slower than its baseline by more than tolerance
+    """
+    baseline_seconds = {tuple(record[field] for field in KEY_FIELDS): record["seconds"]
+                        for record in baseline["results"] if "seconds" in record}
+    regressions = []
+    for record in results:
+        key = tuple(record[field] for field in KEY_FIELDS)
+        if "seconds" in record and key in baseline_seconds:
+            ratio = record["seconds"] / baseline_seconds[key]
+            if ratio > 1 + tolerance:
+                regressions.append((format_record(record), ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[4, 8, 12, 16, 20])
+    parser.add_argument("--layers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--epoch-samples", type=int, default=64, help="training rows per timed epoch")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per configuration (best is kept)")
+    parser.add_argument("--max-amplitudes", type=int, default=2 ** 24,
+                        help="skip configurations simulating more amplitudes at once")
+    parser.add_argument("--time-limit", type=float, default=10.0,
+                        help="skip larger qubit counts once one configuration takes longer, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write machine-readable results to this file")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--compare", help="results file of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against --compare")
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {"environment": environment(), "arguments": vars(args), "results": results}
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = [{"configuration": name, "ratio": ratio} for name, ratio in regressions]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, ratio in regressions:
+            print(f"REGRESSION: {name} ({ratio:.2f}x baseline)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
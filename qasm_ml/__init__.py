@@ -0,0 +1,136 @@
+from .ansatz import ENTANGLERS, ENTANGLING_GATES, ROTATIONS, Ansatz, EntanglingBlock, entangling_pairs
+from .backends import BACKENDS, AerBackend, Backend, NumpyBackend, QiskitBackend, get_backend
+from .batching import iterate_minibatches, iterate_row_batches, split_validation
+from .checkpoint import TrainingState, start_training
+from .gradients import (
+    GRADIENT_METHODS,
+    AdjointDifferentiator,
+    GateTape,
+    InputParameter,
+    TrainableParameter,
+    parameter_shift_jacobian,
+)
+from .losses import LOSSES, CrossEntropy, Loss, NormalizedCrossEntropy, SquaredError, get_loss
+from .model import MODEL_VERSION, TrainedModel
+from .mps import MPSBackend, MPSSimulator
+from .network import QASMNeuralNetwork
+from .noise import NOISE_ENGINES, DensityMatrixSimulator, NoiseModel, NoisyBackend
+from .optimizers import (
+    OPTIMIZERS,
+    SGD,
+    SPSA,
+    LBFGS,
+    Adam,
+    CosineAnnealing,
+    EarlyStopping,
+    ExponentialDecay,
+    Momentum,
+    Objective,
+    Optimizer,
+    StepDecay,
+    get_optimizer,
+)
+from .parallel import EXECUTOR_KINDS, WorkerPool
+from .qasm import QASM_GATES, BranchingSimulator, QasmProgram, QasmRunner
+from .readout import (
+    READOUTS,
+    BasisReadout,
+    HammingWeightReadout,
+    LinearReadout,
+    MappedReadout,
+    ParityReadout,
+    QubitReadout,
+    Readout,
+    get_readout,
+    popcount,
+    qubit_marginals,
+)
+from .scaling import FeatureScaler, normalize_and_scale
+from .stabilizer import StabilizerState
+from .statevector import PRECISIONS, ProductState, StatevectorSimulator
+from .telemetry import PHASES, Callback, History, JSONLinesLogger, PhaseTimer, ProfileEpoch, Telemetry, peak_memory_mb
+
+__all__ = [
+    "BACKENDS",
+    "ENTANGLERS",
+    "ENTANGLING_GATES",
+    "GRADIENT_METHODS",
+    "LOSSES",
+    "MODEL_VERSION",
+    "NOISE_ENGINES",
+    "OPTIMIZERS",
+    "PHASES",
+    "PRECISIONS",
+    "QASM_GATES",
+    "READOUTS",
+    "ROTATIONS",
+    "Adam",
+    "AdjointDifferentiator",
+    "AerBackend",
+    "Ansatz",
+    "Backend",
+    "BasisReadout",
+    "BranchingSimulator",
+    "Callback",
+    "CosineAnnealing",
+    "CrossEntropy",
+    "DensityMatrixSimulator",
+    "EXECUTOR_KINDS",
+    "EarlyStopping",
+    "EntanglingBlock",
+    "ExponentialDecay",
+    "FeatureScaler",
+    "GateTape",
+    "HammingWeightReadout",
+    "History",
+    "InputParameter",
+    "JSONLinesLogger",
+    "LBFGS",
+    "LinearReadout",
+    "Loss",
+    "MPSBackend",
+    "MPSSimulator",
+    "MappedReadout",
+    "Momentum",
+    "NoiseModel",
+    "NoisyBackend",
+    "NormalizedCrossEntropy",
+    "NumpyBackend",
+    "Objective",
+    "Optimizer",
+    "ParityReadout",
+    "PhaseTimer",
+    "ProductState",
+    "ProfileEpoch",
+    "QASMNeuralNetwork",
+    "QasmProgram",
+    "QasmRunner",
+    "QiskitBackend",
+    "QubitReadout",
+    "Readout",
+    "SGD",
+    "SPSA",
+    "SquaredError",
+    "StabilizerState",
+    "StatevectorSimulator",
+    "StepDecay",
+    "Telemetry",
+    "TrainableParameter",
+    "TrainedModel",
+    "TrainingState",
+    "WorkerPool",
+    "entangling_pairs",
+    "get_backend",
+    "get_loss",
+    "get_optimizer",
+    "get_readout",
+    "iterate_minibatches",
+    "iterate_row_batches",
+    "normalize_and_scale",
+    "parameter_shift_jacobian",
+    "peak_memory_mb",
+    "popcount",
+    "qubit_marginals",
+    "split_validation",
+    "start_training",
+]
@@ -0,0 +1,200 @@
+import numpy as np
+
+ENTANGLERS = ("linear", "ring", "all_to_all", "brickwork")
+ROTATIONS = ("rx", "ry", "rz")
+ENTANGLING_GATES = ("cx", "cz")
+
+
+def entangling_pairs(entangler, num_qubits, layer=0):
+    """
+    Return the (control, target) pairs of one entangling block: a name in
+    ENTANGLERS or an explicit list of pairs. Brickwork alternates between
+    even and odd neighbour pairs from layer to layer.
+    """
+    if not isinstance(entangler, str):
+        pairs = [(int(control), int(target)) for control, target in entangler]
+        for control, target in pairs:
+            if control == target or not (0 <= control < num_qubits and 0 <= target < num_qubits):
+                raise ValueError(f"Invalid entangling pair ({control}, {target}) for {num_qubits} qubits")
+        return pairs
+    if entangler == "linear":
+        return [(i, i + 1) for i in range(num_qubits - 1)]
+    if entangler == "ring":
+        if num_qubits < 2:
+            return []
+        return [(i, i + 1) for i in range(num_qubits - 1)] + [(num_qubits - 1, 0)]
+    if entangler == "all_to_all":
+        return [(i, j) for i in range(num_qubits) for j in range(i + 1, num_qubits)]
+    if entangler == "brickwork":
+        return [(i, i + 1) for i in range(layer % 2, num_qubits - 1, 2)]
+    raise ValueError(f"Unknown entangler '{entangler}', expected one of {ENTANGLERS} or a list of qubit pairs")
+
+
+class EntanglingBlock:
+    """
+    A fixed sequence of CX and CZ gates fused into a single operation.
+
+    CX gates only move amplitudes between basis states and CZ gates only
+    flip signs, so any sequence of them composes into one index
+    permutation followed by one diagonal sign vector:
+    ``permutation[j]`` is the old basis state whose amplitude ends up in
+    state j, and ``phases`` (None when there are no CZ gates) multiplies
+    the result. Either way the block costs one pass over the state however
+    many gates it holds.
+    """
+
+    def __init__(self, num_qubits, pairs, gate="cx"):
+        if gate not in ENTANGLING_GATES:
+            raise ValueError(f"Unknown entangling gate '{gate}', expected one of {ENTANGLING_GATES}")
+        self._fuse(num_qubits, [(gate, control, target) for control, target in pairs])
+
+    @classmethod
+    def from_gates(cls, num_qubits, gates):
+        """
+        Fuse a list of (name, control, target) gates, name "cx" or "cz"
+        """
+        block = cls.__new__(cls)
+        block._fuse(num_qubits, gates)
+        return block
+
+    def _fuse(self, num_qubits, gates):
+        self.num_qubits = num_qubits
+        self.gates = [(name, int(control), int(target)) for name, control, target in gates]
+        self.pairs = [(control, target) for _, control, target in self.gates]
+        self.qubits = {qubit for pair in self.pairs for qubit in pair}
+        self._inverse = None
+        self._permutation = self._phases = None
+        for name, _, _ in self.gates:
+            if name not in ENTANGLING_GATES:
+                raise ValueError(f"Unknown entangling gate '{name}', expected one of {ENTANGLING_GATES}")
+
+    def _build(self):
+        # Follow every basis state |x> through the gates: U|x> = sign[x] |destination[x]>
+        destination = np.arange(2 ** self.num_qubits)
+        sign = np.zeros_like(destination)
+        for name, control, target in self.gates:
+            if name == "cx":
+                destination ^= ((destination >> control) & 1) << target
+            else:
+                sign ^= (destination >> control) & (destination >> target) & 1
+
+        # Invert to a gather index, carrying each amplitude's sign along
+        self._permutation = np.argsort(destination)
+        if any(name == "cz" for name, _, _ in self.gates):
+            self._phases = 1.0 - 2.0 * sign[self._permutation]
+
+    @property
+    def permutation(self):
+        """
+        Gather index over the 2**num_qubits basis states, built on first
+        use so blocks of wide circuits (simulated gate by gate) stay cheap
+        """
+        if self._permutation is None:
+            self._build()
+        return self._permutation
+
+    @property
+    def phases(self):
+        if self._permutation is None:
+            self._build()
+        return self._phases
+
+    @property
+    def inverse(self):
+        """
+        The block undoing this one, as used by the adjoint backward sweep
+        """
+        if self._inverse is None:
+            # CX and CZ are self-inverse, so the inverse runs the gates backwards
+            self._inverse = EntanglingBlock.from_gates(self.num_qubits, self.gates[::-1])
+            self._inverse._inverse = self
+        return self._inverse
+
+    def apply_gates(self, qc):
+        """
+        Issue the block gate by gate, e.g. on a Qiskit QuantumCircuit
+        """
+        for name, control, target in self.gates:
+            getattr(qc, name)(control, target)
+        return qc
+
+
+class Ansatz:
+    """
+    Layered variational circuit: an angle-encoding rotation per input,
+    then num_layers layers of trainable rotations followed by an
+    entangling block.
+
+    rotations lists the trainable gates (any of ROTATIONS) applied per
+    layer to each of trainable_qubits (default: every qubit); entangler is a name in ENTANGLERS or a list of (control, target)
+    pairs, and entangling_gate is "cx" or "cz". With k trainable qubits,
+    parameter layer * len(rotations) * k + r * k + j drives rotation r on
+    trainable_qubits[j].
+
+    ``apply_gates`` follows the shared gate API. Targets with an
+    ``entangle`` method (StatevectorSimulator, GateTape) receive each
+    entangling block as one precomputed EntanglingBlock; others, such as a
+    Qiskit QuantumCircuit, receive the individual gates.
+    """
+
+    def __init__(self, num_qubits, num_layers=1, rotations=("ry",), entangler="ring", entangling_gate="cx",
+                 encoding="rx", trainable_qubits=None):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+        if num_layers < 1:
+            raise ValueError("Number of layers must be positive")
+        rotations = (rotations,) if isinstance(rotations, str) else tuple(rotations)
+        for rotation in rotations + (encoding,):
+            if rotation not in ROTATIONS:
+                raise ValueError(f"Unknown rotation '{rotation}', expected one of {ROTATIONS}")
+        trainable_qubits = tuple(range(num_qubits)) if trainable_qubits is None else tuple(map(int, trainable_qubits))
+        for qubit in trainable_qubits:
+            if not 0 <= qubit < num_qubits:
+                raise ValueError(f"Trainable qubit {qubit} out of range for {num_qubits} qubits")
+
+        self.num_qubits = num_qubits
+        self.num_layers = num_layers
+        self.rotations = rotations
+        self.entangler = entangler
+        self.entangling_gate = entangling_gate
+        self.encoding = encoding
+        self.trainable_qubits = trainable_qubits
+        self.num_parameters = num_layers * len(rotations) * len(trainable_qubits)
+
+        # Blocks are fused once and shared by layers with the same pairs (brickwork alternates two)
+        fused = {}
+        self.blocks = []
+        for layer in range(num_layers):
+            pairs = tuple(entangling_pairs(entangler, num_qubits, layer))
+            if pairs not in fused:
+                fused[pairs] = EntanglingBlock(num_qubits, pairs, entangling_gate) if pairs else None
+            self.blocks.append(fused[pairs])
+
+    @property
+    def num_entangling_gates(self):
+        return sum(len(block.gates) for block in self.blocks if block is not None)
+
+    def apply_gates(self, qc, input_data, parameters):
+        # qc is a QuantumCircuit, StatevectorSimulator or GateTape; all share the gate API
+        # Encode input data using rotation gates
+        encode = getattr(qc, self.encoding)
+        for i, data in enumerate(input_data):
+            encode(data, i)
+
+        index = 0
+        for block in self.blocks:
+            # Trainable rotations on every trainable qubit
+            for rotation in self.rotations:
+                rotate = getattr(qc, rotation)
+                for qubit in self.trainable_qubits:
+                    rotate(parameters[index], qubit)
+                    index += 1
+
+            # Entangling block, fused where the target supports it
+            if block is None:
+                continue
+            if hasattr(qc, "entangle"):
+                qc.entangle(block)
+            else:
+                block.apply_gates(qc)
+        return qc
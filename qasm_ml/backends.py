@@ -0,0 +1,241 @@
+import numpy as np
+
+from .gradients import parameter_shift_jacobian
+from .statevector import ProductState, StatevectorSimulator, precision_dtype
+from .telemetry import phase
+
+BACKENDS = ("numpy", "qiskit", "aer", "density_matrix", "trajectories", "mps")
+
+
+def qiskit_template(tape):
+    """
+    Return (circuit, input_parameters, weight_parameters): the Qiskit
+    circuit recorded on a template GateTape, over "x" input and "theta"
+    weight ParameterVectors
+    """
+    from qiskit import QuantumCircuit
+    from qiskit.circuit import ParameterVector
+
+    input_parameters = ParameterVector("x", len(tape.inputs))
+    weight_parameters = ParameterVector("theta", len(tape.parameters))
+    circuit = tape.apply(QuantumCircuit(tape.num_qubits), weight_parameters, input_parameters)
+    return circuit, input_parameters, weight_parameters
+
+
+class Backend:
+    """
+    Simulation engine for the circuit recorded on a template GateTape.
+
+    ``statevector`` takes the trainable parameters and the inputs as
+    returned by ``tape.pad_inputs``: one sample, or a feature-first batch
+    of batch_size samples. It returns the final statevector, shape
+    (2**n,) or (batch_size, 2**n), as a NumPy array; ``probabilities``
+    returns the measurement distribution of the same shape, which noisy
+    backends provide without a statevector. ``outputs`` applies a Readout
+    to that distribution and ``jacobian`` differentiates the outputs by
+    the shift rule; backends that never form the distribution (MPSBackend)
+    override both. While ``timer`` holds a PhaseTimer, backends may charge
+    circuit construction and readout to it. ``close`` releases worker
+    pools a backend holds.
+    """
+
+    name = None
+
+    def __init__(self, tape):
+        self.tape = tape
+        self.timer = None
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def probabilities(self, parameters, inputs, batch_size=None):
+        return np.abs(self.statevector(parameters, inputs, batch_size)) ** 2
+
+    def outputs(self, readout, parameters, inputs, batch_size=None):
+        """
+        Class outputs of readout, shape (num_outputs,) or (batch_size,
+        num_outputs)
+        """
+        distribution = self.probabilities(parameters, inputs, batch_size)
+        with phase(self.timer, "readout"):
+            return readout(distribution)
+
+    def jacobian(self, readout, parameters, inputs, batch_size=None, shift=np.pi / 2):
+        """
+        d outputs / d parameters with parameters along a new last axis, see
+        parameter_shift_jacobian
+        """
+        return parameter_shift_jacobian(lambda params: self.outputs(readout, params, inputs, batch_size),
+                                        parameters, shift)
+
+
+class NumpyBackend(Backend):
+    """
+    Replays the fused tape on preallocated StatevectorSimulator registers,
+    one per batch size. The gates before the first entangling gate (the
+    input encoding and the first trainable rotations) only produce a
+    product state, so they run per qubit on a ProductState that is then
+    expanded into the register in one sweep. ``precision`` is
+    "complex128" or "complex64", see StatevectorSimulator.
+
+    Statevectors and probabilities are views of buffers allocated once per
+    batch size and are only valid until the next call with the same batch
+    size, so repeated evaluations allocate nothing of register size.
+    """
+
+    name = "numpy"
+
+    def __init__(self, tape, precision="complex128"):
+        super().__init__(tape)
+        self.precision = precision_dtype(precision).name
+        self.prefix_tape, rest = tape.split(tape.product_prefix_length())
+        self.forward_tape = rest.fused()
+        self.simulators = {}
+
+    def run(self, parameters, inputs, batch_size=None):
+        """
+        Simulate the tape and return the StatevectorSimulator holding the
+        result
+        """
+        if batch_size not in self.simulators:
+            simulator = StatevectorSimulator(self.tape.num_qubits, batch_size, self.precision)
+            self.simulators[batch_size] = (simulator, ProductState(self.tape.num_qubits, batch_size, self.precision),
+                                           np.empty(simulator.statevector().shape, dtype=simulator._real_dtype))
+        simulator, product_state, _ = self.simulators[batch_size]
+        # Each padded input is a per-sample angle array, broadcast over the batch
+        self.prefix_tape.apply_product(simulator, product_state, parameters, inputs)
+        self.forward_tape.apply(simulator, parameters, inputs)
+        return simulator
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        return self.run(parameters, inputs, batch_size).statevector()
+
+    def probabilities(self, parameters, inputs, batch_size=None):
+        simulator = self.run(parameters, inputs, batch_size)
+        return simulator.probabilities(out=self.simulators[batch_size][2])
+
+
+class QiskitBackend(Backend):
+    """
+    Binds a Qiskit template and simulates it with ``Statevector``, one
+    circuit per sample. Qiskit is imported when the template is first
+    needed.
+    """
+
+    name = "qiskit"
+
+    def __init__(self, tape):
+        super().__init__(tape)
+        self._template = None
+
+    @property
+    def template(self):
+        if self._template is None:
+            self._template = qiskit_template(self.tape)
+        return self._template
+
+    def bind(self, parameters, inputs):
+        circuit, input_parameters, weight_parameters = self.template
+        values = dict(zip(input_parameters, inputs))
+        values.update(zip(weight_parameters, parameters))
+        return circuit.assign_parameters(values)
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        from qiskit.quantum_info import Statevector
+
+        rows = [inputs] if batch_size is None else np.asarray(inputs).T
+        statevectors = []
+        for row in rows:
+            with phase(self.timer, "construction"):
+                circuit = self.bind(parameters, row)
+            statevectors.append(np.asarray(Statevector.from_instruction(circuit)))
+        return statevectors[0] if batch_size is None else np.stack(statevectors)
+
+
+def aer_simulator(**options):
+    """
+    Return an AerSimulator with options, from qiskit-aer or, before 0.11,
+    the qiskit namespace
+    """
+    try:
+        from qiskit_aer import AerSimulator
+    except ImportError:
+        from qiskit.providers.aer import AerSimulator
+    return AerSimulator(**options)
+
+
+class AerBackend(QiskitBackend):
+    """
+    Runs the bound circuits on Aer's statevector method, a whole batch per
+    job, in single precision for precision "complex64". Needs the
+    qiskit-aer package.
+    """
+
+    name = "aer"
+
+    def __init__(self, tape, precision="complex128"):
+        super().__init__(tape)
+        self.precision = precision_dtype(precision).name
+        self._simulator = None
+
+    @property
+    def simulator(self):
+        if self._simulator is None:
+            self._simulator = aer_simulator(method="statevector",
+                                            precision="single" if self.precision == "complex64" else "double")
+        return self._simulator
+
+    @property
+    def template(self):
+        if self._template is None:
+            # Importing Aer adds save_statevector to QuantumCircuit
+            self.simulator
+            circuit, input_parameters, weight_parameters = qiskit_template(self.tape)
+            circuit.save_statevector()
+            self._template = circuit, input_parameters, weight_parameters
+        return self._template
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        rows = [inputs] if batch_size is None else np.asarray(inputs).T
+        with phase(self.timer, "construction"):
+            circuits = [self.bind(parameters, row) for row in rows]
+        result = self.simulator.run(circuits).result()
+        statevectors = np.stack([np.asarray(result.get_statevector(i)) for i in range(len(rows))])
+        return statevectors[0] if batch_size is None else statevectors
+
+
+def get_backend(backend, tape, noise_model=None, precision="complex128", executor=None, num_workers=None):
+    """
+    Return the Backend simulating tape: one of the names in BACKENDS, or
+    a Backend subclass (or any factory taking the tape). With a
+    noise_model, "numpy" picks the cheaper noisy engine for the circuit
+    and "density_matrix" or "trajectories" force one; executor and
+    num_workers spread its trajectories over a WorkerPool. Only "numpy"
+    and "aer" simulate in precision "complex64".
+    """
+    if precision_dtype(precision).name != "complex128" and (noise_model is not None or backend not in ("numpy", "aer")):
+        raise ValueError(f"Precision '{precision}' needs the 'numpy' or 'aer' backend without noise")
+    if backend in ("density_matrix", "trajectories") or (noise_model is not None and backend == "numpy"):
+        from .noise import NoisyBackend
+
+        return NoisyBackend(tape, noise_model, engine="auto" if backend == "numpy" else backend, executor=executor,
+                            num_workers=num_workers)
+    if backend == "mps" and noise_model is None:
+        from .mps import MPSBackend
+
+        return MPSBackend(tape)
+    if noise_model is not None:
+        raise ValueError(f"Backend '{backend}' cannot simulate a noise model, use 'numpy', "
+                         "'density_matrix' or 'trajectories'")
+    if backend == "numpy":
+        return NumpyBackend(tape, precision)
+    if backend == "qiskit":
+        return QiskitBackend(tape)
+    if backend == "aer":
+        return AerBackend(tape, precision)
+    if callable(backend):
+        return backend(tape)
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS} or a Backend class")
@@ -0,0 +1,78 @@
+import itertools
+import os
+
+import numpy as np
+
+
+def iterate_minibatches(num_samples, batch_size=None, shuffle=True):
+    """
+    Yield index arrays covering range(num_samples) in chunks of batch_size.
+    batch_size=None yields a single full batch.
+    """
+    if batch_size is None:
+        batch_size = num_samples
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+
+    order = np.random.permutation(num_samples) if shuffle else np.arange(num_samples)
+    for start in range(0, num_samples, batch_size):
+        yield order[start:start + batch_size]
+
+
+def split_validation(num_samples, validation_split):
+    """
+    Return shuffled (train_indices, validation_indices) holding out a
+    validation_split fraction of range(num_samples), at least one sample
+    """
+    if not 0 < validation_split < 1:
+        raise ValueError("Validation split must be between 0 and 1")
+    num_validation = max(1, int(round(num_samples * validation_split)))
+    if num_validation >= num_samples:
+        raise ValueError(f"Validation split {validation_split} leaves no training samples out of {num_samples}")
+
+    order = np.random.permutation(num_samples)
+    return order[num_validation:], order[:num_validation]
+
+
+def iterate_row_batches(source, batch_size, delimiter=",", skip_header=0):
+    """
+    Yield float arrays of at most batch_size rows from source: a 2-D array
+    (sliced, so a memory-mapped one is never loaded whole), any iterable
+    of rows such as a generator, or the path of a .npy file or delimited
+    text file. Files are read lazily, so memory stays bounded by one batch.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if not path.endswith(".npy"):
+            yield from _iterate_text_batches(path, batch_size, delimiter, skip_header)
+            return
+        source = np.load(path, mmap_mode="r")
+
+    if isinstance(source, np.ndarray):
+        if source.ndim != 2:
+            raise ValueError("Row arrays must be 2-dimensional (rows, columns)")
+        for start in range(0, len(source), batch_size):
+            yield np.array(source[start:start + batch_size], dtype=float)
+        return
+
+    rows = iter(source)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield np.array(batch, dtype=float)
+
+
+def _iterate_text_batches(path, batch_size, delimiter, skip_header):
+    with open(path) as f:
+        for _ in range(skip_header):
+            next(f, None)
+        lines = (line for line in f if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, batch_size))
+            if not chunk:
+                return
+            yield np.loadtxt(chunk, delimiter=delimiter, ndmin=2)
@@ -0,0 +1,171 @@
+import json
+import os
+
+import numpy as np
+
+from .batching import split_validation
+
+CHECKPOINT_VERSION = 1
+
+
+def _to_builtin(value):
+    # json cannot encode NumPy scalars such as np.int64
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in checkpoint metadata")
+
+
+class TrainingState:
+    """
+    Everything needed to resume an interrupted training run: current and
+    best parameters, per-epoch loss histories, the validation split and,
+    when saving, the optimizer, early-stopping and global NumPy RNG state.
+
+    Checkpoints are single compressed .npz files. Arrays are stored
+    natively and scalars in a JSON "metadata" entry, so loading never needs
+    pickle. ``save`` writes to a temporary file and renames it into place,
+    so a process killed mid-save keeps its previous checkpoint.
+    """
+
+    def __init__(self, parameters, validation_indices=None):
+        self.parameters = np.array(parameters, dtype=float)
+        self.best_parameters = self.parameters.copy()
+        self.best_loss = float('inf')
+        self.epoch = 0  # Next epoch to run
+        self.loss_history = []
+        self.validation_history = []
+        self.validation_indices = validation_indices
+        # Filled in by load and applied by restore
+        self.optimizer_name = None
+        self.optimizer_state = None
+        self.early_stopping_state = None
+        self.rng_state = None
+
+    def split(self, training_data, labels):
+        """
+        Return (train_data, train_labels, validation_data, validation_labels);
+        the validation pair is (None, None) without a validation split
+        """
+        if self.validation_indices is None:
+            return training_data, labels, None, None
+        training_data = np.asarray(training_data, dtype=float)
+        labels = np.asarray(labels)
+        train_mask = np.ones(len(training_data), dtype=bool)
+        train_mask[self.validation_indices] = False
+        return (training_data[train_mask], labels[train_mask],
+                training_data[self.validation_indices], labels[self.validation_indices])
+
+    def record(self, parameters, loss, validation_loss=None):
+        """
+        Close an epoch: store its losses and keep the best parameters so
+        far, judged by validation loss when there is one. Returns the loss
+        that was judged.
+        """
+        self.parameters = np.array(parameters, dtype=float)
+        self.loss_history.append(float(loss))
+        if validation_loss is not None:
+            self.validation_history.append(float(validation_loss))
+        monitored_loss = loss if validation_loss is None else validation_loss
+        if monitored_loss < self.best_loss:
+            self.best_loss = float(monitored_loss)
+            self.best_parameters = self.parameters.copy()
+        self.epoch += 1
+        return monitored_loss
+
+    def save(self, path, optimizer=None, early_stopping=None):
+        rng_name, rng_keys, rng_position, has_gauss, cached_gaussian = np.random.get_state()
+        arrays = {
+            "parameters": self.parameters,
+            "best_parameters": self.best_parameters,
+            "loss_history": np.asarray(self.loss_history, dtype=float),
+            "validation_history": np.asarray(self.validation_history, dtype=float),
+            "rng_keys": rng_keys,
+        }
+        if self.validation_indices is not None:
+            arrays["validation_indices"] = np.asarray(self.validation_indices)
+        metadata = {
+            "version": CHECKPOINT_VERSION,
+            "epoch": self.epoch,
+            "best_loss": self.best_loss,
+            "rng": [rng_name, rng_position, has_gauss, cached_gaussian],
+            "optimizer": None,
+            "optimizer_state": None,
+            "early_stopping_state": early_stopping.state_dict() if early_stopping is not None else None,
+        }
+        if optimizer is not None:
+            metadata["optimizer"] = type(optimizer).__name__
+            metadata["optimizer_state"] = {}
+            for name, value in optimizer.state_dict().items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"optimizer.{name}"] = value
+                else:
+                    metadata["optimizer_state"][name] = value
+
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(f, metadata=np.array(json.dumps(metadata, default=_to_builtin)), **arrays)
+        os.replace(temporary_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(data["metadata"].item())
+            if metadata["version"] != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {metadata['version']} in {path}")
+
+            validation_indices = data["validation_indices"] if "validation_indices" in data else None
+            state = cls(data["parameters"], validation_indices)
+            state.best_parameters = data["best_parameters"]
+            state.best_loss = metadata["best_loss"]
+            state.epoch = metadata["epoch"]
+            state.loss_history = data["loss_history"].tolist()
+            state.validation_history = data["validation_history"].tolist()
+
+            state.optimizer_name = metadata["optimizer"]
+            state.optimizer_state = metadata["optimizer_state"]
+            if state.optimizer_state is not None:
+                for key in data.files:
+                    if key.startswith("optimizer."):
+                        state.optimizer_state[key[len("optimizer."):]] = data[key]
+            state.early_stopping_state = metadata["early_stopping_state"]
+
+            rng_name, rng_position, has_gauss, cached_gaussian = metadata["rng"]
+            state.rng_state = (rng_name, data["rng_keys"], rng_position, has_gauss, cached_gaussian)
+        return state
+
+    def restore(self, optimizer=None, early_stopping=None):
+        """
+        Load the saved optimizer, early-stopping and NumPy RNG state so the
+        resumed run continues exactly where the checkpoint was taken
+        """
+        if optimizer is not None and self.optimizer_state is not None:
+            if type(optimizer).__name__ != self.optimizer_name:
+                raise ValueError(f"Checkpoint was saved with a {self.optimizer_name} optimizer, "
+                                 f"cannot resume with {type(optimizer).__name__}")
+            optimizer.load_state_dict(self.optimizer_state)
+        if early_stopping is not None and self.early_stopping_state is not None:
+            early_stopping.load_state_dict(self.early_stopping_state)
+        if self.rng_state is not None:
+            np.random.set_state(self.rng_state)
+        return self
+
+
+def start_training(initial_parameters, num_samples, validation_split=None, resume_from=None,
+                   optimizer=None, early_stopping=None):
+    """
+    Return the TrainingState a run starts from: the checkpoint at
+    resume_from, restored into optimizer and early_stopping, or a fresh
+    state at initial_parameters that holds out a validation_split fraction
+    of the num_samples training rows
+    """
+    if resume_from is None:
+        validation_indices = split_validation(num_samples, validation_split)[1] if validation_split else None
+        return TrainingState(initial_parameters, validation_indices)
+
+    state = TrainingState.load(resume_from)
+    if len(state.parameters) != len(initial_parameters):
+        raise ValueError(f"Checkpoint has {len(state.parameters)} parameters, expected {len(initial_parameters)}")
+    if state.validation_indices is not None and np.max(state.validation_indices) >= num_samples:
+        raise ValueError("Checkpoint validation split does not fit the training data")
+    return state.restore(optimizer, early_stopping)
@@ -0,0 +1,337 @@
+import numpy as np
+
+from .ansatz import EntanglingBlock
+from .statevector import ProductState, StatevectorSimulator
+
+ROTATION_GATES = ("rx", "ry", "rz")
+# Fixed single-qubit gates fuse into rotation runs like rotations do
+SINGLE_QUBIT_GATES = ROTATION_GATES + ("h",)
+
+GRADIENT_METHODS = ("adjoint", "parameter_shift", "finite_difference")
+
+
+class TrainableParameter:
+    """
+    Placeholder recorded on a GateTape in place of parameters[index]
+    """
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class InputParameter:
+    """
+    Placeholder recorded on a GateTape in place of input_data[index]
+    """
+
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class GateTape:
+    """
+    Records the gates issued by a circuit-building function through the
+    QuantumCircuit gate API (h, rx, ry, rz, cx, cz, plus fused
+    ``entangle`` blocks) so the sequence can be replayed on a StatevectorSimulator and
+    differentiated. Pass ``tape.parameters`` in place of the trainable
+    parameter vector, and optionally ``tape.inputs`` in place of the input
+    data, while recording; the tape is then a template that ``apply``
+    binds to concrete values.
+    """
+
+    def __init__(self, num_qubits, num_parameters, num_inputs=0):
+        self.num_qubits = num_qubits
+        self.parameters = [TrainableParameter(i) for i in range(num_parameters)]
+        self.inputs = [InputParameter(i) for i in range(num_inputs)]
+        self.operations = []
+
+    def rx(self, theta, qubit):
+        self.operations.append(("rx", theta, (qubit,)))
+        return self
+
+    def ry(self, theta, qubit):
+        self.operations.append(("ry", theta, (qubit,)))
+        return self
+
+    def rz(self, theta, qubit):
+        self.operations.append(("rz", theta, (qubit,)))
+        return self
+
+    def h(self, qubit):
+        self.operations.append(("h", None, (qubit,)))
+        return self
+
+    def cx(self, control, target):
+        self.operations.append(("cx", None, (control, target)))
+        return self
+
+    def cz(self, control, target):
+        self.operations.append(("cz", None, (control, target)))
+        return self
+
+    def entangle(self, block):
+        self.operations.append(("entangle", None, (block,)))
+        return self
+
+    def pad_inputs(self, input_data):
+        """
+        Zero-pad input_data, one sample or a (samples, features) batch, to
+        the tape's input count and return it indexed by input position.
+        RX(0) is the identity, so padding does not change the circuit.
+        """
+        input_data = np.asarray(input_data, dtype=float)
+        if input_data.shape[-1] > len(self.inputs):
+            raise ValueError(f"Input data length ({input_data.shape[-1]}) exceeds number of inputs ({len(self.inputs)})")
+        padded = np.zeros(input_data.shape[:-1] + (len(self.inputs),))
+        padded[..., :input_data.shape[-1]] = input_data
+        # Batches are indexed feature-first so each input is one per-sample column
+        return padded.T
+
+    def apply(self, simulator, parameters, inputs=None):
+        """
+        Replay the recorded gates on ``simulator`` with the given parameter
+        values and, for templates, the output of ``pad_inputs``. Targets
+        without an ``entangle`` method, such as a Qiskit QuantumCircuit,
+        receive entangling blocks gate by gate.
+        """
+        fused_blocks = hasattr(simulator, "entangle")
+        for name, angle, qubits in self.operations:
+            if name == "entangle" and not fused_blocks:
+                qubits[0].apply_gates(simulator)
+            elif angle is None:
+                getattr(simulator, name)(*qubits)
+            elif name == "rotations":
+                simulator.rotations([(gate, resolve_angle(theta, parameters, inputs)) for gate, theta in angle], *qubits)
+            else:
+                getattr(simulator, name)(resolve_angle(angle, parameters, inputs), *qubits)
+        return simulator
+
+    def product_prefix_length(self):
+        """
+        Number of leading single-qubit operations: applied to |0...0> they
+        leave a product state, which ProductState evaluates per qubit
+        """
+        for position, (name, _, _) in enumerate(self.operations):
+            if name not in SINGLE_QUBIT_GATES and name != "rotations":
+                return position
+        return len(self.operations)
+
+    def split(self, position):
+        """
+        Return (head, tail) tapes holding the operations before and from
+        position, sharing this tape's placeholders
+        """
+        head, tail = GateTape(self.num_qubits, 0), GateTape(self.num_qubits, 0)
+        for part, operations in ((head, self.operations[:position]), (tail, self.operations[position:])):
+            part.parameters, part.inputs, part.operations = self.parameters, self.inputs, operations
+        return head, tail
+
+    def apply_product(self, simulator, product_state, parameters, inputs=None):
+        """
+        Replay a tape of single-qubit gates (see product_prefix_length) on
+        product_state and load the result into simulator in one sweep; an
+        empty tape just resets simulator
+        """
+        if not self.operations:
+            return simulator.reset()
+        self.apply(product_state.reset(), parameters, inputs)
+        return simulator.load_product_state(product_state.qubit_states)
+
+    def fused(self):
+        """
+        Return an equivalent tape for forward simulation. Each run of
+        rotations and H gates on one qubit becomes a single ``rotations``
+        operation (one 2x2 product, recomputed from the bound angles on
+        every apply), and each run of fixed CX/CZ gates and entangling
+        blocks becomes one precomputed EntanglingBlock. Single-qubit gates
+        commute with fixed gates on other qubits, so runs extend across
+        them.
+
+        Fused rotations hide the individual gates, so differentiate the
+        original tape.
+        """
+        fused = GateTape(self.num_qubits, 0)
+        fused.parameters, fused.inputs = self.parameters, self.inputs
+        operations = fused.operations
+        pending = {}  # qubit -> rotations not yet emitted
+        fixed_gates, fixed_operations, fixed_qubits = [], [], set()
+
+        def flush_rotations(qubit):
+            run = pending.pop(qubit, None)
+            if run is None:
+                return
+            if len(run) == 1:
+                operations.append((run[0][0], run[0][1], (qubit,)))
+            else:
+                operations.append(("rotations", tuple(run), (qubit,)))
+
+        def flush_fixed():
+            if len(fixed_operations) == 1:
+                # A lone gate or block is already as cheap as it gets
+                operations.append(fixed_operations[0])
+            elif fixed_operations:
+                block = EntanglingBlock.from_gates(self.num_qubits, fixed_gates)
+                operations.append(("entangle", None, (block,)))
+            fixed_gates.clear()
+            fixed_operations.clear()
+            fixed_qubits.clear()
+
+        for operation in self.operations:
+            name, angle, arguments = operation
+            if name in SINGLE_QUBIT_GATES:
+                if arguments[0] in fixed_qubits:
+                    flush_fixed()
+                pending.setdefault(arguments[0], []).append((name, angle))
+            elif angle is None:
+                if name == "entangle":
+                    gates, qubits = arguments[0].gates, arguments[0].qubits
+                else:
+                    gates, qubits = [(name,) + tuple(arguments)], set(arguments)
+                for qubit in sorted(qubits):
+                    flush_rotations(qubit)
+                fixed_gates.extend(gates)
+                fixed_operations.append(operation)
+                fixed_qubits.update(qubits)
+            else:
+                # Already fused: keep as is
+                flush_fixed()
+                for qubit in sorted(pending):
+                    flush_rotations(qubit)
+                operations.append(operation)
+
+        flush_fixed()
+        for qubit in sorted(pending):
+            flush_rotations(qubit)
+        return fused
+
+
+def resolve_angle(angle, parameters, inputs=None):
+    if isinstance(angle, TrainableParameter):
+        return parameters[angle.index]
+    if isinstance(angle, InputParameter):
+        return inputs[angle.index]
+    return angle
+
+
+def inverse_fixed_gate(name, arguments):
+    """
+    Return (name, arguments) of the inverse of a parameter-free tape
+    operation. H, CX and CZ are self-inverse; fused blocks carry their
+    inverse.
+    """
+    if name == "entangle":
+        return name, (arguments[0].inverse,)
+    return name, arguments
+
+
+def rotation_derivative(name, theta):
+    """
+    Return d/dtheta of the RX, RY or RZ matrix at theta
+    """
+    cos, sin = np.cos(np.divide(theta, 2)) / 2, np.sin(np.divide(theta, 2)) / 2
+    if name == "rx":
+        return ((-sin, -1j * cos), (-1j * cos, -sin))
+    if name == "ry":
+        return ((-sin, -cos), (cos, -sin))
+    if name == "rz":
+        zero = np.zeros_like(cos)
+        return ((-0.5j * np.exp(-0.5j * np.asarray(theta)), zero), (zero, 0.5j * np.exp(0.5j * np.asarray(theta))))
+    raise ValueError(f"Gate '{name}' has no trainable angle")
+
+
+def parameter_shift_jacobian(evaluate, parameters, shift=np.pi / 2):
+    """
+    Return d evaluate / d parameters stacked along a new last axis.
+
+    ``evaluate(parameters)`` must return probabilities (or any expectation
+    values) of a circuit in which every parameter drives exactly one
+    RX/RY/RZ rotation. For such circuits the two-term rule with shift=pi/2 is exact;
+    any other shift gives the central finite difference of width ``shift``.
+    """
+    parameters = np.asarray(parameters, dtype=float)
+    scale = 0.5 if shift == np.pi / 2 else 1 / (2 * shift)
+    columns = []
+    for i in range(len(parameters)):
+        parameters_plus = parameters.copy()
+        parameters_minus = parameters.copy()
+        parameters_plus[i] += shift
+        parameters_minus[i] -= shift
+        # Copy the first result: NumPy-backed evaluators may return buffer views
+        plus = np.array(evaluate(parameters_plus))
+        columns.append((plus - evaluate(parameters_minus)) * scale)
+    return np.stack(columns, axis=-1)
+
+
+class AdjointDifferentiator:
+    """
+    Adjoint-mode gradients of a loss on the output distribution |psi|^2.
+
+    One forward sweep produces |psi>; the backward sweep un-computes each
+    gate while propagating the co-state lambda = dL/d|psi|^2 * psi, so all
+    parameter gradients cost about three simulations regardless of how
+    many parameters the circuit has. Registers are preallocated per batch
+    size, in the given precision, and reused.
+    """
+
+    def __init__(self, num_qubits, precision="complex128"):
+        self.num_qubits = num_qubits
+        self.precision = precision
+        self._registers = {}
+
+    def _get_registers(self, batch_size):
+        if batch_size not in self._registers:
+            self._registers[batch_size] = tuple(
+                StatevectorSimulator(self.num_qubits, batch_size, self.precision) for _ in range(3)
+            ) + (ProductState(self.num_qubits, batch_size, self.precision),)
+        return self._registers[batch_size]
+
+    def gradient(self, tape, parameters, distribution_gradient, batch_size=None, inputs=None):
+        """
+        Return dL/dparameters for the circuit recorded on ``tape``.
+
+        ``distribution_gradient(distribution)`` receives |psi|^2 with shape
+        (2**n,) or (batch_size, 2**n) and returns dL/d|psi|^2 with the same
+        shape. The result has shape (num_parameters,) or
+        (batch_size, num_parameters), one gradient row per sample. Template
+        tapes take ``inputs`` as returned by ``tape.pad_inputs``.
+        """
+        if any(name == "rotations" for name, _, _ in tape.operations):
+            raise ValueError("Fused tapes cannot be differentiated; pass the original tape")
+        state, adjoint, derivative, product_state = self._get_registers(batch_size)
+        # The product-state prefix (encoding and first rotations) is evaluated per qubit
+        prefix, rest = tape.split(tape.product_prefix_length())
+        prefix.apply_product(state, product_state, parameters, inputs)
+        rest.apply(state, parameters, inputs)
+
+        weights = distribution_gradient(state.probabilities())
+        np.multiply(np.reshape(weights, state.state.shape), state.state, out=adjoint.state)
+
+        qubit_axes = tuple(range(state.state.ndim - self.num_qubits, state.state.ndim))
+        gradient = np.zeros(state.state.shape[:-self.num_qubits] + (len(parameters),))
+        trainable = [i for i, (_, angle, _) in enumerate(tape.operations)
+                     if isinstance(angle, TrainableParameter)]
+        if not trainable:
+            return gradient
+
+        # Gates before the first trainable one (the encoding layer) never need un-computing
+        for name, angle, qubits in reversed(tape.operations[trainable[0]:]):
+            if angle is None:
+                inverse_name, inverse_arguments = inverse_fixed_gate(name, qubits)
+                getattr(state, inverse_name)(*inverse_arguments)
+                getattr(adjoint, inverse_name)(*inverse_arguments)
+                continue
+
+            theta = resolve_angle(angle, parameters, inputs)
+            getattr(state, name)(-theta, *qubits)
+            if isinstance(angle, TrainableParameter):
+                np.copyto(derivative.state, state.state)
+                derivative.apply_single_qubit(rotation_derivative(name, theta), *qubits)
+                overlap = np.sum(adjoint.state.conj() * derivative.state, axis=qubit_axes)
+                gradient[..., angle.index] += 2 * overlap.real
+            getattr(adjoint, name)(-theta, *qubits)
+
+        return gradient
@@ -0,0 +1,90 @@
+import numpy as np
+
+LOSSES = ("cross_entropy", "normalized_cross_entropy", "squared_error")
+
+
+class Loss:
+    """
+    Loss of readout outputs against labels. Outputs are one sample's
+    (num_outputs,) vector or a (batch, num_outputs) matrix; ``__call__``
+    returns one loss per sample and ``gradient`` the matching
+    dL/doutputs, which Readout.distribution_gradient turns into the
+    dL/d|psi|^2 that AdjointDifferentiator expects.
+    """
+
+    def __call__(self, outputs, labels):
+        raise NotImplementedError
+
+    def gradient(self, outputs, labels):
+        raise NotImplementedError
+
+
+class CrossEntropy(Loss):
+    """
+    Categorical cross-entropy -sum(labels * log(outputs)) for one-hot (or
+    soft) labels, with the outputs clipped to [floor, 1]
+    """
+
+    def __init__(self, floor=1e-10):
+        self.floor = floor
+
+    def __call__(self, outputs, labels):
+        return -np.sum(labels * np.log(np.clip(outputs, self.floor, 1.0)), axis=-1)
+
+    def gradient(self, outputs, labels):
+        return -np.asarray(labels) / np.clip(outputs, self.floor, 1.0)
+
+
+class NormalizedCrossEntropy(CrossEntropy):
+    """
+    Cross-entropy after the outputs, floored at floor, are normalized to
+    sum to 1; for readouts such as "qubit" whose outputs are not a
+    distribution
+    """
+
+    def __call__(self, outputs, labels):
+        outputs = np.maximum(outputs, self.floor)
+        return super().__call__(outputs / np.sum(outputs, axis=-1, keepdims=True), labels)
+
+    def gradient(self, outputs, labels):
+        outputs = np.maximum(outputs, self.floor)
+        labels = np.asarray(labels)
+        label_total = np.sum(labels, axis=-1, keepdims=True)
+        return -labels / outputs + label_total / np.sum(outputs, axis=-1, keepdims=True)
+
+
+class SquaredError(Loss):
+    """
+    Squared error summed over the outputs. Scalar labels (one dimension
+    fewer than the outputs) are compared with the last output alone, e.g.
+    P(|1>) of a two-output single-qubit readout.
+    """
+
+    def __call__(self, outputs, labels):
+        outputs, labels = np.asarray(outputs), np.asarray(labels, dtype=float)
+        if labels.ndim < outputs.ndim:
+            return (outputs[..., -1] - labels) ** 2
+        return np.sum((outputs - labels) ** 2, axis=-1)
+
+    def gradient(self, outputs, labels):
+        outputs, labels = np.asarray(outputs), np.asarray(labels, dtype=float)
+        if labels.ndim < outputs.ndim:
+            gradient = np.zeros(outputs.shape)
+            gradient[..., -1] = 2 * (outputs[..., -1] - labels)
+            return gradient
+        return 2 * (outputs - labels)
+
+
+def get_loss(loss):
+    """
+    Return a Loss from an instance or one of the names in LOSSES
+    """
+    if isinstance(loss, Loss):
+        return loss
+    if loss == "cross_entropy":
+        return CrossEntropy()
+    if loss == "normalized_cross_entropy":
+        return NormalizedCrossEntropy()
+    if loss == "squared_error":
+        return SquaredError()
+    raise ValueError(f"Unknown loss '{loss}', expected one of {LOSSES} or a Loss instance")
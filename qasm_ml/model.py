@@ -0,0 +1,218 @@
+import json
+import os
+
+import numpy as np
+
+from .ansatz import Ansatz
+from .batching import iterate_row_batches
+from .network import QASMNeuralNetwork
+from .noise import NOISE_ENGINES, NoiseModel
+from .readout import BasisReadout, LinearReadout, MappedReadout, ParityReadout, QubitReadout
+from .scaling import FeatureScaler
+
+MODEL_VERSION = 1
+
+
+def readout_spec(readout):
+    """
+    Return (spec, arrays) describing a Readout: built-in strategies by name,
+    any other MappedReadout by its mapping, and every other readout by its
+    dense matrix
+    """
+    if type(readout) is QubitReadout:
+        return {"type": "qubit", "qubits": readout.qubits.tolist()}, {}
+    if type(readout) in (BasisReadout, ParityReadout):
+        return {"type": "basis" if type(readout) is BasisReadout else "parity"}, {}
+    if isinstance(readout, MappedReadout):
+        return {"type": "mapped"}, {"readout.mapping": readout.mapping}
+    return {"type": "linear"}, {"readout.matrix": readout.matrix}
+
+
+def build_readout(spec, arrays, num_qubits, num_outputs):
+    kind = spec["type"]
+    if kind == "qubit":
+        return QubitReadout(num_qubits, num_outputs, spec["qubits"])
+    if kind == "basis":
+        return BasisReadout(num_qubits, num_outputs)
+    if kind == "parity":
+        return ParityReadout(num_qubits, num_outputs)
+    if kind == "mapped":
+        return MappedReadout(num_qubits, arrays["readout.mapping"], num_outputs)
+    if kind == "linear":
+        return LinearReadout(arrays["readout.matrix"])
+    raise ValueError(f"Unknown readout type '{kind}' in model file")
+
+
+class TrainedModel:
+    """
+    A trained QASMNeuralNetwork packaged for inference: the circuit, its
+    trained parameters, the FeatureScaler that maps raw inputs to angles
+    (optional) and class names (optional).
+
+    ``save`` writes one .npz file holding the ansatz, readout and noise
+    specification as JSON plus the parameter and scaler arrays; ``load``
+    rebuilds the network without pickle, QASM parsing or Qiskit. Loss and
+    gradient settings are training details and are not stored.
+
+    ``predict`` scales raw inputs and scores them in batches of batch_size
+    rows, each batch one simulator call on registers that are allocated
+    on the first call and reused afterwards.
+    """
+
+    def __init__(self, network, parameters, scaler=None, class_names=None):
+        parameters = np.array(parameters, dtype=float)
+        if parameters.shape != (network.num_parameters,):
+            raise ValueError(f"Expected {network.num_parameters} parameters, got shape {parameters.shape}")
+        if scaler is not None and not scaler.fitted:
+            raise ValueError("Scaler must be fitted before it is packaged with a model")
+        if class_names is not None and len(class_names) != network.num_classes:
+            raise ValueError(f"Expected {network.num_classes} class names, got {len(class_names)}")
+        self.network = network
+        self.parameters = parameters
+        self.scaler = scaler
+        self.class_names = None if class_names is None else [str(name) for name in class_names]
+
+    @property
+    def num_features(self):
+        """
+        Input width fixed by a per-feature scaler, or None when any width
+        up to num_qubits is accepted (shorter inputs are padded)
+        """
+        if self.scaler is None or np.ndim(self.scaler.data_min) == 0:
+            return None
+        return np.size(self.scaler.data_min)
+
+    def validate(self, data):
+        """
+        Return data as a float array, raising ValueError unless it is one
+        sample or a (samples, features) batch of an accepted width
+        """
+        data = np.asarray(data, dtype=float)
+        num_features = self.num_features
+        if data.ndim not in (1, 2) or (data.shape[-1] != num_features if num_features is not None
+                                       else data.shape[-1] > self.network.num_qubits):
+            width = num_features if num_features is not None else f"at most {self.network.num_qubits}"
+            raise ValueError(f"Inputs must be one sample or a batch of samples with {width} features")
+        return data
+
+    def transform(self, data):
+        data = self.validate(data)
+        return data if self.scaler is None else self.scaler.transform(data)
+
+    def predict(self, data, batch_size=1024):
+        """
+        Class probabilities for one raw sample, shape (num_classes,), or a
+        (samples, features) batch, shape (samples, num_classes)
+        """
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            return self.network.predict(self.transform(data), self.parameters)
+        if len(data) <= batch_size:
+            return self.network.predict_batch(self.transform(data), self.parameters)
+        return np.concatenate([self.network.predict_batch(self.transform(batch), self.parameters)
+                               for batch in iterate_row_batches(data, batch_size)])
+
+    def predict_classes(self, data, batch_size=1024):
+        """
+        Most likely class index for each sample, or class name when the model has class names
+        """
+        classes = np.argmax(self.predict(data, batch_size), axis=-1)
+        if self.class_names is None:
+            return classes
+        return np.asarray(self.class_names)[classes]
+
+    def predict_stream(self, source, batch_size=1024, delimiter=",", skip_header=0):
+        """
+        Yield a probability batch for every batch of at most batch_size raw
+        rows read from source (an array, an iterable of rows, or a .npy or
+        delimited text file), so memory stays bounded by one batch;
+        delimiter and skip_header apply to text files
+        """
+        for batch in iterate_row_batches(source, batch_size, delimiter, skip_header):
+            yield self.network.predict_batch(self.transform(batch), self.parameters)
+
+    def spec(self):
+        """
+        Return (metadata, arrays) as stored by ``save``
+        """
+        network, ansatz = self.network, self.network.ansatz
+        entangler = ansatz.entangler if isinstance(ansatz.entangler, str) else [list(pair) for pair in ansatz.entangler]
+        readout, arrays = readout_spec(network.readout)
+        noise = network.noise
+        metadata = {
+            "version": MODEL_VERSION,
+            "num_qubits": network.num_qubits,
+            "num_classes": network.num_classes,
+            "ansatz": {
+                "num_layers": ansatz.num_layers,
+                "rotations": list(ansatz.rotations),
+                "entangler": entangler,
+                "entangling_gate": ansatz.entangling_gate,
+                "encoding": ansatz.encoding,
+                "trainable_qubits": list(ansatz.trainable_qubits),
+            },
+            "readout": readout,
+            "backend": network.backend if isinstance(network.backend, str) else "numpy",
+            "precision": network.precision,
+            "noise": None if noise is None else {
+                "depolarizing": noise.depolarizing,
+                "two_qubit_depolarizing": noise.two_qubit_depolarizing,
+                "amplitude_damping": noise.amplitude_damping,
+                "readout_error": list(noise.readout_error),
+            },
+            "class_names": self.class_names,
+            "scaler": None,
+        }
+        arrays["parameters"] = self.parameters
+        if self.scaler is not None:
+            metadata["scaler"] = {"feature_range": list(self.scaler.feature_range),
+                                  "per_feature": self.scaler.per_feature, "clip": self.scaler.clip,
+                                  "num_samples": self.scaler.num_samples}
+            arrays["scaler.data_min"] = self.scaler.data_min
+            arrays["scaler.data_max"] = self.scaler.data_max
+        return metadata, arrays
+
+    def save(self, path):
+        metadata, arrays = self.spec()
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(f, metadata=np.array(json.dumps(metadata)), **arrays)
+        os.replace(temporary_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path, backend=None, precision=None):
+        """
+        Rebuild a saved model; backend and precision override the stored
+        simulation backend name and precision
+        """
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(data["metadata"].item())
+            if metadata["version"] != MODEL_VERSION:
+                raise ValueError(f"Unsupported model version {metadata['version']} in {path}")
+            arrays = {name: data[name] for name in data.files if name != "metadata"}
+
+        num_qubits, num_classes = metadata["num_qubits"], metadata["num_classes"]
+        spec = dict(metadata["ansatz"])
+        if not isinstance(spec["entangler"], str):
+            spec["entangler"] = [tuple(pair) for pair in spec["entangler"]]
+        ansatz = Ansatz(num_qubits, **spec)
+        noise = None if metadata["noise"] is None else NoiseModel(**metadata["noise"])
+        backend = metadata["backend"] if backend is None else backend
+        # Files written before the precision option simulated in complex128
+        precision = metadata.get("precision", "complex128") if precision is None else precision
+        network = QASMNeuralNetwork(
+            num_qubits, num_classes, ansatz=ansatz,
+            readout=build_readout(metadata["readout"], arrays, num_qubits, num_classes),
+            backend=backend, noise=noise, precision=precision,
+            gradient_method="parameter_shift" if noise is not None or backend in NOISE_ENGINES + ("mps",) else "adjoint"
+        )
+
+        scaler = None
+        if metadata["scaler"] is not None:
+            settings = metadata["scaler"]
+            scaler = FeatureScaler(settings["feature_range"], settings["per_feature"], settings["clip"])
+            scaler.data_min, scaler.data_max = arrays["scaler.data_min"], arrays["scaler.data_max"]
+            scaler.num_samples = settings["num_samples"]
+            scaler._update_transform()
+        return cls(network, arrays["parameters"], scaler, metadata["class_names"])
@@ -0,0 +1,376 @@
+import numpy as np
+
+from .backends import Backend
+from .readout import QubitReadout
+from .statevector import ProductState, gate_matrix, multiply_matrices
+from .telemetry import phase
+
+# Largest register the dense statevector() / probabilities() views will build
+_MAX_DENSE_QUBITS = 30
+
+
+def _cx(theta, control_axis):
+    # theta has shape (batch, left, 2, 2, right); flip the target where the control is |1>
+    if control_axis == 2:
+        theta[:, :, 1] = theta[:, :, 1, ::-1].copy()
+    else:
+        theta[:, :, :, 1] = theta[:, :, ::-1, 1].copy()
+    return theta
+
+
+def _cz(theta, control_axis):
+    theta[:, :, 1, 1] *= -1
+    return theta
+
+
+def _swap(theta, control_axis=None):
+    return theta.swapaxes(2, 3)
+
+
+_TWO_QUBIT_GATES = {"cx": _cx, "cz": _cz, "swap": _swap}
+
+
+class MPSSimulator:
+    """
+    Matrix-product-state simulator with the StatevectorSimulator gate API.
+
+    Qubit q is site q of a chain of tensors of shape (batch, left, 2,
+    right), so memory grows with num_qubits * bond_dimension**2 instead
+    of 2**num_qubits and is exact as long as no bond needs more than
+    max_bond_dimension singular values. The chain is kept in mixed
+    canonical form around ``center``: single-qubit gates act on their site
+    in place, and a two-qubit gate moves the center onto its pair,
+    contracts the two sites, applies the gate and splits them again by an
+    SVD. That split drops the smallest singular values whose squared sum
+    stays below ``cutoff`` and then any beyond max_bond_dimension; the
+    dropped weight is added to ``truncation_error`` (per sample, since the
+    last reset), which bounds the infidelity 1 - |<exact|mps>|^2 to first
+    order. The kept part is renormalized.
+
+    Gates between distant qubits (the closing pair of a ring) are applied
+    after SWAPs that bring the qubits next to each other, and then undone.
+    With ``batch_size`` set every sample has its own chain; bonds are as
+    wide as the widest sample needs.
+    """
+
+    def __init__(self, num_qubits, batch_size=None, max_bond_dimension=64, cutoff=1e-12):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Batch size must be positive")
+        if max_bond_dimension < 1:
+            raise ValueError("Maximum bond dimension must be positive")
+
+        self.num_qubits = num_qubits
+        self.batch_size = batch_size
+        self.max_bond_dimension = max_bond_dimension
+        self.cutoff = cutoff
+        self._batch_shape = () if batch_size is None else (batch_size,)
+        self._rows = 1 if batch_size is None else batch_size
+        self.reset()
+
+    def reset(self):
+        """
+        Reset every chain to |0...0> and return the simulator for chaining
+        """
+        site = np.zeros((self._rows, 1, 2, 1), dtype=complex)
+        site[:, 0, 0, 0] = 1
+        self.tensors = [site.copy() for _ in range(self.num_qubits)]
+        self.center = 0
+        self.truncation_error = np.zeros(self._rows)
+        return self
+
+    def load_product_state(self, qubit_states):
+        """
+        Set every chain to the tensor product of per-qubit states, shape
+        batch + (num_qubits, 2) as held by ProductState: bond dimension 1
+        """
+        rows = np.reshape(qubit_states, (self._rows, self.num_qubits, 2))
+        self.tensors = [np.array(rows[:, qubit, None, :, None], dtype=complex) for qubit in range(self.num_qubits)]
+        self.center = 0
+        self.truncation_error = np.zeros(self._rows)
+        return self
+
+    @property
+    def bond_dimensions(self):
+        """
+        Current width of the bond between qubits q and q + 1, for each q
+        """
+        return [tensor.shape[-1] for tensor in self.tensors[:-1]]
+
+    def _validate_qubit(self, qubit):
+        if not 0 <= qubit < self.num_qubits:
+            raise ValueError(f"Qubit index {qubit} out of range for {self.num_qubits} qubits")
+
+    def apply_single_qubit(self, matrix, qubit):
+        """
+        Apply the 2x2 ``matrix`` to ``qubit``. Entries may be scalars or, in
+        batch mode, arrays with one value per sample. A unitary on one site
+        keeps the canonical form, so no other tensor changes.
+        """
+        self._validate_qubit(qubit)
+        gate = np.empty((self._rows, 2, 2), dtype=complex)
+        for row in range(2):
+            for column in range(2):
+                gate[:, row, column] = matrix[row][column]
+        tensor = self.tensors[qubit]
+        rows, left, _, right = tensor.shape
+        # (batch, 2, 2) @ (batch, 2, left * right) with the physical index moved first
+        moved = tensor.transpose(0, 2, 1, 3).reshape(rows, 2, left * right)
+        self.tensors[qubit] = (gate @ moved).reshape(rows, 2, left, right).transpose(0, 2, 1, 3)
+        return self
+
+    def rx(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("rx", theta), qubit)
+
+    def ry(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("ry", theta), qubit)
+
+    def rz(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("rz", theta), qubit)
+
+    def h(self, qubit):
+        return self.apply_single_qubit(gate_matrix("h"), qubit)
+
+    def rotations(self, run, qubit):
+        """
+        Apply a run of (name, theta) single-qubit gates on one qubit as a
+        single 2x2 product; theta is ignored for H
+        """
+        matrix = None
+        for name, theta in run:
+            gate = gate_matrix(name, theta)
+            matrix = gate if matrix is None else multiply_matrices(gate, matrix)
+        return self.apply_single_qubit(matrix, qubit)
+
+    def cx(self, control, target):
+        return self._two_qubit("cx", control, target)
+
+    def cz(self, control, target):
+        return self._two_qubit("cz", control, target)
+
+    def swap(self, first, second):
+        return self._two_qubit("swap", first, second)
+
+    def entangle(self, block):
+        """
+        Apply a fused EntanglingBlock gate by gate; its dense permutation
+        is never built
+        """
+        if block.num_qubits != self.num_qubits:
+            raise ValueError(f"Entangling block acts on {block.num_qubits} qubits, simulator has {self.num_qubits}")
+        for name, control, target in block.gates:
+            self._two_qubit(name, control, target)
+        return self
+
+    def _two_qubit(self, name, control, target):
+        self._validate_qubit(control)
+        self._validate_qubit(target)
+        if control == target:
+            raise ValueError("Control and target qubits must differ")
+        low, high = min(control, target), max(control, target)
+        # Bring the lower qubit next to the higher one, apply, and move it back,
+        # leaving the center on the side the next step works on
+        for site in range(low, high - 1):
+            self._apply_two_site(site, _swap)
+        self._apply_two_site(high - 1, _TWO_QUBIT_GATES[name], 2 if control < target else 3, high - 1 > low)
+        for site in reversed(range(low, high - 1)):
+            self._apply_two_site(site, _swap, center_left=True)
+        return self
+
+    def _move_center(self, site):
+        # QR steps keep the sites passed over left- (moving right) or right-orthonormal (moving left)
+        while self.center < site:
+            tensor, following = self.tensors[self.center], self.tensors[self.center + 1]
+            rows, left, _, right = tensor.shape
+            q, r = np.linalg.qr(tensor.reshape(rows, left * 2, right))
+            self.tensors[self.center] = q.reshape(rows, left, 2, -1)
+            self.tensors[self.center + 1] = (r @ following.reshape(rows, right, -1)).reshape(rows, -1, 2,
+                                                                                            following.shape[-1])
+            self.center += 1
+        while self.center > site:
+            tensor, preceding = self.tensors[self.center], self.tensors[self.center - 1]
+            rows, left, _, right = tensor.shape
+            q, r = np.linalg.qr(tensor.reshape(rows, left, 2 * right).transpose(0, 2, 1))
+            self.tensors[self.center] = q.transpose(0, 2, 1).reshape(rows, -1, 2, right)
+            self.tensors[self.center - 1] = (preceding.reshape(rows, -1, left) @ r.transpose(0, 2, 1)).reshape(
+                rows, preceding.shape[1], 2, -1)
+            self.center -= 1
+
+    def _apply_two_site(self, site, gate, control_axis=None, center_left=False):
+        # The pair holds the center when it sits on either of its sites
+        self._move_center(min(max(self.center, site), site + 1))
+        first, second = self.tensors[site], self.tensors[site + 1]
+        rows, left, _, bond = first.shape
+        right = second.shape[-1]
+        theta = (first.reshape(rows, left * 2, bond) @ second.reshape(rows, bond, 2 * right)).reshape(
+            rows, left, 2, 2, right)
+        theta = gate(theta, control_axis)
+        u, s, vh = np.linalg.svd(theta.reshape(rows, left * 2, 2 * right), full_matrices=False)
+        kept, discarded = self._truncation(s)
+        s = s[:, :kept]
+        s /= np.linalg.norm(s, axis=1, keepdims=True)
+        if center_left:
+            self.tensors[site] = (u[:, :, :kept] * s[:, None, :]).reshape(rows, left, 2, kept)
+            self.tensors[site + 1] = vh[:, :kept].reshape(rows, kept, 2, right)
+            self.center = site
+        else:
+            self.tensors[site] = u[:, :, :kept].reshape(rows, left, 2, kept)
+            self.tensors[site + 1] = (s[:, :, None] * vh[:, :kept]).reshape(rows, kept, 2, right)
+            self.center = site + 1
+        self.truncation_error += discarded
+
+    def _truncation(self, singular_values):
+        # (bond dimension to keep, discarded weight per sample)
+        weights = singular_values ** 2
+        weights /= weights.sum(axis=1, keepdims=True)
+        # tails[:, k] is the weight dropped by keeping k singular values
+        tails = np.zeros((len(weights), weights.shape[1] + 1))
+        tails[:, :-1] = np.cumsum(weights[:, ::-1], axis=1)[:, ::-1]
+        needed = int(np.max(np.sum(tails[:, :-1] > self.cutoff, axis=1)))
+        kept = max(1, min(needed, self.max_bond_dimension))
+        return kept, tails[:, kept]
+
+    def qubit_marginals(self, num_marginals=None):
+        """
+        Return P(|1>) of qubits 0..num_marginals-1 (default: all), shape
+        (..., num_marginals), in one sweep out from the canonical center:
+        the orthonormal sites on the far side of each qubit contract to the
+        identity, so each marginal costs one transfer step
+        """
+        num_marginals = self.num_qubits if num_marginals is None else num_marginals
+        marginals = np.zeros((self._rows, num_marginals))
+        center = self.center
+
+        def probability_one(tensor, left_environment=None, right_environment=None):
+            one = tensor[:, :, 1, :]
+            if left_environment is not None:
+                contracted = left_environment.transpose(0, 2, 1) @ one
+            else:
+                contracted = one @ right_environment
+            return np.sum(contracted * one.conj(), axis=(1, 2)).real
+
+        # Environments over the sites passed so far, (batch, ket bond, bra bond)
+        environment = None
+        for qubit in range(center, num_marginals):
+            tensor = self.tensors[qubit]
+            rows, left, _, right = tensor.shape
+            if environment is None:
+                environment = np.broadcast_to(np.eye(left, dtype=complex), (rows, left, left))
+            marginals[:, qubit] = probability_one(tensor, left_environment=environment)
+            moved = (environment.transpose(0, 2, 1) @ tensor.reshape(rows, left, 2 * right)).reshape(
+                rows, left * 2, right)
+            environment = moved.transpose(0, 2, 1) @ tensor.reshape(rows, left * 2, right).conj()
+
+        environment = None
+        for qubit in range(center, -1, -1):
+            tensor = self.tensors[qubit]
+            rows, left, _, right = tensor.shape
+            if environment is None:
+                environment = np.broadcast_to(np.eye(right, dtype=complex), (rows, right, right))
+            if qubit < min(center, num_marginals):
+                marginals[:, qubit] = probability_one(tensor, right_environment=environment)
+            if qubit == 0:
+                break
+            moved = (tensor.reshape(rows, left * 2, right) @ environment).reshape(rows, left, 2 * right)
+            environment = moved @ tensor.reshape(rows, left, 2 * right).conj().transpose(0, 2, 1)
+        return marginals.reshape(self._batch_shape + (num_marginals,))
+
+    def statevector(self):
+        """
+        Contract the chain into dense amplitudes in Qiskit's ordering, shape
+        (2**num_qubits,) or (batch_size, 2**num_qubits); only for registers
+        small enough to hold them
+        """
+        if self.num_qubits > _MAX_DENSE_QUBITS:
+            raise ValueError(f"A dense statevector of {self.num_qubits} qubits does not fit in memory; "
+                             "read qubit marginals instead")
+        # Contract from the last qubit down so qubit 0 ends up least significant
+        amplitudes = np.ones((self._rows, 1, 1), dtype=complex)
+        for tensor in reversed(self.tensors):
+            rows, left, _, right = tensor.shape
+            contracted = tensor.reshape(rows, left * 2, right) @ amplitudes
+            amplitudes = contracted.reshape(rows, left, 2, -1).transpose(0, 1, 3, 2).reshape(rows, left, -1)
+        return amplitudes.reshape(self._batch_shape + (2 ** self.num_qubits,))
+
+    def probabilities(self):
+        return np.abs(self.statevector()) ** 2
+
+
+class MPSBackend(Backend):
+    """
+    Simulates the tape on MPSSimulator chains, one per batch size, so
+    shallow circuits of 50-100 qubits fit in memory. The encoding and
+    first rotations load as a bond-dimension-1 product state.
+
+    QubitReadout outputs come from the chain's qubit marginals; other
+    readouts need the dense distribution and are limited to small
+    registers. ``jacobian`` runs the shift rule as one batched simulation,
+    every shifted parameter vector being a sample of its own, in groups
+    of at most shift_batch_size samples. Adjoint gradients need the
+    statevector, so train with gradient_method "parameter_shift".
+
+    After every call ``truncation_error`` holds the discarded weight per
+    sample and ``bond_dimensions`` the bond widths reached.
+    """
+
+    name = "mps"
+
+    def __init__(self, tape, max_bond_dimension=64, cutoff=1e-12, shift_batch_size=256):
+        super().__init__(tape)
+        self.max_bond_dimension = max_bond_dimension
+        self.cutoff = cutoff
+        self.shift_batch_size = shift_batch_size
+        self.prefix_tape, rest = tape.split(tape.product_prefix_length())
+        self.forward_tape = rest.fused()
+        self.simulators = {}
+        self.truncation_error = None
+        self.bond_dimensions = None
+
+    def run(self, parameters, inputs, batch_size=None):
+        """
+        Simulate the tape and return the MPSSimulator holding the result
+        """
+        if batch_size not in self.simulators:
+            self.simulators[batch_size] = (
+                MPSSimulator(self.tape.num_qubits, batch_size, self.max_bond_dimension, self.cutoff),
+                ProductState(self.tape.num_qubits, batch_size),
+            )
+        simulator, product_state = self.simulators[batch_size]
+        self.prefix_tape.apply_product(simulator, product_state, parameters, inputs)
+        self.forward_tape.apply(simulator, parameters, inputs)
+        self.truncation_error = simulator.truncation_error.reshape(simulator._batch_shape)
+        self.bond_dimensions = simulator.bond_dimensions
+        return simulator
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        return self.run(parameters, inputs, batch_size).statevector()
+
+    def outputs(self, readout, parameters, inputs, batch_size=None):
+        simulator = self.run(parameters, inputs, batch_size)
+        with phase(self.timer, "readout"):
+            if isinstance(readout, QubitReadout):
+                return readout.from_marginals(simulator.qubit_marginals(readout.num_marginals))
+            return readout(simulator.probabilities())
+
+    def jacobian(self, readout, parameters, inputs, batch_size=None, shift=np.pi / 2):
+        parameters = np.asarray(parameters, dtype=float)
+        inputs = np.asarray(inputs, dtype=float)
+        num_parameters, rows = len(parameters), 1 if batch_size is None else batch_size
+        scale = 0.5 if shift == np.pi / 2 else 1 / (2 * shift)
+        columns = []
+        group = max(1, self.shift_batch_size // (2 * rows))
+        for start in range(0, num_parameters, group):
+            indices = np.arange(start, min(start + group, num_parameters))
+            # Samples ordered (shifted parameter, sign, row); column j of shifted holds sample j's parameters
+            signs = np.array([shift, -shift])
+            shifted = np.repeat(parameters[:, None], len(indices) * 2 * rows, axis=1)
+            shifted.reshape(num_parameters, len(indices), 2, rows)[indices, np.arange(len(indices))] += \
+                signs[:, None]
+            tiled = np.tile(inputs.reshape(len(inputs), rows), len(indices) * 2)
+            outputs = self.outputs(readout, shifted, tiled, batch_size=shifted.shape[1])
+            outputs = outputs.reshape(len(indices), 2, rows, -1)
+            columns.append((outputs[:, 0] - outputs[:, 1]) * scale)
+        # (parameters, rows, outputs) -> (rows, outputs, parameters)
+        jacobian = np.moveaxis(np.concatenate(columns), 0, -1)
+        return jacobian[0] if batch_size is None else jacobian
@@ -0,0 +1,432 @@
+import time
+
+import numpy as np
+
+from .ansatz import Ansatz
+from .backends import get_backend, qiskit_template
+from .batching import iterate_minibatches
+from .checkpoint import start_training
+from .gradients import GRADIENT_METHODS, AdjointDifferentiator, GateTape
+from .losses import get_loss
+from .optimizers import Objective, get_optimizer
+from .parallel import WorkerPool
+from .readout import get_readout
+from .telemetry import Telemetry, phase
+
+
+class QASMNeuralNetwork:
+    """
+    Variational quantum classifier: an Ansatz (RX angle encoding, then
+    num_layers layers of trainable rotations and an entangling block), a
+    Readout mapping the output distribution to num_classes outputs, and a
+    Loss on those outputs.
+
+    readout, loss and backend each take a name (see READOUTS, LOSSES and
+    BACKENDS) or an instance, and a prebuilt ``ansatz`` replaces
+    num_layers, rotations and entangler. The circuit is recorded once on a
+    GateTape; the backend simulates it for forward passes, while
+    gradient_method "adjoint" always differentiates it with the NumPy
+    engine and "parameter_shift" / "finite_difference" difference the
+    backend's outputs.
+
+    The "mps" backend simulates wide, shallow circuits as matrix product
+    states (see MPSBackend) and never forms the statevector, so it also
+    needs "parameter_shift", whose shifted circuits it runs as one batch.
+
+    A NoiseModel as ``noise`` trains on the noisy measurement distribution
+    (see NoisyBackend). The adjoint method assumes a pure state, so noise
+    needs "parameter_shift", which stays exact for gate errors that follow
+    the parametrized gates, or "finite_difference". trajectory_executor
+    ("process" or "thread") spreads Monte-Carlo trajectories over
+    trajectory_workers workers; call ``close`` to shut that pool down.
+
+    precision "complex64" runs the NumPy engine and adjoint gradients in
+    single precision, halving register memory; outputs then agree with
+    "complex128" to about 1e-6 (see benchmarks/precision.py).
+
+    While ``timer`` holds a PhaseTimer (train_network attaches one when
+    given callbacks), input preparation, simulation, readout and loss
+    evaluation are charged to its "construction", "simulation" and
+    "readout" phases.
+    """
+
+    def __init__(self, num_qubits=4, num_classes=3, num_layers=1, rotations=("ry",), entangler="ring",
+                 readout="qubit", loss="normalized_cross_entropy", backend="numpy", gradient_method="adjoint",
+                 ansatz=None, noise=None, precision="complex128", trajectory_executor=None,
+                 trajectory_workers=None):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+        if num_classes < 2:
+            raise ValueError("Number of classes must be at least 2")
+        if gradient_method not in GRADIENT_METHODS:
+            raise ValueError(f"Unknown gradient method '{gradient_method}', expected one of {GRADIENT_METHODS}")
+        if ansatz is None:
+            ansatz = Ansatz(num_qubits, num_layers, rotations, entangler)
+        elif ansatz.num_qubits != num_qubits:
+            raise ValueError(f"Ansatz acts on {ansatz.num_qubits} qubits, expected {num_qubits}")
+        if gradient_method == "adjoint" and (noise is not None or backend in ("density_matrix", "trajectories")):
+            raise ValueError("Adjoint gradients need a noiseless backend; use 'parameter_shift' with noise")
+        if gradient_method == "adjoint" and backend == "mps":
+            raise ValueError("Adjoint gradients need the statevector; use 'parameter_shift' with the 'mps' backend")
+
+        self.num_qubits = num_qubits
+        self.num_classes = num_classes
+        self.ansatz = ansatz
+        self.num_parameters = ansatz.num_parameters
+        self.readout = get_readout(readout, num_qubits, num_classes)
+        self.loss = get_loss(loss)
+        self.backend = backend
+        self.noise = noise
+        self.gradient_method = gradient_method
+        self.precision = precision
+        self.trajectory_executor = trajectory_executor
+        self.trajectory_workers = trajectory_workers
+        self.engine = None
+        self.differentiator = AdjointDifferentiator(num_qubits, precision)
+        self.timer = None
+        self.compile()
+
+    def worker_config(self):
+        """
+        Constructor arguments that rebuild this network inside a pool
+        worker; workers run their trajectories serially rather than nest pools
+        """
+        return (self.num_qubits, self.num_classes, self.ansatz.num_layers, self.ansatz.rotations,
+                self.ansatz.entangler, self.readout, self.loss, self.backend, self.gradient_method, self.ansatz,
+                self.noise, self.precision)
+
+    def close(self):
+        """
+        Shut down worker pools held by the backend
+        """
+        # Backend factories may return engines without close
+        close = getattr(self.engine, "close", None)
+        if close is not None:
+            close()
+
+    def validate_input_data(self, input_data):
+        input_data = np.asarray(input_data, dtype=float)
+        if input_data.ndim != 1:
+            raise ValueError("Input data must be 1-dimensional")
+        if len(input_data) > self.num_qubits:
+            raise ValueError(f"Input data length ({len(input_data)}) exceeds number of qubits ({self.num_qubits})")
+        return input_data
+
+    def validate_batch_data(self, batch_data):
+        batch_data = np.asarray(batch_data, dtype=float)
+        if batch_data.ndim != 2:
+            raise ValueError("Batch data must be 2-dimensional (samples, features)")
+        if batch_data.shape[1] > self.num_qubits:
+            raise ValueError(f"Input data length ({batch_data.shape[1]}) exceeds number of qubits ({self.num_qubits})")
+        return batch_data
+
+    def compile(self):
+        """
+        Record the gate tape once so each step only binds values, and build
+        the backend that simulates it; the Qiskit ``template`` is built on
+        first use. Call again after changing the architecture.
+        """
+        self._template = None
+        self.tape = GateTape(self.num_qubits, self.num_parameters, num_inputs=self.num_qubits)
+        self.apply_gates(self.tape, self.tape.inputs, self.tape.parameters)
+        self.close()
+        self.engine = get_backend(self.backend, self.tape, self.noise, self.precision,
+                                  self.trajectory_executor, self.trajectory_workers)
+        return self
+
+    @property
+    def template(self):
+        """
+        Qiskit circuit over input and weight ParameterVectors, built on
+        first use so NumPy-only runs never import Qiskit
+        """
+        if self._template is None:
+            self._template, self.input_parameters, self.weight_parameters = qiskit_template(self.tape)
+        return self._template
+
+    def create_quantum_circuit(self, input_data, parameters):
+        input_data = self.validate_input_data(input_data)
+        template = self.template
+        values = dict(zip(self.input_parameters, self.tape.pad_inputs(input_data)))
+        values.update(zip(self.weight_parameters, parameters))
+        return template.assign_parameters(values)
+
+    def qasm(self, input_data, parameters):
+        """
+        OpenQASM 2 source of the circuit bound to one input
+        """
+        circuit = self.create_quantum_circuit(input_data, parameters)
+        try:
+            from qiskit import qasm2
+        except ImportError:
+            # Qiskit before 0.46 only has the circuit method
+            return circuit.qasm()
+        return qasm2.dumps(circuit)
+
+    def apply_gates(self, qc, input_data, parameters):
+        # qc is a QuantumCircuit, StatevectorSimulator or GateTape; all share the gate API
+        return self.ansatz.apply_gates(qc, input_data, parameters)
+
+    def get_statevector(self, circuit):
+        from qiskit.quantum_info import Statevector
+        return Statevector.from_instruction(circuit)
+
+    def simulate(self, input_data, parameters):
+        """
+        Return the statevector for input_data from the backend. With the
+        NumPy backend the result is a view of a reused register and is only
+        valid until the next call.
+        """
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_input_data(input_data))
+        with phase(self.timer, "simulation"):
+            return self.engine.statevector(parameters, inputs)
+
+    def simulate_batch(self, batch_data, parameters):
+        """
+        Simulate every row of batch_data and return the (samples,
+        2**num_qubits) statevectors, see simulate
+        """
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_batch_data(batch_data))
+        with phase(self.timer, "simulation"):
+            return self.engine.statevector(parameters, inputs, batch_size=inputs.shape[-1])
+
+    def calculate_probabilities(self, statevector):
+        # NumPy arrays (one or a batch) and Qiskit Statevectors alike
+        with phase(self.timer, "readout"):
+            return self.readout.probabilities(statevector)
+
+    def predict(self, input_data, parameters):
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_input_data(input_data))
+        with phase(self.timer, "simulation"):
+            return self.engine.outputs(self.readout, parameters, inputs)
+
+    def predict_batch(self, batch_data, parameters):
+        """
+        Return the (samples, num_classes) matrix whose rows match predict
+        for each sample
+        """
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_batch_data(batch_data))
+        with phase(self.timer, "simulation"):
+            return self.engine.outputs(self.readout, parameters, inputs, batch_size=inputs.shape[-1])
+
+    def calculate_fidelity(self, statevector, target_state):
+        return np.abs(np.vdot(np.asarray(target_state), np.asarray(statevector))) ** 2
+
+    def calculate_loss(self, input_data, parameters, label):
+        outputs = self.predict(input_data, parameters)
+        with phase(self.timer, "readout"):
+            return self.loss(outputs, label)
+
+    def calculate_batch_loss(self, batch_data, parameters, labels):
+        outputs = self.predict_batch(batch_data, parameters)
+        with phase(self.timer, "readout"):
+            return np.mean(self.loss(outputs, labels))
+
+    def distribution_gradient(self, distribution, labels):
+        return self.readout.distribution_gradient(self.loss.gradient(self.readout(distribution), labels))
+
+    def gradient_shift(self, epsilon):
+        return np.pi / 2 if self.gradient_method == "parameter_shift" else epsilon
+
+    def calculate_gradient(self, input_data, parameters, label, epsilon=0.01):
+        """
+        Loss gradient for one sample using gradient_method: "adjoint" (one
+        forward and one backward sweep), "parameter_shift" (exact, two
+        circuits per parameter) or "finite_difference" (central differences
+        of width epsilon)
+        """
+        if self.gradient_method == "adjoint":
+            inputs = self.tape.pad_inputs(self.validate_input_data(input_data))
+            return self.differentiator.gradient(
+                self.tape, parameters, lambda distribution: self.distribution_gradient(distribution, label),
+                inputs=inputs
+            )
+
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_input_data(input_data))
+        with phase(self.timer, "simulation"):
+            jacobian = self.engine.jacobian(self.readout, parameters, inputs, shift=self.gradient_shift(epsilon))
+        return self.loss.gradient(self.predict(input_data, parameters), label) @ jacobian
+
+    def calculate_batch_gradient(self, batch_data, parameters, labels, epsilon=0.01):
+        """
+        Batch-averaged loss gradient, see calculate_gradient
+        """
+        if self.gradient_method == "adjoint":
+            batch_data = self.validate_batch_data(batch_data)
+            gradients = self.differentiator.gradient(
+                self.tape, parameters, lambda distribution: self.distribution_gradient(distribution, labels),
+                batch_size=len(batch_data), inputs=self.tape.pad_inputs(batch_data)
+            )
+            return np.mean(gradients, axis=0)
+
+        with phase(self.timer, "construction"):
+            inputs = self.tape.pad_inputs(self.validate_batch_data(batch_data))
+        with phase(self.timer, "simulation"):
+            jacobian = self.engine.jacobian(self.readout, parameters, inputs, batch_size=inputs.shape[-1],
+                                            shift=self.gradient_shift(epsilon))
+        loss_gradient = self.loss.gradient(self.predict_batch(batch_data, parameters), labels)
+        return np.mean(np.einsum("nc,ncp->np", loss_gradient, jacobian), axis=0)
+
+    def parameter_gradient(self, input_data, parameters, loss_gradient, index, epsilon=0.01):
+        """
+        dL/dparameters[index] for one sample by the shift rule, given the
+        loss gradient at the unshifted output; the unit of work handed to
+        pool workers
+        """
+        shift = self.gradient_shift(epsilon)
+        parameters_plus = np.array(parameters, dtype=float)
+        parameters_minus = parameters_plus.copy()
+        parameters_plus[index] += shift
+        parameters_minus[index] -= shift
+        scale = 0.5 if shift == np.pi / 2 else 1 / (2 * shift)
+        derivative = (self.predict(input_data, parameters_plus) - self.predict(input_data, parameters_minus)) * scale
+        return np.sum(loss_gradient * derivative)
+
+    def sample_gradient(self, pool, input_data, parameters, label, epsilon=0.01):
+        if pool is None or self.gradient_method == "adjoint":
+            return self.calculate_gradient(input_data, parameters, label, epsilon)
+        # Spread the parameter shifts over the workers; the unshifted output is simulated once here
+        loss_gradient = self.loss.gradient(self.predict(input_data, parameters), label)
+        tasks = [(input_data, parameters, loss_gradient, i, epsilon) for i in range(len(parameters))]
+        return np.array(pool.map("parameter_gradient", tasks))
+
+    def batch_gradient(self, pool, batch_data, parameters, labels, epsilon=0.01):
+        if pool is None:
+            return self.calculate_batch_gradient(batch_data, parameters, labels, epsilon)
+        # Each worker averages over one contiguous slice of the batch
+        chunks = pool.split(len(batch_data))
+        gradients = pool.map(
+            "calculate_batch_gradient",
+            [(batch_data[chunk], parameters, labels[chunk], epsilon) for chunk in chunks]
+        )
+        return np.average(gradients, axis=0, weights=[len(chunk) for chunk in chunks])
+
+    def train_network(self, training_data, labels, epochs=1000, batch_size=None, optimizer=None,
+                      learning_rate=None, epsilon=0.01, executor=None, num_workers=None, chunksize=1,
+                      early_stopping=None, validation_split=None, checkpoint_path=None, checkpoint_every=100,
+                      resume_from=None, log_every=100, callbacks=None):
+        """
+        Train with per-sample updates, or with one averaged update per
+        mini-batch when batch_size is given (batch_size=len(training_data)
+        gives full-batch training), and return the best parameters seen.
+
+        optimizer is a qasm_ml Optimizer or one of "sgd", "momentum", "adam",
+        "spsa", "lbfgs" (default: SGD); learning_rate, when given, overrides
+        the named optimizer's default step size. epsilon is the
+        finite-difference width. An EarlyStopping instance ends training
+        once the epoch loss plateaus.
+
+        executor ("process", "thread" or None for serial) selects the worker
+        pool created once for the whole run. Mini-batches are split across
+        its num_workers workers; per-sample shift-rule gradients spread their
+        parameter shifts over it, handed out chunksize tasks at a time.
+
+        validation_split holds out that fraction of the rows; best
+        parameters and early stopping then follow the validation loss.
+        With checkpoint_path the run is saved every checkpoint_every epochs
+        and at the end, and resume_from continues from such a checkpoint.
+        Progress is printed every log_every epochs.
+
+        callbacks is a list of qasm_ml Callback instances (e.g. History,
+        JSONLinesLogger, ProfileEpoch) receiving per-step and per-epoch
+        telemetry: losses, gradient norms, time per phase and peak memory.
+        """
+        optimizer = get_optimizer(optimizer, learning_rate)
+        state = start_training(np.random.rand(self.num_parameters) * 2 * np.pi, len(training_data),
+                               validation_split, resume_from, optimizer, early_stopping)
+        parameters = state.parameters
+        training_data, labels, validation_data, validation_labels = state.split(training_data, labels)
+        start_time = time.time()
+        if batch_size is not None:
+            training_data = np.asarray(training_data, dtype=float)
+            labels = np.asarray(labels)
+
+        pool = None
+        if executor is not None and (batch_size is not None or self.gradient_method != "adjoint"):
+            # Workers rebuild the network once from worker_config; tasks only carry arrays
+            pool = WorkerPool(type(self), self.worker_config(), kind=executor,
+                              max_workers=num_workers, chunksize=chunksize)
+
+        telemetry = Telemetry(callbacks) if callbacks else None
+        if telemetry is not None:
+            # Network and backend charge their work to the telemetry phases while training runs
+            self.timer = self.engine.timer = telemetry.timer
+            telemetry.train_begin(self, state)
+
+        def step(parameters, objective, epoch, num_samples, loss):
+            if telemetry is None:
+                return optimizer.step(parameters, objective)
+            objective.gradient = telemetry.track_gradient(objective.gradient)
+            parameters = optimizer.step(parameters, objective)
+            telemetry.step_end(epoch, num_samples, loss)
+            return parameters
+
+        try:
+            for epoch in range(state.epoch, epochs):
+                optimizer.set_epoch(epoch)
+                if telemetry is not None:
+                    telemetry.epoch_begin(epoch)
+                total_loss = 0
+                if batch_size is not None:
+                    for batch in iterate_minibatches(len(training_data), batch_size):
+                        batch_data, batch_labels = training_data[batch], labels[batch]
+
+                        # Forward pass over the whole batch
+                        batch_loss = self.calculate_batch_loss(batch_data, parameters, batch_labels)
+                        total_loss += batch_loss * len(batch)
+
+                        # Update parameters from the batch-averaged objective
+                        objective = Objective(
+                            lambda params: self.calculate_batch_loss(batch_data, params, batch_labels),
+                            lambda params: self.batch_gradient(pool, batch_data, params, batch_labels, epsilon),
+                        )
+                        parameters = step(parameters, objective, epoch, len(batch), batch_loss)
+                else:
+                    for data, label in zip(training_data, labels):
+                        # Forward pass and loss
+                        sample_loss = self.calculate_loss(data, parameters, label)
+                        total_loss += sample_loss
+
+                        # Update parameters from this sample's objective
+                        objective = Objective(
+                            lambda params: self.calculate_loss(data, params, label),
+                            lambda params: self.sample_gradient(pool, data, params, label, epsilon),
+                        )
+                        parameters = step(parameters, objective, epoch, 1, sample_loss)
+
+                avg_loss = total_loss / len(training_data)
+                validation_loss = None
+                if validation_data is not None:
+                    validation_loss = self.calculate_batch_loss(validation_data, parameters, validation_labels)
+                monitored_loss = state.record(parameters, avg_loss, validation_loss)
+                if telemetry is not None:
+                    telemetry.epoch_end(epoch, avg_loss, validation_loss, state.best_loss)
+
+                if log_every and epoch % log_every == 0:
+                    elapsed_time = time.time() - start_time
+                    validation = "" if validation_loss is None else f", Validation Loss: {validation_loss:.6f}"
+                    print(f"Epoch {epoch}/{epochs}, Loss: {avg_loss:.6f}{validation}, "
+                          f"Best Loss: {state.best_loss:.6f}, Elapsed Time: {elapsed_time:.2f}s")
+
+                stop = early_stopping is not None and early_stopping.update(monitored_loss)
+                if checkpoint_path is not None and state.epoch % checkpoint_every == 0:
+                    state.save(checkpoint_path, optimizer, early_stopping)
+
+                if stop:
+                    print(f"Early stopping at epoch {epoch}: loss plateaued at {monitored_loss:.6f}")
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_pending=True)
+            if telemetry is not None:
+                telemetry.train_end(state)
+                self.timer = self.engine.timer = None
+
+        if checkpoint_path is not None:
+            state.save(checkpoint_path, optimizer, early_stopping)
+        return state.best_parameters
@@ -0,0 +1,384 @@
+import math
+
+import numpy as np
+
+from .ansatz import EntanglingBlock
+from .backends import Backend
+from .gradients import resolve_angle
+from .parallel import WorkerPool
+from .statevector import StatevectorSimulator, gate_matrix, multiply_matrices
+
+NOISE_ENGINES = ("density_matrix", "trajectories")
+
+# Single-qubit Paulis I, X, Y, Z as the entry arrays of ((a, b), (c, d)), indexed by Pauli
+_PAULI_ENTRIES = tuple(np.array(entries, dtype=complex) for entries in
+                       ([1, 0, 0, 1], [0, 1, -1j, 0], [0, 1, 1j, 0], [1, 0, 0, -1]))
+
+
+class NoiseModel:
+    """
+    Gate and readout errors for noisy simulation.
+
+    After every gate, each qubit it acts on goes through a depolarizing
+    channel rho -> (1 - p) rho + p I/2, with p = depolarizing for
+    single-qubit gates and two_qubit_depolarizing (default: depolarizing)
+    for each qubit of a CX or CZ, followed by amplitude damping with decay
+    probability amplitude_damping. Measuring a qubit then reports the
+    wrong bit with readout_error: one probability for both directions, or
+    (P(read 1 | 0), P(read 0 | 1)).
+
+    Both gate errors leave populations and coherences of the qubit
+    separate, so each acts as a 2x2 ``populations`` transfer matrix plus a
+    ``coherence`` factor scaling the off-diagonal elements.
+    """
+
+    def __init__(self, depolarizing=0.0, amplitude_damping=0.0, readout_error=0.0, two_qubit_depolarizing=None):
+        two_qubit_depolarizing = depolarizing if two_qubit_depolarizing is None else two_qubit_depolarizing
+        readout_error = (readout_error, readout_error) if np.ndim(readout_error) == 0 else tuple(readout_error)
+        for name, value in (("depolarizing", depolarizing), ("two_qubit_depolarizing", two_qubit_depolarizing),
+                            ("amplitude_damping", amplitude_damping), ("readout_error", readout_error[0]),
+                            ("readout_error", readout_error[-1])):
+            if not 0 <= value <= 1:
+                raise ValueError(f"Noise probability {name}={value} must lie in [0, 1]")
+        if len(readout_error) != 2:
+            raise ValueError("readout_error must be one probability or a (P(1|0), P(0|1)) pair")
+
+        self.depolarizing = float(depolarizing)
+        self.two_qubit_depolarizing = float(two_qubit_depolarizing)
+        self.amplitude_damping = float(amplitude_damping)
+        self.readout_error = tuple(map(float, readout_error))
+
+    @property
+    def noiseless(self):
+        return not (self.depolarizing or self.two_qubit_depolarizing or self.amplitude_damping
+                    or any(self.readout_error))
+
+    def depolarizing_probability(self, num_gate_qubits):
+        return self.depolarizing if num_gate_qubits == 1 else self.two_qubit_depolarizing
+
+    def gate_channel(self, num_gate_qubits):
+        """
+        Return (populations, coherence) of the error channel applied to each
+        qubit of a gate on num_gate_qubits qubits, or None when it is the
+        identity
+        """
+        p, gamma = self.depolarizing_probability(num_gate_qubits), self.amplitude_damping
+        if not (p or gamma):
+            return None
+        depolarize = np.array([[1 - p / 2, p / 2], [p / 2, 1 - p / 2]])
+        damp = np.array([[1, gamma], [0, 1 - gamma]])
+        return damp @ depolarize, (1 - p) * math.sqrt(1 - gamma)
+
+    def apply_readout_error(self, distribution, num_qubits):
+        """
+        Map ideal outcome probabilities, shape (..., 2**num_qubits), to the
+        probabilities of the reported outcomes
+        """
+        flip_zero, flip_one = self.readout_error
+        if not (flip_zero or flip_one):
+            return distribution
+        shape = np.shape(distribution)
+        tensor = np.array(distribution, dtype=float).reshape(shape[:-1] + (2,) * num_qubits)
+        for qubit in range(num_qubits):
+            # Axis -1 - qubit holds the qubit (little-endian)
+            zero = tensor[(Ellipsis, 0) + (slice(None),) * qubit]
+            one = tensor[(Ellipsis, 1) + (slice(None),) * qubit]
+            moved_down, moved_up = flip_zero * zero, flip_one * one
+            zero += moved_up - moved_down
+            one += moved_down - moved_up
+        return tensor.reshape(shape)
+
+
+class DensityMatrixSimulator:
+    """
+    Exact mixed-state simulator with the StatevectorSimulator gate API.
+
+    The density matrix of n qubits is held vectorized in a 2n-qubit
+    StatevectorSimulator register: register qubit q is bit q of the row
+    index and register qubit q + n bit q of the column index. A gate U
+    then acts as U on the row qubits and conj(U) on the column qubits, so
+    the statevector kernels apply unchanged at 4**n amplitudes per sample.
+    Error channels act on each (q, q + n) pair of register qubits.
+    """
+
+    def __init__(self, num_qubits, batch_size=None):
+        self.num_qubits = num_qubits
+        self.batch_size = batch_size
+        self.register = StatevectorSimulator(2 * num_qubits, batch_size)
+        self._blocks = {}
+        # Channel views per register buffer; fused blocks swap the register's double buffer
+        self._channel_views = {}
+        self._saved = np.empty(self.register.state.size // 4, dtype=complex)
+
+    def reset(self):
+        # |0><0| is basis state 0 of the vectorized register too
+        self.register.reset()
+        return self
+
+    def apply_single_qubit(self, matrix, qubit):
+        self.register.apply_single_qubit(matrix, qubit)
+        self.register.apply_single_qubit([[np.conj(entry) for entry in row] for row in matrix],
+                                         qubit + self.num_qubits)
+        return self
+
+    def rx(self, theta, qubit):
+        # conj(RX(theta)) = RX(-theta) and conj(RZ(theta)) = RZ(-theta); RY and H are real
+        self.register.rx(theta, qubit)
+        self.register.rx(np.negative(theta), qubit + self.num_qubits)
+        return self
+
+    def ry(self, theta, qubit):
+        self.register.ry(theta, qubit)
+        self.register.ry(theta, qubit + self.num_qubits)
+        return self
+
+    def rz(self, theta, qubit):
+        self.register.rz(theta, qubit)
+        self.register.rz(np.negative(theta), qubit + self.num_qubits)
+        return self
+
+    def h(self, qubit):
+        self.register.h(qubit)
+        self.register.h(qubit + self.num_qubits)
+        return self
+
+    def rotations(self, run, qubit):
+        matrix = None
+        for name, theta in run:
+            gate = gate_matrix(name, theta)
+            matrix = gate if matrix is None else multiply_matrices(gate, matrix)
+        return self.apply_single_qubit(matrix, qubit)
+
+    def cx(self, control, target):
+        self.register.cx(control, target)
+        self.register.cx(control + self.num_qubits, target + self.num_qubits)
+        return self
+
+    def cz(self, control, target):
+        self.register.cz(control, target)
+        self.register.cz(control + self.num_qubits, target + self.num_qubits)
+        return self
+
+    def entangle(self, block):
+        if block not in self._blocks:
+            # The same gates on the row and on the column qubits, fused into one register permutation
+            shifted = [(name, control + self.num_qubits, target + self.num_qubits)
+                       for name, control, target in block.gates]
+            self._blocks[block] = EntanglingBlock.from_gates(2 * self.num_qubits, block.gates + shifted)
+        self.register.entangle(self._blocks[block])
+        return self
+
+    def _channel_view(self, qubit):
+        # (row, column) = (0, 0), (1, 1), (0, 1), (1, 0) views of the qubit's 2x2 block
+        key = (self.register._active, qubit)
+        if key not in self._channel_views:
+            self._channel_views[key] = tuple(
+                self.register.state[self.register._slice([(qubit, row), (qubit + self.num_qubits, column)])]
+                for row, column in ((0, 0), (1, 1), (0, 1), (1, 0))
+            )
+        return self._channel_views[key]
+
+    def channel(self, populations, coherence, qubit):
+        """
+        Apply an error channel given as a 2x2 populations transfer matrix and
+        a coherence factor to qubit
+        """
+        (a, b), (c, d) = populations
+        diagonal_zero, diagonal_one, off_diagonal, off_diagonal_transposed = self._channel_view(qubit)
+        saved = self._saved[:diagonal_zero.size].reshape(diagonal_zero.shape)
+        np.copyto(saved, diagonal_zero)
+        diagonal_zero *= a
+        diagonal_zero += b * diagonal_one
+        diagonal_one *= d
+        diagonal_one += c * saved
+        off_diagonal *= coherence
+        off_diagonal_transposed *= coherence
+        return self
+
+    def density_matrix(self):
+        """
+        Return rho, shape (2**n, 2**n) or (batch_size, 2**n, 2**n), as a
+        transposed view of the register
+        """
+        dimension = 2 ** self.num_qubits
+        return np.swapaxes(self.register.statevector().reshape(self.register._batch_shape + (dimension,) * 2), -1, -2)
+
+    def probabilities(self):
+        # The diagonal rho[i, i] sits at register index i * (2**n + 1)
+        return np.array(self.register.statevector()[..., ::2 ** self.num_qubits + 1].real)
+
+
+def _apply_to_rows(simulator, rows, qubit, entries):
+    # Per-row 2x2 matrices on the few trajectories in rows, leaving the others untouched
+    axis = simulator.num_qubits - qubit
+    states = simulator.state[rows]
+    zero, one = np.take(states, 0, axis=axis), np.take(states, 1, axis=axis)
+    (a, b), (c, d) = [[np.reshape(entry, (len(rows),) + (1,) * (zero.ndim - 1)) for entry in row]
+                      for row in entries]
+    simulator.state[rows] = np.stack([a * zero + b * one, c * zero + d * one], axis=axis)
+
+
+def sample_trajectory_errors(simulator, noise_model, qubits, rng):
+    """
+    Apply one Monte-Carlo sample of the gate error channel on qubits to
+    every register of a batched StatevectorSimulator, each register being
+    one trajectory: a random Pauli for depolarizing, then a quantum jump or
+    the renormalized no-jump evolution for amplitude damping. Errors are
+    rare, so only the trajectories that draw one pay for a matrix product.
+    """
+    p, gamma = noise_model.depolarizing_probability(len(qubits)), noise_model.amplitude_damping
+    num_trajectories = simulator.batch_size
+    for qubit in qubits:
+        if p:
+            # rho -> (1 - p) rho + p I/2 is X, Y or Z with probability p/4 each
+            paulis = rng.choice(4, size=num_trajectories, p=[1 - 3 * p / 4, p / 4, p / 4, p / 4])
+            rows = np.flatnonzero(paulis)
+            if len(rows):
+                a, b, c, d = (entries[paulis[rows]] for entries in _PAULI_ENTRIES)
+                _apply_to_rows(simulator, rows, qubit, ((a, b), (c, d)))
+        if gamma:
+            one = simulator.state[simulator._slice([(qubit, 1)])]
+            zero = simulator.state[simulator._slice([(qubit, 0)])]
+            decay = gamma * np.sum(np.abs(one) ** 2, axis=tuple(range(1, one.ndim)))
+            jump = rng.random(num_trajectories) < decay
+            # Kraus operators [[1, 0], [0, sqrt(1 - gamma)]] (diagonal) or [[0, sqrt(gamma)], [0, 0]], renormalized
+            scale = 1 / np.sqrt(np.where(jump, decay, 1 - decay))
+            rows = np.flatnonzero(jump)
+            if len(rows):
+                no_jump = np.zeros(len(rows))
+                _apply_to_rows(simulator, rows, qubit, ((no_jump, math.sqrt(gamma) * scale[rows]),
+                                                        (no_jump, no_jump)))
+                scale[rows] = 1
+            zero *= simulator._coefficient(np.where(jump, 1, scale))
+            one *= simulator._coefficient(np.where(jump, 1, math.sqrt(1 - gamma) * scale))
+    return simulator
+
+
+class NoisyBackend(Backend):
+    """
+    Simulates a template GateTape under a NoiseModel; ``probabilities``
+    returns the measured outcome distribution including readout errors.
+
+    engine "density_matrix" evolves the exact density matrix, 4**n
+    amplitudes per sample. "trajectories" averages num_trajectories
+    Monte-Carlo statevector trajectories, 2**n amplitudes each, with a
+    statistical error of order 1/sqrt(num_trajectories). "auto" takes the
+    density matrix when it is the cheaper of the two (2**n <=
+    num_trajectories) and its batch fits in max_amplitudes.
+
+    With executor ("process" or "thread"), trajectories are split across a
+    WorkerPool of num_workers workers, each with its own random stream;
+    call ``close`` when done. Noisy runs have no single statevector, so
+    ``statevector`` raises.
+    """
+
+    name = "noisy"
+
+    def __init__(self, tape, noise_model=None, engine="auto", num_trajectories=256, seed=None, executor=None,
+                 num_workers=None, max_amplitudes=2 ** 26):
+        super().__init__(tape)
+        if engine not in NOISE_ENGINES + ("auto",):
+            raise ValueError(f"Unknown noise engine '{engine}', expected 'auto' or one of {NOISE_ENGINES}")
+        if num_trajectories < 1:
+            raise ValueError("Number of trajectories must be positive")
+        self.noise_model = NoiseModel() if noise_model is None else noise_model
+        self.engine = engine
+        self.num_trajectories = num_trajectories
+        self.max_amplitudes = max_amplitudes
+        self.rng = np.random.default_rng(seed)
+        self.executor = executor
+        self.num_workers = num_workers
+        self._pool = None
+        self.simulators = {}
+        # Channels are per gate width; None marks the identity
+        self._channels = {width: self.noise_model.gate_channel(width) for width in (1, 2)}
+
+    def choose_engine(self, batch_size=None):
+        if self.engine != "auto":
+            return self.engine
+        num_qubits, rows = self.tape.num_qubits, batch_size or 1
+        if 2 ** num_qubits <= self.num_trajectories and rows * 4 ** num_qubits <= self.max_amplitudes:
+            return "density_matrix"
+        return "trajectories"
+
+    def _replay(self, simulator, parameters, inputs, add_errors):
+        # Errors follow every gate, so entangling blocks run gate by gate
+        for name, angle, arguments in self.tape.operations:
+            if name == "entangle":
+                for gate, control, target in arguments[0].gates:
+                    getattr(simulator, gate)(control, target)
+                    add_errors(simulator, (control, target))
+            elif angle is None:
+                getattr(simulator, name)(*arguments)
+                add_errors(simulator, arguments)
+            else:
+                getattr(simulator, name)(resolve_angle(angle, parameters, inputs), *arguments)
+                add_errors(simulator, arguments)
+        return simulator
+
+    def density_probabilities(self, parameters, inputs, batch_size=None):
+        if batch_size not in self.simulators:
+            self.simulators[batch_size] = DensityMatrixSimulator(self.tape.num_qubits, batch_size)
+
+        def add_errors(simulator, qubits):
+            channel = self._channels[len(qubits)]
+            if channel is not None:
+                for qubit in qubits:
+                    simulator.channel(*channel, qubit)
+
+        return self._replay(self.simulators[batch_size].reset(), parameters, inputs, add_errors).probabilities()
+
+    def trajectory_totals(self, parameters, inputs, batch_size, num_trajectories, seed):
+        """
+        Sum of the outcome distributions of num_trajectories trajectories per
+        sample, shape (samples, 2**n); the unit of work of pool workers
+        """
+        rng = np.random.default_rng(seed)
+        rows = batch_size or 1
+        key = ("trajectories", rows * num_trajectories)
+        if key not in self.simulators:
+            self.simulators[key] = StatevectorSimulator(self.tape.num_qubits, batch_size=rows * num_trajectories)
+        # Every sample's inputs repeat once per trajectory, sample-major
+        inputs = np.repeat(np.reshape(inputs, (len(inputs), rows)), num_trajectories, axis=-1)
+
+        def add_errors(simulator, qubits):
+            sample_trajectory_errors(simulator, self.noise_model, qubits, rng)
+
+        simulator = self._replay(self.simulators[key].reset(), parameters, inputs, add_errors)
+        return simulator.probabilities().reshape(rows, num_trajectories, -1).sum(axis=1)
+
+    def trajectory_probabilities(self, parameters, inputs, batch_size=None):
+        if self.executor is None:
+            totals = self.trajectory_totals(parameters, inputs, batch_size, self.num_trajectories,
+                                            self.rng.integers(2 ** 63))
+        else:
+            chunks = [len(chunk) for chunk in self.pool.split(self.num_trajectories)]
+            seeds = self.rng.integers(2 ** 63, size=len(chunks))
+            totals = sum(self.pool.map("trajectory_totals", [
+                (parameters, inputs, batch_size, chunk, seed) for chunk, seed in zip(chunks, seeds)
+            ]))
+        distribution = totals / self.num_trajectories
+        return distribution if batch_size is not None else distribution[0]
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # Workers rebuild a serial trajectory backend once; tasks carry parameters and inputs
+            self._pool = WorkerPool(NoisyBackend, (self.tape, self.noise_model, "trajectories"),
+                                    kind=self.executor, max_workers=self.num_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def probabilities(self, parameters, inputs, batch_size=None):
+        if self.choose_engine(batch_size) == "density_matrix":
+            distribution = self.density_probabilities(parameters, inputs, batch_size)
+        else:
+            distribution = self.trajectory_probabilities(parameters, inputs, batch_size)
+        return self.noise_model.apply_readout_error(distribution, self.tape.num_qubits)
+
+    def statevector(self, parameters, inputs, batch_size=None):
+        raise ValueError("Noisy simulation produces mixed states; use probabilities instead of a statevector")
@@ -0,0 +1,266 @@
+import math
+
+import numpy as np
+
+
+class Objective:
+    """
+    Loss and gradient of the current sample or batch as functions of the
+    parameter vector. Optimizers call whichever they need.
+    """
+
+    def __init__(self, loss, gradient=None):
+        self.loss = loss
+        self.gradient = gradient
+
+    def loss_and_gradient(self, parameters):
+        return self.loss(parameters), self.gradient(parameters)
+
+
+# Learning-rate schedules map (initial learning rate, epoch) to a learning rate
+
+def constant_schedule(learning_rate, epoch):
+    return learning_rate
+
+
+class ExponentialDecay:
+    def __init__(self, decay_rate=0.99):
+        self.decay_rate = decay_rate
+
+    def __call__(self, learning_rate, epoch):
+        return learning_rate * self.decay_rate ** epoch
+
+
+class StepDecay:
+    def __init__(self, step_size=100, gamma=0.5):
+        self.step_size = step_size
+        self.gamma = gamma
+
+    def __call__(self, learning_rate, epoch):
+        return learning_rate * self.gamma ** (epoch // self.step_size)
+
+
+class CosineAnnealing:
+    def __init__(self, total_epochs, min_learning_rate=0.0):
+        self.total_epochs = total_epochs
+        self.min_learning_rate = min_learning_rate
+
+    def __call__(self, learning_rate, epoch):
+        progress = min(epoch, self.total_epochs) / self.total_epochs
+        return self.min_learning_rate + (learning_rate - self.min_learning_rate) * (1 + math.cos(math.pi * progress)) / 2
+
+
+class Optimizer:
+    """
+    Base class: ``step(parameters, objective)`` returns the updated
+    parameters. Call ``set_epoch`` at the start of each epoch so the
+    learning-rate schedule can advance.
+    """
+
+    # Mutable attributes saved in checkpoints; the learning rate is
+    # recomputed from the schedule, so it is not part of the state
+    state_attributes = ("iterations",)
+
+    def __init__(self, learning_rate=0.01, schedule=None):
+        self.initial_learning_rate = learning_rate
+        self.schedule = schedule or constant_schedule
+        self.learning_rate = learning_rate
+        self.iterations = 0
+
+    def set_epoch(self, epoch):
+        self.learning_rate = self.schedule(self.initial_learning_rate, epoch)
+
+    def step(self, parameters, objective):
+        raise NotImplementedError
+
+    def state_dict(self):
+        """
+        Return the resumable optimizer state as a dict of scalars and arrays
+        """
+        return {name: getattr(self, name) for name in self.state_attributes}
+
+    def load_state_dict(self, state):
+        for name in self.state_attributes:
+            setattr(self, name, state[name])
+        return self
+
+
+class SGD(Optimizer):
+    def step(self, parameters, objective):
+        self.iterations += 1
+        return parameters - self.learning_rate * objective.gradient(parameters)
+
+
+class Momentum(Optimizer):
+    state_attributes = Optimizer.state_attributes + ("velocity",)
+
+    def __init__(self, learning_rate=0.01, momentum=0.9, nesterov=False, schedule=None):
+        super().__init__(learning_rate, schedule)
+        self.momentum = momentum
+        self.nesterov = nesterov
+        self.velocity = None
+
+    def step(self, parameters, objective):
+        if self.velocity is None:
+            self.velocity = np.zeros_like(parameters, dtype=float)
+        self.iterations += 1
+        # Nesterov evaluates the gradient at the look-ahead point
+        lookahead = parameters + self.momentum * self.velocity if self.nesterov else parameters
+        self.velocity = self.momentum * self.velocity - self.learning_rate * objective.gradient(lookahead)
+        return parameters + self.velocity
+
+
+class Adam(Optimizer):
+    state_attributes = Optimizer.state_attributes + ("first_moment", "second_moment")
+
+    def __init__(self, learning_rate=0.01, beta1=0.9, beta2=0.999, epsilon=1e-8, schedule=None):
+        super().__init__(learning_rate, schedule)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.first_moment = None
+        self.second_moment = None
+
+    def step(self, parameters, objective):
+        gradient = objective.gradient(parameters)
+        if self.first_moment is None:
+            self.first_moment = np.zeros_like(gradient, dtype=float)
+            self.second_moment = np.zeros_like(gradient, dtype=float)
+        self.iterations += 1
+
+        self.first_moment = self.beta1 * self.first_moment + (1 - self.beta1) * gradient
+        self.second_moment = self.beta2 * self.second_moment + (1 - self.beta2) * gradient ** 2
+        first_unbiased = self.first_moment / (1 - self.beta1 ** self.iterations)
+        second_unbiased = self.second_moment / (1 - self.beta2 ** self.iterations)
+        return parameters - self.learning_rate * first_unbiased / (np.sqrt(second_unbiased) + self.epsilon)
+
+
+class SPSA(Optimizer):
+    """
+    Simultaneous perturbation stochastic approximation: two loss
+    evaluations per step regardless of the number of parameters, using the
+    standard gain sequences a_k = a / (k + 1 + A)**alpha and
+    c_k = c / (k + 1)**gamma. Needs only ``objective.loss``.
+    """
+
+    def __init__(self, learning_rate=0.1, perturbation=0.1, alpha=0.602, gamma=0.101, stability=0,
+                 schedule=None, seed=None):
+        super().__init__(learning_rate, schedule)
+        self.perturbation = perturbation
+        self.alpha = alpha
+        self.gamma = gamma
+        self.stability = stability
+        self.rng = np.random.default_rng(seed)
+
+    def step(self, parameters, objective):
+        step_size = self.learning_rate / (self.iterations + 1 + self.stability) ** self.alpha
+        perturbation = self.perturbation / (self.iterations + 1) ** self.gamma
+        self.iterations += 1
+
+        delta = self.rng.choice((-1.0, 1.0), size=np.shape(parameters))
+        loss_plus = objective.loss(parameters + perturbation * delta)
+        loss_minus = objective.loss(parameters - perturbation * delta)
+        # For +-1 perturbations 1 / delta == delta
+        gradient_estimate = (loss_plus - loss_minus) / (2 * perturbation) * delta
+        return parameters - step_size * gradient_estimate
+
+    def state_dict(self):
+        state = super().state_dict()
+        state["rng"] = self.rng.bit_generator.state
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.rng.bit_generator.state = state["rng"]
+        return self
+
+
+class LBFGS(Optimizer):
+    """
+    Limited-memory BFGS through scipy.optimize. Each step runs up to
+    ``iterations_per_step`` L-BFGS-B iterations on the objective, so it is
+    meant for full-batch training; curvature memory restarts every step.
+    """
+
+    def __init__(self, iterations_per_step=10, memory=10, tolerance=1e-9):
+        super().__init__(learning_rate=None)
+        self.iterations_per_step = iterations_per_step
+        self.memory = memory
+        self.tolerance = tolerance
+
+    def set_epoch(self, epoch):
+        pass
+
+    def step(self, parameters, objective):
+        try:
+            from scipy.optimize import minimize
+        except ImportError as e:
+            raise ImportError("The LBFGS optimizer requires scipy") from e
+
+        result = minimize(
+            objective.loss_and_gradient, parameters, jac=True, method="L-BFGS-B",
+            options={"maxiter": self.iterations_per_step, "maxcor": self.memory, "gtol": self.tolerance},
+        )
+        self.iterations += result.nit
+        return result.x
+
+
+OPTIMIZERS = {
+    "sgd": SGD,
+    "momentum": Momentum,
+    "adam": Adam,
+    "spsa": SPSA,
+    "lbfgs": LBFGS,
+}
+
+
+def get_optimizer(optimizer=None, learning_rate=None):
+    """
+    Return an Optimizer instance from an instance, a name in OPTIMIZERS,
+    or None for plain SGD; ``learning_rate`` overrides the named
+    optimizer's default step size only when given
+    """
+    keywords = {} if learning_rate is None else {"learning_rate": learning_rate}
+    if optimizer is None:
+        return SGD(**keywords)
+    if isinstance(optimizer, Optimizer):
+        return optimizer
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer '{optimizer}', expected one of {tuple(OPTIMIZERS)}")
+    if optimizer == "lbfgs":
+        return LBFGS()
+    return OPTIMIZERS[optimizer](**keywords)
+
+
+class EarlyStopping:
+    """
+    Signals a stop once the monitored loss has not improved by more than
+    ``min_delta`` for ``patience`` consecutive epochs
+    """
+
+    def __init__(self, patience=50, min_delta=1e-6):
+        if patience < 1:
+            raise ValueError("Patience must be positive")
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best_loss = float('inf')
+        self.epochs_without_improvement = 0
+
+    def update(self, loss):
+        """
+        Record this epoch's loss and return True when training should stop
+        """
+        if loss < self.best_loss - self.min_delta:
+            self.best_loss = loss
+            self.epochs_without_improvement = 0
+        else:
+            self.epochs_without_improvement += 1
+        return self.epochs_without_improvement >= self.patience
+
+    def state_dict(self):
+        return {"best_loss": self.best_loss, "epochs_without_improvement": self.epochs_without_improvement}
+
+    def load_state_dict(self, state):
+        self.best_loss = state["best_loss"]
+        self.epochs_without_improvement = state["epochs_without_improvement"]
+        return self
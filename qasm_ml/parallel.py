@@ -0,0 +1,111 @@
+import collections
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+EXECUTOR_KINDS = ("process", "thread")
+
+# Each worker (process or thread) builds its own context once at start-up
+_worker = threading.local()
+
+
+def _initialize_worker(context_factory, factory_args):
+    _worker.context = context_factory(*factory_args)
+
+
+def _run_task(task):
+    method, args = task
+    return getattr(_worker.context, method)(*args)
+
+
+class WorkerPool:
+    """
+    Long-lived process or thread pool for gradient and bulk evaluation.
+
+    Every worker calls ``context_factory(*factory_args)`` once when it
+    starts and keeps the result, so tasks only carry a method name and
+    compact NumPy arguments instead of a pickled copy of the model. Use as
+    a context manager, or call ``shutdown`` when done.
+
+    Process workers are started with the "spawn" method by default:
+    forking a parent that has already run Qiskit's multi-threaded
+    transpiler can deadlock the children.
+    """
+
+    def __init__(self, context_factory, factory_args=(), kind="process", max_workers=None, chunksize=1,
+                 start_method="spawn"):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        if chunksize < 1:
+            raise ValueError("Chunk size must be positive")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        options = {}
+        if kind == "process":
+            executor_class = ProcessPoolExecutor
+            options["mp_context"] = multiprocessing.get_context(start_method)
+        else:
+            executor_class = ThreadPoolExecutor
+        self._executor = executor_class(
+            max_workers=self.max_workers,
+            initializer=_initialize_worker,
+            initargs=(context_factory, factory_args),
+            **options
+        )
+        # Futures submitted by imap and not finished yet, cancelled by shutdown(cancel_pending=True)
+        self._pending = set()
+
+    def map(self, method, argument_tuples):
+        """
+        Call ``context.method(*args)`` in the workers for every args tuple
+        and return the results in order
+        """
+        tasks = [(method, args) for args in argument_tuples]
+        if self.kind == "thread":
+            # Thread pools ignore chunksize; there is no pickling to amortize
+            return list(self._executor.map(_run_task, tasks))
+        return list(self._executor.map(_run_task, tasks, chunksize=self.chunksize))
+
+    def imap(self, method, argument_tuples, max_pending=None):
+        """
+        Lazy version of ``map`` for streams: argument_tuples is consumed as
+        results are yielded, in order, with at most max_pending tasks
+        (default: twice the worker count) in flight at any time
+        """
+        max_pending = max_pending or 2 * self.max_workers
+        pending = collections.deque()
+        for args in argument_tuples:
+            future = self._executor.submit(_run_task, (method, args))
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+            pending.append(future)
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def split(self, num_samples):
+        """
+        Split range(num_samples) into at most max_workers contiguous index chunks
+        """
+        return [chunk for chunk in np.array_split(np.arange(num_samples), self.max_workers) if len(chunk)]
+
+    def shutdown(self, cancel_pending=False):
+        # Executor.map cancels its own futures when interrupted; only imap leaves tasks behind.
+        # Cancelling them here works on Python 3.8, which has no cancel_futures.
+        if cancel_pending:
+            for future in list(self._pending):
+                future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(cancel_pending=exc_type is not None)
+        return False
@@ -0,0 +1,638 @@
+"""
+OpenQASM runner on the built-in statevector engine, without Qiskit.
+
+``QasmProgram.parse`` turns the qelib1.inc subset of OpenQASM 2.0 (and
+the matching register declarations of OpenQASM 3) into a flat list of
+operations; ``probabilities`` and ``counts`` simulate it exactly.
+Clifford-only programs run on the stabilizer tableau instead, so their
+width is not limited by statevector memory.
+
+    program = QasmProgram.from_file("trinity.qasm")
+    program.probabilities()          # {"010 1": 0.25, ...}, Qiskit's key order
+    program.counts(1024, seed=0)     # sampled from the exact distribution
+"""
+import ast
+import math
+import re
+import time
+
+import numpy as np
+
+from .stabilizer import StabilizerState, affine_outcomes, sample_affine_outcomes
+from .statevector import StatevectorSimulator, gate_matrix
+
+# name -> (number of parameters, number of qubits)
+QASM_GATES = {
+    "id": (0, 1), "x": (0, 1), "y": (0, 1), "z": (0, 1), "h": (0, 1),
+    "s": (0, 1), "sdg": (0, 1), "t": (0, 1), "tdg": (0, 1), "sx": (0, 1), "sxdg": (0, 1),
+    "rx": (1, 1), "ry": (1, 1), "rz": (1, 1), "p": (1, 1), "u1": (1, 1), "u2": (2, 1), "u3": (3, 1),
+    "u": (3, 1), "U": (3, 1),
+    "cx": (0, 2), "CX": (0, 2), "cy": (0, 2), "cz": (0, 2), "ch": (0, 2), "swap": (0, 2),
+    "crx": (1, 2), "cry": (1, 2), "crz": (1, 2), "cp": (1, 2), "cu1": (1, 2), "cu3": (3, 2),
+    "ccx": (0, 3), "cswap": (0, 3),
+}
+
+# Diagonal gates applied as a phase on |1>: name -> fixed angle (None: the parameter)
+_PHASES = {"z": math.pi, "s": math.pi / 2, "sdg": -math.pi / 2, "t": math.pi / 4, "tdg": -math.pi / 4,
+           "p": None, "u1": None}
+
+# Controlled gates applied as (number of controls, single-qubit gate)
+_CONTROLLED = {
+    "cy": (1, "y"), "ch": (1, "h"), "crx": (1, "rx"), "cry": (1, "ry"), "crz": (1, "rz"),
+    "cp": (1, "p"), "cu1": (1, "u1"), "cu3": (1, "u3"), "ccx": (2, "x"),
+}
+
+# Clifford gates as StabilizerState gates, equal up to global phase
+_CLIFFORD = {
+    "id": (), "x": ("x",), "y": ("y",), "z": ("z",), "h": ("h",), "s": ("s",), "sdg": ("sdg",),
+    "sx": ("sx",), "sxdg": ("sxdg",), "cx": ("cx",), "CX": ("cx",), "cy": ("cy",), "cz": ("cz",),
+    "swap": ("swap",),
+}
+
+_INCLUDES = ("qelib1.inc", "stdgates.inc")
+_FUNCTIONS = {"sin": math.sin, "cos": math.cos, "tan": math.tan, "exp": math.exp, "ln": math.log,
+              "sqrt": math.sqrt}
+_OPERATORS = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+              ast.Div: lambda a, b: a / b, ast.Pow: lambda a, b: a ** b}
+_ARGUMENT = re.compile(r"^([A-Za-z_]\w*)\s*(?:\[\s*(\d+)\s*\])?$")
+_GATE_CALL = re.compile(r"^([A-Za-z_]\w*)\s*(?:\((.*)\))?\s*(.*)$", re.S)
+_REGISTER = re.compile(r"^(qreg|creg)\s+([A-Za-z_]\w*)\s*\[\s*(\d+)\s*\]$")
+_REGISTER_3 = re.compile(r"^(qubit|bit)\s*(?:\[\s*(\d+)\s*\])?\s+([A-Za-z_]\w*)$")
+_MEASURE = re.compile(r"^measure\s+(?P<qubits>[^-]+?)\s*->\s*(?P<clbits>.+)$")
+_MEASURE_3 = re.compile(r"^(?P<clbits>[^=]+?)\s*=\s*measure\s+(?P<qubits>.+)$")
+_CONDITION = re.compile(r"^if\s*\(\s*([A-Za-z_]\w*)\s*==\s*(\d+)\s*\)\s*(.*)$", re.S)
+# Probabilities below this are treated as impossible measurement outcomes
+_TOLERANCE = 1e-12
+# Outcome probabilities below this are rounding noise and are dropped
+_NEGLIGIBLE = 1e-15
+
+
+def evaluate_expression(text):
+    """
+    Value of a gate parameter such as "pi/4" or "-2*cos(0.3)"
+    """
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in ("pi", "π"):
+            return math.pi
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            value = evaluate(node.operand)
+            return -value if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+                and len(node.args) == 1):
+            return _FUNCTIONS[node.func.id](evaluate(node.args[0]))
+        raise ValueError(f"Unsupported expression '{text}'")
+
+    try:
+        tree = ast.parse(text.strip().replace("^", "**"), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Unsupported expression '{text}'") from None
+    return float(evaluate(tree.body))
+
+
+def single_qubit_gate(name, params=()):
+    """
+    Return the qelib1 single-qubit gate as ((a, b), (c, d)), matching
+    Qiskit's matrices including global phase
+    """
+    if name in ("h", "rx", "ry", "rz"):
+        return gate_matrix(name, *params)
+    if name == "id":
+        return ((1, 0), (0, 1))
+    if name == "x":
+        return ((0, 1), (1, 0))
+    if name == "y":
+        return ((0, -1j), (1j, 0))
+    if name in _PHASES:
+        return ((1, 0), (0, np.exp(1j * (params[0] if _PHASES[name] is None else _PHASES[name]))))
+    if name in ("sx", "sxdg"):
+        plus, minus = (0.5 + 0.5j, 0.5 - 0.5j) if name == "sx" else (0.5 - 0.5j, 0.5 + 0.5j)
+        return ((plus, minus), (minus, plus))
+    if name in ("u2", "u3", "u", "U"):
+        theta, phi, lam = (math.pi / 2,) + tuple(params) if name == "u2" else params
+        cos, sin = math.cos(theta / 2), math.sin(theta / 2)
+        return ((cos, -np.exp(1j * lam) * sin), (np.exp(1j * phi) * sin, np.exp(1j * (phi + lam)) * cos))
+    raise ValueError(f"Unknown single-qubit gate '{name}'")
+
+
+def apply_gate(simulator, name, params, qubits):
+    """
+    Apply one QASM gate to a StatevectorSimulator
+    """
+    if name == "x":
+        simulator.x(qubits[0])
+    elif name in _PHASES:
+        simulator.p(params[0] if _PHASES[name] is None else _PHASES[name], qubits[0])
+    elif name == "rz":
+        simulator.rz(params[0], qubits[0])
+    elif name == "id":
+        pass
+    elif name in ("cx", "CX"):
+        simulator.cx(*qubits)
+    elif name == "cz":
+        simulator.cz(*qubits)
+    elif name == "swap":
+        first, second = qubits
+        simulator.cx(first, second).cx(second, first).cx(first, second)
+    elif name == "cswap":
+        control, first, second = qubits
+        simulator.cx(second, first)
+        simulator.apply_controlled(single_qubit_gate("x"), (control, first), second)
+        simulator.cx(second, first)
+    elif name in _CONTROLLED:
+        num_controls, base = _CONTROLLED[name]
+        simulator.apply_controlled(single_qubit_gate(base, params), qubits[:num_controls], qubits[num_controls])
+    else:
+        simulator.apply_single_qubit(single_qubit_gate(name, params), qubits[0])
+
+
+def clifford_decomposition(name, params=()):
+    """
+    StabilizerState gates equal to the QASM gate up to global phase, or
+    None when it is not a Clifford gate. Rotations are Clifford at
+    multiples of pi/2.
+    """
+    if name in _CLIFFORD:
+        return _CLIFFORD[name]
+    if name in ("rx", "ry", "rz", "p", "u1"):
+        turns = params[0] / (math.pi / 2)
+        if abs(turns - round(turns)) > 1e-9:
+            return None
+        quarter_turns = round(turns) % 4
+        if name == "rx":
+            return ("h",) + ("s",) * quarter_turns + ("h",)
+        if name == "ry":
+            # RY(pi/2) = X H
+            return ("h", "x") * quarter_turns
+        return ("s",) * quarter_turns
+    return None
+
+
+def _clifford_prefix(operations):
+    # Number of leading operations that are unconditioned Clifford gates
+    for position, operation in enumerate(operations):
+        if operation[0] != "gate" or operation[-1] is not None or clifford_decomposition(*operation[1:3]) is None:
+            return position
+    return len(operations)
+
+
+def _strip_comments(source):
+    # Blank out comments but keep newlines so statement line numbers stay right
+    source = re.sub(r"/\*.*?\*/", lambda match: "\n" * match.group().count("\n"), source, flags=re.S)
+    return re.sub(r"//[^\n]*", "", source)
+
+
+def _split_arguments(text):
+    return [argument.strip() for argument in text.split(",")] if text.strip() else []
+
+
+class QasmProgram:
+    """
+    A parsed OpenQASM program as a flat operation list:
+
+    * ``("gate", name, params, qubits, condition)``
+    * ``("measure", qubit, clbit, condition)``
+    * ``("reset", qubit, condition)``
+
+    Qubits and classical bits are global indices in declaration order;
+    condition is None or (classical register name, value). Register-wide
+    statements (``h q;``, ``measure q -> c;``) are expanded per bit and
+    barriers are dropped. Custom ``gate`` definitions, ``opaque`` and
+    anything outside the qelib1 gate set raise ValueError with the line.
+    """
+
+    def __init__(self, qubit_registers, clbit_registers, operations, name="<qasm>"):
+        self.qubit_registers = dict(qubit_registers)
+        self.clbit_registers = dict(clbit_registers)
+        self.operations = list(operations)
+        self.name = name
+        self.measured = any(operation[0] == "measure" for operation in self.operations)
+        # Runs on the stabilizer tableau: Clifford gates, measure and reset, no conditions
+        self.clifford = all(operation[-1] is None for operation in self.operations) and \
+            _clifford_prefix([operation for operation in self.operations if operation[0] == "gate"]) == \
+            sum(operation[0] == "gate" for operation in self.operations)
+
+    @property
+    def num_qubits(self):
+        return sum(size for _, size in self.qubit_registers.values())
+
+    @property
+    def num_clbits(self):
+        return sum(size for _, size in self.clbit_registers.values())
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.parse(f.read(), name=str(path))
+
+    @classmethod
+    def parse(cls, source, name="<qasm>"):
+        qubit_registers, clbit_registers, operations = {}, {}, []
+        source = _strip_comments(source)
+        line, position, header = 1, 0, False
+
+        def error(message):
+            return ValueError(f"{name}:{line}: {message}")
+
+        def declare(registers, register, size):
+            if register in qubit_registers or register in clbit_registers:
+                raise error(f"Register '{register}' is already declared")
+            registers[register] = (sum(size for _, size in registers.values()), size)
+
+        def bits(argument, registers, kind):
+            match = _ARGUMENT.match(argument)
+            if match is None or match.group(1) not in registers:
+                raise error(f"Unknown {kind} '{argument}'")
+            offset, size = registers[match.group(1)]
+            if match.group(2) is None:
+                return list(range(offset, offset + size))
+            index = int(match.group(2))
+            if index >= size:
+                raise error(f"Index {index} out of range for {kind} register {match.group(1)}[{size}]")
+            return [offset + index]
+
+        def broadcast(groups):
+            # Whole-register arguments expand together, single bits repeat
+            sizes = {len(group) for group in groups if len(group) > 1}
+            if len(sizes) > 1:
+                raise error("Register arguments have different sizes")
+            width = sizes.pop() if sizes else 1
+            return list(zip(*[group * width if len(group) == 1 else group for group in groups]))
+
+        def operation(statement, condition):
+            measure = _MEASURE.match(statement) or _MEASURE_3.match(statement)
+            if measure is not None:
+                source_text, target_text = measure.group("qubits", "clbits")
+                pairs = broadcast([bits(source_text.strip(), qubit_registers, "qubit"),
+                                   bits(target_text.strip(), clbit_registers, "classical bit")])
+                operations.extend(("measure", qubit, clbit, condition) for qubit, clbit in pairs)
+                return
+            match = _GATE_CALL.match(statement)
+            if match is None:
+                raise error(f"Unsupported statement '{statement}'")
+            gate, params_text, arguments_text = match.groups()
+            if gate == "reset":
+                for qubit in bits(arguments_text.strip(), qubit_registers, "qubit"):
+                    operations.append(("reset", qubit, condition))
+                return
+            if gate == "barrier":
+                for argument in _split_arguments(arguments_text):
+                    bits(argument, qubit_registers, "qubit")
+                return
+            if gate not in QASM_GATES:
+                raise error(f"Unsupported statement '{statement}'")
+            num_params, num_qubits = QASM_GATES[gate]
+            try:
+                params = tuple(evaluate_expression(text) for text in _split_arguments(params_text or ""))
+            except (ValueError, ArithmeticError) as exception:
+                raise error(str(exception)) from None
+            arguments = _split_arguments(arguments_text)
+            if len(params) != num_params or len(arguments) != num_qubits:
+                raise error(f"Gate '{gate}' takes {num_params} parameters and {num_qubits} qubits")
+            for qubits in broadcast([bits(argument, qubit_registers, "qubit") for argument in arguments]):
+                if len(set(qubits)) != len(qubits):
+                    raise error(f"Gate '{gate}' is applied to the same qubit twice")
+                operations.append(("gate", gate, params, qubits, condition))
+
+        for end in [match.start() for match in re.finditer(";", source)] + [len(source)]:
+            text = source[position:end]
+            line += text[:len(text) - len(text.lstrip())].count("\n")
+            statement = " ".join(text.split())
+            position = end + 1
+            if statement:
+                declaration = _REGISTER.match(statement)
+                declaration_3 = _REGISTER_3.match(statement)
+                if statement.startswith("OPENQASM"):
+                    if header or statement.split()[-1] not in ("2", "2.0", "3", "3.0"):
+                        raise error(f"Unsupported header '{statement}'")
+                    header = True
+                elif statement.startswith("include"):
+                    if statement.split(None, 1)[-1].strip("\"' ") not in _INCLUDES:
+                        raise error(f"Unsupported include '{statement}'")
+                elif declaration is not None:
+                    declare(qubit_registers if declaration.group(1) == "qreg" else clbit_registers,
+                            declaration.group(2), int(declaration.group(3)))
+                elif declaration_3 is not None:
+                    declare(qubit_registers if declaration_3.group(1) == "qubit" else clbit_registers,
+                            declaration_3.group(3), int(declaration_3.group(2) or 1))
+                elif statement.startswith("if"):
+                    condition = _CONDITION.match(statement)
+                    if condition is None or condition.group(1) not in clbit_registers:
+                        raise error(f"Unsupported condition '{statement}'")
+                    operation(condition.group(3), (condition.group(1), int(condition.group(2))))
+                elif statement.startswith(("gate ", "opaque ")):
+                    raise error("Custom gate definitions are not supported")
+                else:
+                    operation(statement, None)
+            line += text.count("\n") - text[:len(text) - len(text.lstrip())].count("\n")
+        if not header:
+            raise ValueError(f"{name}: missing OPENQASM header")
+        if not qubit_registers:
+            raise ValueError(f"{name}: program declares no qubits")
+        return cls(qubit_registers, clbit_registers, operations, name)
+
+    def format_outcomes(self, values):
+        """
+        Keys for classical values: registers in reverse declaration order
+        separated by spaces, most significant bit first, as in Qiskit
+        counts. Programs without measurements report all qubits as one
+        string.
+        """
+        width = self.num_clbits if self.measured else self.num_qubits
+        values = np.asarray(values)
+        if values.ndim == 2:
+            # Bit arrays with clbit k in column k
+            digits = values[:, ::-1].astype(np.uint8) + ord("0")
+        else:
+            values = values.astype(np.int64).reshape(-1, 1)
+            digits = ((values >> np.arange(width - 1, -1, -1)) & 1).astype(np.uint8) + ord("0")
+        if self.measured and len(self.clbit_registers) > 1:
+            # Later registers hold the higher clbits, so they come first
+            columns, space = [], np.full((len(digits), 1), ord(" "), dtype=np.uint8)
+            for offset, size in reversed(list(self.clbit_registers.values())):
+                columns += [digits[:, width - offset - size:width - offset], space]
+            digits = np.concatenate(columns[:-1], axis=1)
+        return np.ascontiguousarray(digits).view(f"S{digits.shape[1]}").ravel().astype(str).tolist()
+
+    def clifford_outcomes(self):
+        """
+        Run a Clifford program on a StabilizerState and return the final
+        classical bits (all qubits, if nothing is measured) as affine forms
+        of the random outcomes, shape (num_bits, 1 + num_variables)
+        """
+        if not self.clifford:
+            raise ValueError(f"{self.name}: program has non-Clifford gates or classical conditions")
+        state = StabilizerState(self.num_qubits)
+        forms = {}
+        for operation in self.operations:
+            if operation[0] == "gate":
+                _, name, params, qubits, _ = operation
+                for gate in clifford_decomposition(name, params):
+                    getattr(state, gate)(*qubits)
+            elif operation[0] == "reset":
+                state.reset(operation[1])
+            else:
+                forms[operation[2]] = state.measure(operation[1])
+        if not self.measured:
+            forms = {qubit: state.measure(qubit) for qubit in range(self.num_qubits)}
+        outcomes = np.zeros((self.num_clbits if self.measured else self.num_qubits, state.num_variables + 1),
+                            dtype=bool)
+        for bit, form in forms.items():
+            outcomes[bit, :len(form)] = form
+        return outcomes
+
+    def distribution(self, max_amplitudes=2 ** 27):
+        """
+        Exact (outcomes, probabilities): integer classical values from the
+        BranchingSimulator, or bit arrays (one column per clbit) from the
+        stabilizer engine for Clifford programs, which then allows at most
+        max_amplitudes outcomes instead of amplitudes
+        """
+        if self.clifford:
+            return affine_outcomes(self.clifford_outcomes(), max_amplitudes)
+        return BranchingSimulator(self, max_amplitudes).run()
+
+    def sample(self, shots, seed=None, max_amplitudes=2 ** 27):
+        """
+        (outcomes, counts) over shots runs. Clifford programs are sampled
+        from the stabilizer engine without enumerating outcomes; others
+        from the exact distribution, so the cost does not grow with shots.
+        """
+        if shots < 1:
+            raise ValueError("Number of shots must be positive")
+        rng = np.random.default_rng(seed)
+        if self.clifford:
+            return sample_affine_outcomes(self.clifford_outcomes(), shots, rng)
+        values, probabilities = self.distribution(max_amplitudes)
+        counts = rng.multinomial(shots, probabilities / probabilities.sum())
+        observed = np.flatnonzero(counts)
+        return values[observed], counts[observed]
+
+    def probabilities(self, max_amplitudes=2 ** 27):
+        """
+        Exact outcome probabilities keyed by ``format_outcomes``
+        """
+        outcomes, probabilities = self.distribution(max_amplitudes)
+        return dict(zip(self.format_outcomes(outcomes), probabilities.tolist()))
+
+    def counts(self, shots, seed=None, max_amplitudes=2 ** 27):
+        outcomes, counts = self.sample(shots, seed, max_amplitudes)
+        return dict(zip(self.format_outcomes(outcomes), counts.tolist()))
+
+
+class BranchingSimulator:
+    """
+    Exact simulation of a QasmProgram, including mid-circuit measurement,
+    reset and classically conditioned operations.
+
+    Each measurement history with nonzero probability is one branch: a row
+    of a batched StatevectorSimulator with its probability and classical
+    bits. Measurements are deferred until a later operation touches the
+    qubit or reads the register, so programs that only measure at the end
+    run as a single statevector and their outcomes are read from its
+    distribution. Resets of qubits in a definite state do not branch.
+    ``max_amplitudes`` bounds rows * 2**num_qubits.
+
+    A long leading run of Clifford gates is simulated on a StabilizerState
+    and expanded into the statevector at the first other operation.
+    """
+
+    def __init__(self, program, max_amplitudes=2 ** 27):
+        if program.num_clbits > 62:
+            raise ValueError(f"{program.name}: at most 62 classical bits are supported")
+        if 2 ** program.num_qubits > max_amplitudes:
+            raise ValueError(f"{program.name}: {program.num_qubits} qubits exceed {max_amplitudes} amplitudes")
+        self.program = program
+        self.max_amplitudes = max_amplitudes
+        self.simulator = StatevectorSimulator(program.num_qubits, 1)
+        self.weights = np.ones(1)
+        self.clbits = np.zeros(1, dtype=np.int64)
+        # Deferred measurements as clbit -> qubit
+        self.pending = {}
+
+    def _register_mask(self, register):
+        offset, size = self.program.clbit_registers[register]
+        return ((1 << size) - 1) << offset
+
+    def _rows(self, condition):
+        if condition is None:
+            return None
+        register, value = condition
+        self._resolve(clbits=[clbit for clbit in self.pending if (self._register_mask(register) >> clbit) & 1])
+        offset, _ = self.program.clbit_registers[register]
+        return (self.clbits & self._register_mask(register)) == (value << offset)
+
+    def _resolve(self, qubits=(), clbits=()):
+        """
+        Perform the deferred measurements of the given qubits and into the given clbits
+        """
+        qubits = set(qubits) | {self.pending[clbit] for clbit in clbits}
+        for qubit in qubits:
+            targets = [clbit for clbit, measured in self.pending.items() if measured == qubit]
+            if targets:
+                for clbit in targets:
+                    del self.pending[clbit]
+                self._collapse(qubit, targets)
+
+    def _collapse(self, qubit, clbits=(), reset=False, rows=None):
+        """
+        Measure ``qubit`` in every row (or the selected rows), recording the
+        outcome in clbits; a row with both outcomes possible becomes two
+        renormalized rows. A reset flips outcome |1> back to |0>.
+        """
+        p1 = self.simulator.qubit_probabilities(qubit)
+        selected = np.ones(len(p1), dtype=bool) if rows is None else rows
+        keep_zero = ~selected | (p1 < 1 - _TOLERANCE)
+        keep_one = selected & (p1 > _TOLERANCE)
+        bits = sum(1 << clbit for clbit in clbits)
+
+        if not (keep_zero & keep_one).any():
+            # Every outcome is already determined: update the rows in place
+            self.clbits[selected & ~keep_one] &= ~bits
+            self.clbits[keep_one] |= bits
+            if reset and keep_one.any():
+                flip = keep_one.astype(float)
+                self.simulator.apply_single_qubit(((1 - flip, flip), (flip, 1 - flip)), qubit)
+            return
+
+        zero_rows, one_rows = np.flatnonzero(keep_zero), np.flatnonzero(keep_one)
+        num_rows = len(zero_rows) + len(one_rows)
+        if num_rows * 2 ** self.program.num_qubits > self.max_amplitudes:
+            raise ValueError(f"{self.program.name}: {num_rows} measurement branches exceed "
+                             f"{self.max_amplitudes} amplitudes")
+        simulator = StatevectorSimulator(self.program.num_qubits, num_rows)
+        zero_part, one_part = simulator.state[:len(zero_rows)], simulator.state[len(zero_rows):]
+        zero_part[...] = self.simulator.state[zero_rows]
+        one_part[...] = self.simulator.state[one_rows]
+        qubit_zero, qubit_one = simulator._slice([(qubit, 0)]), simulator._slice([(qubit, 1)])
+        row_shape = (-1,) + (1,) * self.program.num_qubits
+
+        projected = selected[zero_rows]
+        zero_probability = np.where(projected, 1 - p1[zero_rows], 1.0)
+        zero_part[qubit_one][projected] = 0
+        zero_part /= np.sqrt(zero_probability).reshape(row_shape)
+        one_part[qubit_zero] = 0
+        one_part /= np.sqrt(p1[one_rows]).reshape(row_shape)
+        if reset:
+            one_part[qubit_zero] = one_part[qubit_one]
+            one_part[qubit_one] = 0
+
+        zero_clbits, one_clbits = self.clbits[zero_rows], self.clbits[one_rows]
+        zero_clbits[projected] &= ~bits
+        one_clbits |= bits
+        self.simulator = simulator
+        self.weights = np.concatenate([self.weights[zero_rows] * zero_probability,
+                                       self.weights[one_rows] * p1[one_rows]])
+        self.clbits = np.concatenate([zero_clbits, one_clbits])
+
+    def _apply(self, name, params, qubits, rows):
+        if rows is None or rows.all():
+            apply_gate(self.simulator, name, params, qubits)
+            return
+        # Conditioned gate on some branches: run it on a copy of those rows
+        rows = np.flatnonzero(rows)
+        subset = StatevectorSimulator(self.program.num_qubits, len(rows))
+        subset.state[...] = self.simulator.state[rows]
+        apply_gate(subset, name, params, qubits)
+        self.simulator.state[rows] = subset.state
+
+    def run(self):
+        """
+        Simulate the program and return (values, probabilities): the
+        possible classical values, as integers with clbit k at bit k, and
+        their probabilities. Without measurements the values are the
+        basis states of all qubits.
+        """
+        operations = self.program.operations
+        prefix = _clifford_prefix(operations)
+        # Expanding the tableau costs up to one pass per qubit, about as much as that many gates
+        if prefix > self.program.num_qubits:
+            state = StabilizerState(self.program.num_qubits)
+            for _, name, params, qubits, _ in operations[:prefix]:
+                for gate in clifford_decomposition(name, params):
+                    getattr(state, gate)(*qubits)
+            self.simulator.statevector()[0] = state.to_statevector()
+            operations = operations[prefix:]
+
+        for operation in operations:
+            kind, condition = operation[0], operation[-1]
+            rows = self._rows(condition)
+            if rows is not None and not rows.any():
+                continue
+            if kind == "gate":
+                _, name, params, qubits, _ = operation
+                self._resolve(qubits=qubits)
+                self._apply(name, params, qubits, rows)
+            elif kind == "reset":
+                qubit = operation[1]
+                self._resolve(qubits=[qubit])
+                self._collapse(qubit, reset=True, rows=rows)
+            else:
+                _, qubit, clbit, _ = operation
+                self._resolve(clbits=[clbit] if clbit in self.pending else [])
+                if rows is None:
+                    self.pending[clbit] = qubit
+                else:
+                    self._resolve(qubits=[qubit])
+                    self._collapse(qubit, [clbit], rows=rows)
+
+        num_qubits = self.program.num_qubits
+        pending = self.pending if self.program.measured else {qubit: qubit for qubit in range(num_qubits)}
+        if not pending:
+            values, inverse = np.unique(self.clbits, return_inverse=True)
+            return values, np.bincount(inverse, weights=self.weights)
+
+        index = np.arange(2 ** num_qubits)
+        mapped = np.zeros(2 ** num_qubits, dtype=np.int64)
+        for clbit, qubit in pending.items():
+            mapped |= ((index >> qubit) & 1) << clbit
+        mask = sum(1 << clbit for clbit in pending)
+        values = ((self.clbits[:, None] & ~mask) | mapped).ravel()
+        probabilities = (self.simulator.probabilities() * self.weights[:, None]).ravel()
+        num_values = int(values.max()) + 1
+        if num_values <= 4 * len(values):
+            totals = np.bincount(values, weights=probabilities, minlength=num_values)
+            values = np.flatnonzero(totals > _NEGLIGIBLE)
+            return values, totals[values]
+        values, inverse = np.unique(values, return_inverse=True)
+        totals = np.bincount(inverse, weights=probabilities)
+        keep = totals > _NEGLIGIBLE
+        return values[keep], totals[keep]
+
+
+class QasmRunner:
+    """
+    Runs QASM files with fixed settings and returns JSON-ready records:
+    exact probabilities, or counts when shots is set, limited to the top
+    most likely outcomes when top is set. A file that cannot be read,
+    parsed or simulated gives a record with an "error" message instead.
+    Also the per-worker context of a WorkerPool.
+    """
+
+    def __init__(self, shots=None, top=None, max_amplitudes=2 ** 27):
+        self.shots = shots
+        self.top = top
+        self.max_amplitudes = max_amplitudes
+
+    def run(self, path, seed=None):
+        start = time.perf_counter()
+        try:
+            program = QasmProgram.from_file(path)
+            if self.shots is None:
+                key, (values, weights) = "probabilities", program.distribution(self.max_amplitudes)
+            else:
+                key, (values, weights) = "counts", program.sample(self.shots, seed, self.max_amplitudes)
+        except (OSError, ValueError, MemoryError) as error:
+            return {"path": str(path), "error": str(error)}
+
+        record = {"path": str(path), "num_qubits": program.num_qubits, "num_clbits": program.num_clbits,
+                  "engine": "stabilizer" if program.clifford else "statevector", "num_outcomes": len(values)}
+        if self.top is not None and len(values) > self.top:
+            order = np.argsort(-weights, kind="stable")[:self.top]
+            values, weights = values[order], weights[order]
+        record[key] = dict(zip(program.format_outcomes(values), weights.tolist()))
+        record["seconds"] = time.perf_counter() - start
+        return record
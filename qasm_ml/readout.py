@@ -0,0 +1,268 @@
+import numpy as np
+
+READOUTS = ("qubit", "basis", "parity")
+
+# Set bits of every byte value, so popcount is one table lookup per byte
+_BYTE_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+
+
+def qubit_marginals(distribution, num_qubits, num_marginals=None):
+    """
+    Return P(|1>) of qubits 0..num_marginals-1 (default: all) from |psi|^2
+    of shape (2**n,) or (batch, 2**n), as an array of shape
+    (..., num_marginals).
+
+    Qubits above the last requested one are summed out in a single
+    reshape. The rest are read from the most significant down: qubit q's
+    marginal is taken from the (2, 2**q) split of what is left, which is
+    then folded in half. The whole readout touches about 2**n + 4 * 2**m
+    values instead of 2**n per qubit.
+    """
+    distribution = np.asarray(distribution)
+    num_marginals = num_qubits if num_marginals is None else num_marginals
+    num_kept = min(num_marginals, num_qubits)
+    batch_shape = distribution.shape[:-1]
+
+    marginals = np.zeros(batch_shape + (num_marginals,), dtype=np.result_type(distribution, np.float32))
+    flat_marginals = marginals.reshape(-1, num_marginals)
+    # Accumulate in double precision: single-precision sums over 2**n terms drift
+    remaining = distribution.reshape(-1, 2 ** (num_qubits - num_kept), 2 ** num_kept).sum(axis=1, dtype=np.float64)
+    for qubit in reversed(range(num_kept)):
+        split = remaining.reshape(len(remaining), 2, 2 ** qubit)
+        flat_marginals[:, qubit] = split[:, 1].sum(axis=1)
+        remaining = split[:, 0] + split[:, 1]
+    return marginals
+
+
+def popcount(values):
+    """
+    Number of set bits of each non-negative integer in values
+    """
+    values = np.array(values, dtype=np.int64)
+    counts = np.zeros(values.shape, dtype=np.int64)
+    while np.any(values):
+        counts += _BYTE_POPCOUNT[values & 0xFF]
+        values >>= 8
+    return counts
+
+
+class Readout:
+    """
+    Linear map from the output distribution |psi|^2 to num_outputs class
+    probabilities. Calling a readout maps distributions of shape (2**n,)
+    or (batch, 2**n) to (..., num_outputs). ``matrix`` is the equivalent
+    dense (2**n, num_outputs) map, and ``distribution_gradient`` applies
+    its transpose, turning dL/doutputs into the dL/d|psi|^2 that
+    AdjointDifferentiator expects.
+    """
+
+    def __init__(self, num_qubits, num_outputs):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+        if num_outputs < 1:
+            raise ValueError("Number of outputs must be positive")
+        self.num_qubits = num_qubits
+        self.num_outputs = num_outputs
+        self._matrix = None
+
+    def __call__(self, distribution):
+        return np.asarray(distribution) @ self.matrix
+
+    def probabilities(self, statevector):
+        """
+        Read out a statevector: a NumPy array (one or a batch) or a Qiskit
+        Statevector
+        """
+        return self(np.abs(np.asarray(statevector)) ** 2)
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            self._matrix = self.build_matrix()
+        return self._matrix
+
+    def build_matrix(self):
+        raise NotImplementedError
+
+    def distribution_gradient(self, output_gradient):
+        return np.asarray(output_gradient) @ self.matrix.T
+
+
+class LinearReadout(Readout):
+    """
+    Arbitrary readout given as a (2**n, num_outputs) weight matrix
+    """
+
+    def __init__(self, matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        if matrix.ndim != 2 or matrix.shape[0] & (matrix.shape[0] - 1):
+            raise ValueError("Readout matrix must have shape (2**num_qubits, num_outputs)")
+        super().__init__(matrix.shape[0].bit_length() - 1, matrix.shape[1])
+        self._matrix = matrix
+
+
+class QubitReadout(Readout):
+    """
+    Output i is P(|1>) of qubits[i], by default qubit i. Outputs beyond the
+    listed qubits are always zero.
+    """
+
+    def __init__(self, num_qubits, num_outputs, qubits=None):
+        super().__init__(num_qubits, num_outputs)
+        if qubits is None:
+            qubits = range(min(num_outputs, num_qubits))
+        self.qubits = np.array(qubits, dtype=int)
+        if len(self.qubits) > num_outputs:
+            raise ValueError(f"Readout of {len(self.qubits)} qubits does not fit in {num_outputs} outputs")
+        if np.any((self.qubits < 0) | (self.qubits >= num_qubits)):
+            raise ValueError(f"Readout qubits {self.qubits.tolist()} out of range for {num_qubits} qubits")
+        # The default layout reads qubit i into output i, so no reordering is needed
+        self._in_order = np.array_equal(self.qubits, np.arange(min(num_outputs, num_qubits)))
+
+    def __call__(self, distribution):
+        if not len(self.qubits):
+            return np.zeros(np.shape(distribution)[:-1] + (self.num_outputs,))
+        if self._in_order:
+            return qubit_marginals(distribution, self.num_qubits, self.num_outputs)
+        return self.from_marginals(qubit_marginals(distribution, self.num_qubits, self.num_marginals))
+
+    @property
+    def num_marginals(self):
+        # Marginals of qubits 0..num_marginals-1 cover every read qubit
+        return int(self.qubits.max()) + 1 if len(self.qubits) else 0
+
+    def from_marginals(self, marginals):
+        """
+        Outputs from P(|1>) of qubits 0..num_marginals-1 (or more), shape
+        (..., k), for engines that compute marginals without the full
+        distribution
+        """
+        marginals = np.asarray(marginals)
+        outputs = np.zeros(marginals.shape[:-1] + (self.num_outputs,), dtype=np.result_type(marginals, np.float32))
+        outputs[..., :len(self.qubits)] = marginals[..., self.qubits]
+        return outputs
+
+    def build_matrix(self):
+        matrix = np.zeros((2 ** self.num_qubits, self.num_outputs))
+        matrix[:, :len(self.qubits)] = (np.arange(2 ** self.num_qubits)[:, None] >> self.qubits) & 1
+        return matrix
+
+
+class MappedReadout(Readout):
+    """
+    Each basis state feeds exactly one output, or none. ``mapping`` is an
+    integer array of length 2**n giving the output of every basis state
+    (-1 to ignore it), or a function computing that array from the basis
+    state indices. num_outputs defaults to the largest output plus one.
+    """
+
+    def __init__(self, num_qubits, mapping, num_outputs=None):
+        if callable(mapping):
+            mapping = mapping(np.arange(2 ** num_qubits))
+        mapping = np.asarray(mapping, dtype=int)
+        if mapping.shape != (2 ** num_qubits,):
+            raise ValueError(f"Readout mapping must have one entry per basis state ({2 ** num_qubits})")
+        num_outputs = int(mapping.max()) + 1 if num_outputs is None else num_outputs
+        if mapping.min() < -1 or mapping.max() >= num_outputs:
+            raise ValueError(f"Readout mapping entries must lie in [-1, {num_outputs})")
+        super().__init__(num_qubits, num_outputs)
+        self.mapping = mapping
+
+        # Sorting the basis states by output turns the readout into one reduceat pass
+        self._order = np.argsort(mapping, kind="stable")
+        outputs, starts = np.unique(mapping[self._order], return_index=True)
+        used = outputs >= 0
+        self._outputs, self._starts = outputs[used], starts[used]
+
+    def __call__(self, distribution):
+        distribution = np.asarray(distribution)
+        flat = distribution.reshape(-1, 2 ** self.num_qubits)
+        outputs = np.zeros((len(flat), self.num_outputs), dtype=np.result_type(distribution, np.float32))
+        if len(self._outputs):
+            # Ignored states sort first, so the groups from the first used start on are exactly the outputs
+            grouped = flat[:, self._order[self._starts[0]:]]
+            outputs[:, self._outputs] = np.add.reduceat(grouped, self._starts - self._starts[0], axis=1,
+                                                        dtype=np.float64)
+        return outputs.reshape(distribution.shape[:-1] + (self.num_outputs,))
+
+    def build_matrix(self):
+        matrix = np.zeros((2 ** self.num_qubits, self.num_outputs))
+        used = self.mapping >= 0
+        matrix[np.flatnonzero(used), self.mapping[used]] = 1
+        return matrix
+
+    def distribution_gradient(self, output_gradient):
+        output_gradient = np.asarray(output_gradient)
+        # The appended zero column is what ignored (-1) states pick up
+        padded = np.concatenate([output_gradient, np.zeros(output_gradient.shape[:-1] + (1,))], axis=-1)
+        return padded[..., self.mapping]
+
+
+class BasisReadout(MappedReadout):
+    """
+    Output i is the probability of basis state |i>
+    """
+
+    def __init__(self, num_qubits, num_outputs):
+        if num_outputs > 2 ** num_qubits:
+            raise ValueError(f"{num_qubits} qubits have only {2 ** num_qubits} basis states")
+        mapping = np.arange(2 ** num_qubits)
+        mapping[num_outputs:] = -1
+        super().__init__(num_qubits, mapping, num_outputs)
+
+    def __call__(self, distribution):
+        return np.array(np.asarray(distribution)[..., :self.num_outputs])
+
+    def probabilities(self, statevector):
+        # Only the first num_outputs amplitudes are needed
+        return np.abs(np.asarray(statevector)[..., :self.num_outputs]) ** 2
+
+
+class ParityReadout(MappedReadout):
+    """
+    Basis state |j> feeds output popcount(j) mod num_outputs; with two
+    outputs these are the even and odd parity probabilities
+    """
+
+    def __init__(self, num_qubits, num_outputs=2):
+        super().__init__(num_qubits, lambda states: popcount(states) % num_outputs, num_outputs)
+
+
+class HammingWeightReadout(MappedReadout):
+    """
+    Output i is the probability of measuring a Hamming weight (number of
+    1s) in buckets[i], an inclusive (min_weight, max_weight) range where
+    max_weight None means no upper limit. Buckets must not overlap, and
+    weights outside every bucket are ignored.
+    """
+
+    def __init__(self, num_qubits, buckets):
+        self.buckets = [(int(low), None if high is None else int(high)) for low, high in buckets]
+        bucket_of_weight = np.full(num_qubits + 1, -1)
+        for i, (low, high) in enumerate(self.buckets):
+            if low < 0 or (high is not None and high < low):
+                raise ValueError(f"Invalid Hamming weight bucket ({low}, {high})")
+            weights = slice(low, num_qubits + 1 if high is None else high + 1)
+            if np.any(bucket_of_weight[weights] >= 0):
+                raise ValueError(f"Hamming weight bucket ({low}, {high}) overlaps an earlier bucket")
+            bucket_of_weight[weights] = i
+        super().__init__(num_qubits, lambda states: bucket_of_weight[popcount(states)], len(self.buckets))
+
+
+def get_readout(readout, num_qubits, num_outputs):
+    """
+    Return a Readout from an instance, which must match num_qubits and
+    num_outputs, or from one of the strategy names in READOUTS
+    """
+    if isinstance(readout, Readout):
+        if (readout.num_qubits, readout.num_outputs) != (num_qubits, num_outputs):
+            raise ValueError(f"Readout maps {readout.num_qubits} qubits to {readout.num_outputs} outputs, "
+                             f"expected {num_qubits} qubits and {num_outputs} outputs")
+        return readout
+    if readout == "qubit":
+        return QubitReadout(num_qubits, num_outputs)
+    if readout == "basis":
+        return BasisReadout(num_qubits, num_outputs)
+    if readout == "parity":
+        return ParityReadout(num_qubits, num_outputs)
+    raise ValueError(f"Unknown readout '{readout}', expected one of {READOUTS} or a Readout instance")
@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+
+SCALER_VERSION = 1
+
+
+class FeatureScaler:
+    """
+    Min-max feature scaling in pure NumPy, fitted once and then reused.
+
+    ``fit`` learns the data range from a reference dataset, or
+    ``partial_fit`` accumulates it over chunks that arrive one at a time;
+    ``transform`` then maps any sample or batch from that range onto
+    feature_range with the same parameters, so every sample is encoded
+    consistently. With per_feature (the default) every column gets its own
+    range, otherwise one range covers all values. Constant features map
+    to the lower end of feature_range, and clip keeps unseen values
+    outside the fitted range inside feature_range.
+
+    ``save`` and ``load`` persist the fitted parameters as a small .npz
+    file that loads without pickle.
+    """
+
+    def __init__(self, feature_range=(0.0, 1.0), per_feature=True, clip=False):
+        low, high = feature_range
+        if not low < high:
+            raise ValueError(f"Invalid feature range ({low}, {high}), the minimum must be below the maximum")
+        self.feature_range = (float(low), float(high))
+        self.per_feature = per_feature
+        self.clip = clip
+        self.data_min = None
+        self.data_max = None
+        self.num_samples = 0
+
+    @property
+    def fitted(self):
+        return self.data_min is not None
+
+    def fit(self, data):
+        """
+        Fit the range of data, shape (samples, features), from scratch
+        """
+        self.data_min = self.data_max = None
+        self.num_samples = 0
+        return self.partial_fit(data)
+
+    def partial_fit(self, data):
+        """
+        Widen the fitted range to cover another chunk of samples
+        """
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 2 or not len(data):
+            raise ValueError("Scaler data must be a non-empty 2-dimensional (samples, features) array")
+        axis = 0 if self.per_feature else None
+        chunk_min, chunk_max = data.min(axis=axis), data.max(axis=axis)
+        if self.fitted:
+            if np.shape(chunk_min) != np.shape(self.data_min):
+                raise ValueError(f"Scaler was fitted on {np.size(self.data_min)} features, got {np.size(chunk_min)}")
+            chunk_min = np.minimum(self.data_min, chunk_min)
+            chunk_max = np.maximum(self.data_max, chunk_max)
+        self.data_min, self.data_max = chunk_min, chunk_max
+        self.num_samples += len(data)
+        self._update_transform()
+        return self
+
+    def _update_transform(self):
+        # transform(x) = x * scale + offset; constant features keep a scale of 1 like scikit-learn
+        low, high = self.feature_range
+        data_range = self.data_max - self.data_min
+        self._scale = (high - low) / np.where(data_range == 0, 1.0, data_range)
+        self._offset = low - self.data_min * self._scale
+
+    def transform(self, data):
+        """
+        Scale one sample or a (samples, features) batch
+        """
+        if not self.fitted:
+            raise ValueError("Scaler must be fitted before transforming data")
+        scaled = np.asarray(data, dtype=float) * self._scale + self._offset
+        if self.clip:
+            np.clip(scaled, *self.feature_range, out=scaled)
+        return scaled
+
+    def fit_transform(self, data):
+        return self.fit(data).transform(data)
+
+    def inverse_transform(self, scaled):
+        if not self.fitted:
+            raise ValueError("Scaler must be fitted before transforming data")
+        return (np.asarray(scaled, dtype=float) - self._offset) / self._scale
+
+    def save(self, path):
+        if not self.fitted:
+            raise ValueError("Only a fitted scaler can be saved")
+        metadata = {
+            "version": SCALER_VERSION,
+            "feature_range": list(self.feature_range),
+            "per_feature": self.per_feature,
+            "clip": self.clip,
+            "num_samples": self.num_samples,
+        }
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), data_min=self.data_min, data_max=self.data_max)
+        os.replace(temporary_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(data["metadata"].item())
+            if metadata["version"] != SCALER_VERSION:
+                raise ValueError(f"Unsupported scaler version {metadata['version']} in {path}")
+            scaler = cls(metadata["feature_range"], metadata["per_feature"], metadata["clip"])
+            scaler.data_min, scaler.data_max = data["data_min"], data["data_max"]
+        scaler.num_samples = metadata["num_samples"]
+        scaler._update_transform()
+        return scaler
+
+
+def normalize_and_scale(data, scaler=None):
+    """
+    Scale data onto [0, 2π] with a fitted FeatureScaler; without one the
+    range is fitted on data itself
+    """
+    if scaler is None:
+        scaler = FeatureScaler(feature_range=(0, 2 * np.pi), per_feature=False).fit(np.atleast_2d(data))
+    return scaler.transform(data)
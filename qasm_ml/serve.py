@@ -0,0 +1,148 @@
+"""
+Inference service for models saved with TrainedModel.save.
+
+The model is loaded once; every request is then one batched simulator
+call on preallocated registers.
+
+    python -m qasm_ml.serve model.npz                    # JSON lines on stdin, one response line each
+    python -m qasm_ml.serve model.npz --input rows.csv   # score a .npy or delimited file in batches
+    python -m qasm_ml.serve model.npz --port 8000        # HTTP: POST /predict, GET /health
+
+A request is one sample ([0.1, 0.5, ...]), a batch of samples
+([[...], [...]]) or an object {"inputs": ..., "id": ...}; the response
+holds "probabilities" and "classes" of the same shape, the echoed "id",
+or an "error" message. Raw inputs are scaled by the model's scaler.
+"""
+import argparse
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+from .model import TrainedModel
+from .statevector import PRECISIONS
+
+
+def handle_request(model, request, batch_size=1024):
+    """
+    Answer one decoded JSON request, see the module docstring
+    """
+    response = {}
+    if isinstance(request, dict):
+        if "id" in request:
+            response["id"] = request["id"]
+        request = request.get("inputs")
+    try:
+        probabilities = model.predict(model.validate(request), batch_size)
+    except (TypeError, ValueError) as error:
+        response["error"] = str(error)
+        return response
+    classes = np.argmax(probabilities, axis=-1)
+    response["probabilities"] = probabilities.tolist()
+    response["classes"] = (classes.tolist() if model.class_names is None
+                           else np.asarray(model.class_names)[classes].tolist())
+    return response
+
+
+def serve_lines(model, lines, output, batch_size=1024):
+    """
+    Answer JSON requests read line by line, flushing every response so a
+    client can pipe requests through a long-running process
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            response = {"error": f"Invalid JSON: {error}"}
+        else:
+            response = handle_request(model, request, batch_size)
+        output.write(json.dumps(response) + "\n")
+        output.flush()
+
+
+def score_file(model, path, output, batch_size=1024, delimiter=",", skip_header=0):
+    """
+    Write one line of class probabilities per row of a .npy or delimited
+    text file, reading it batch_size rows at a time
+    """
+    for probabilities in model.predict_stream(path, batch_size, delimiter, skip_header):
+        np.savetxt(output, probabilities, delimiter=delimiter)
+
+
+def make_handler(model, batch_size=1024):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def _respond(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._respond(404, {"error": f"Unknown path {self.path}"})
+                return
+            self._respond(200, {"status": "ok", "num_features": model.num_features,
+                                "max_features": model.network.num_qubits,
+                                "num_classes": model.network.num_classes, "class_names": model.class_names})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._respond(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except json.JSONDecodeError as error:
+                self._respond(400, {"error": f"Invalid JSON: {error}"})
+                return
+            response = handle_request(model, request, batch_size)
+            self._respond(400 if "error" in response else 200, response)
+
+        def log_message(self, format, *args):
+            # Keep stdout and stderr quiet per request
+            pass
+
+    return PredictionHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("model", help="model file written by TrainedModel.save")
+    parser.add_argument("--input", help="score a .npy or delimited text file instead of reading requests")
+    parser.add_argument("--output", help="write file scores here instead of stdout")
+    parser.add_argument("--delimiter", default=",", help="column delimiter of --input text files and --output")
+    parser.add_argument("--skip-header", type=int, default=0, help="leading lines of --input text files to skip")
+    parser.add_argument("--port", type=int, help="serve HTTP requests on this port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--batch-size", type=int, default=1024, help="rows per simulator call")
+    parser.add_argument("--backend", help="override the simulation backend stored in the model")
+    parser.add_argument("--precision", choices=PRECISIONS, help="override the simulation precision stored in the model")
+    args = parser.parse_args(argv)
+
+    model = TrainedModel.load(args.model, backend=args.backend, precision=args.precision)
+    if args.input:
+        if args.output:
+            with open(args.output, "w") as output:
+                score_file(model, args.input, output, args.batch_size, args.delimiter, args.skip_header)
+        else:
+            score_file(model, args.input, sys.stdout, args.batch_size, args.delimiter, args.skip_header)
+    elif args.port is not None:
+        server = HTTPServer((args.host, args.port), make_handler(model, args.batch_size))
+        print(f"Serving {args.model} on http://{args.host}:{server.server_port}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        serve_lines(model, sys.stdin, sys.stdout, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import numpy as np
+
+from .readout import _BYTE_POPCOUNT, popcount
+
+
+class StabilizerState:
+    """
+    Stabilizer simulator for Clifford circuits on the Aaronson-Gottesman
+    tableau: rows 0..n-1 hold the destabilizers and rows n..2n-1 the
+    stabilizers of the state as X and Z bit masks plus a sign. A gate
+    updates O(num_qubits) bits and a measurement O(num_qubits**2), so
+    memory grows with num_qubits**2 instead of 2**num_qubits amplitudes.
+    Gates use the StatevectorSimulator (and Qiskit) names and argument
+    order.
+
+    Random measurement outcomes are not sampled. Each one becomes a new
+    free bit, and every sign is kept as an affine function of the free
+    bits over GF(2): a boolean vector [constant, bit 1, bit 2, ...].
+    ``measure`` returns such a vector, so the outcomes of a whole circuit
+    describe its exact distribution, uniform over the free bits; see
+    ``affine_outcomes`` and ``sample_affine_outcomes``.
+    """
+
+    def __init__(self, num_qubits):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+
+        self.num_qubits = num_qubits
+        num_rows = 2 * num_qubits
+        self.x_bits = np.zeros((num_rows, num_qubits), dtype=bool)
+        self.z_bits = np.zeros((num_rows, num_qubits), dtype=bool)
+        diagonal = np.arange(num_qubits)
+        self.x_bits[diagonal, diagonal] = True
+        self.z_bits[num_qubits + diagonal, diagonal] = True
+        # Sign columns: the constant, then one per free bit; grown by doubling
+        self._signs = np.zeros((num_rows, 8), dtype=bool)
+        self.num_variables = 0
+
+    @property
+    def signs(self):
+        return self._signs[:, :self.num_variables + 1]
+
+    def copy(self):
+        state = object.__new__(type(self))
+        state.num_qubits, state.num_variables = self.num_qubits, self.num_variables
+        state.x_bits, state.z_bits, state._signs = self.x_bits.copy(), self.z_bits.copy(), self._signs.copy()
+        return state
+
+    def _validate_qubit(self, qubit):
+        if not 0 <= qubit < self.num_qubits:
+            raise ValueError(f"Qubit index {qubit} out of range for {self.num_qubits} qubits")
+
+    def h(self, qubit):
+        self._validate_qubit(qubit)
+        x, z = self.x_bits[:, qubit], self.z_bits[:, qubit]
+        self._signs[:, 0] ^= x & z
+        saved_x = x.copy()
+        x[:] = z
+        z[:] = saved_x
+        return self
+
+    def s(self, qubit):
+        self._validate_qubit(qubit)
+        x, z = self.x_bits[:, qubit], self.z_bits[:, qubit]
+        self._signs[:, 0] ^= x & z
+        z ^= x
+        return self
+
+    def sdg(self, qubit):
+        self._validate_qubit(qubit)
+        x, z = self.x_bits[:, qubit], self.z_bits[:, qubit]
+        self._signs[:, 0] ^= x & ~z
+        z ^= x
+        return self
+
+    def x(self, qubit):
+        self._validate_qubit(qubit)
+        self._signs[:, 0] ^= self.z_bits[:, qubit]
+        return self
+
+    def y(self, qubit):
+        self._validate_qubit(qubit)
+        self._signs[:, 0] ^= self.x_bits[:, qubit] ^ self.z_bits[:, qubit]
+        return self
+
+    def z(self, qubit):
+        self._validate_qubit(qubit)
+        self._signs[:, 0] ^= self.x_bits[:, qubit]
+        return self
+
+    def sx(self, qubit):
+        return self.h(qubit).s(qubit).h(qubit)
+
+    def sxdg(self, qubit):
+        return self.h(qubit).sdg(qubit).h(qubit)
+
+    def cx(self, control, target):
+        self._validate_qubit(control)
+        self._validate_qubit(target)
+        if control == target:
+            raise ValueError("Control and target qubits must differ")
+        x_control, z_control = self.x_bits[:, control], self.z_bits[:, control]
+        x_target, z_target = self.x_bits[:, target], self.z_bits[:, target]
+        self._signs[:, 0] ^= x_control & z_target & ~(x_target ^ z_control)
+        x_target ^= x_control
+        z_control ^= z_target
+        return self
+
+    def cz(self, control, target):
+        return self.h(target).cx(control, target).h(target)
+
+    def cy(self, control, target):
+        return self.sdg(target).cx(control, target).s(target)
+
+    def swap(self, first, second):
+        return self.cx(first, second).cx(second, first).cx(first, second)
+
+    @staticmethod
+    def _product_exponent(x1, z1, x2, z2, axis=None):
+        # Power of i picked up when multiplying Pauli (x2, z2) by (x1, z1),
+        # summed over qubits (the g function of Aaronson and Gottesman):
+        # Y*Z, X*Y, Z*X give +1 and the reverse orders -1. Inputs are bit
+        # masks packed with np.packbits; every term is masked by a factor
+        # of the first Pauli, so the zero padding never counts.
+        y1, x_only, z_only = x1 & z1, x1 & ~z1, z1 & ~x1
+        y2, x2_only, z2_only = x2 & z2, x2 & ~z2, z2 & ~x2
+        # At most one term holds per qubit, so each sign is a single popcount
+        positive = (y1 & z2_only) | (x_only & y2) | (z_only & x2_only)
+        negative = (y1 & x2_only) | (x_only & z2_only) | (z_only & y2)
+        if axis is None:
+            return np.count_nonzero(np.unpackbits(positive)) - np.count_nonzero(np.unpackbits(negative))
+        return _BYTE_POPCOUNT[positive].sum(axis=axis) - _BYTE_POPCOUNT[negative].sum(axis=axis)
+
+    def _rowsum(self, targets, source):
+        # Multiply the target rows by the source row; the power of i is
+        # always 0 or 2 mod 4, a sign flip
+        x1, z1 = self.x_bits[source], self.z_bits[source]
+        packed = [np.packbits(bits, axis=-1) for bits in (x1, z1, self.x_bits[targets], self.z_bits[targets])]
+        self._signs[targets] ^= self._signs[source]
+        self._signs[targets, 0] ^= self._product_exponent(*packed, axis=-1) % 4 == 2
+        self.x_bits[targets] ^= x1
+        self.z_bits[targets] ^= z1
+
+    def _new_variable(self):
+        self.num_variables += 1
+        if self.num_variables == self._signs.shape[1]:
+            self._signs = np.concatenate([self._signs, np.zeros_like(self._signs)], axis=1)
+        return self.num_variables
+
+    def measure(self, qubit):
+        """
+        Measure ``qubit`` in the Z basis and return the outcome as an
+        affine vector over the free bits: a random outcome is a new free
+        bit, a determined one a combination of earlier ones
+        """
+        self._validate_qubit(qubit)
+        n = self.num_qubits
+        column = self.x_bits[:2 * n, qubit]
+        anticommuting = np.flatnonzero(column[n:])
+        if len(anticommuting):
+            pivot = n + anticommuting[0]
+            others = np.flatnonzero(column)
+            others = others[others != pivot]
+            if len(others):
+                self._rowsum(others, pivot)
+            # The destabilizer takes the old stabilizer; the new one is +-Z
+            for table in (self.x_bits, self.z_bits, self._signs):
+                table[pivot - n] = table[pivot]
+            variable = self._new_variable()
+            self.x_bits[pivot], self.z_bits[pivot], self._signs[pivot] = False, False, False
+            self.z_bits[pivot, qubit] = True
+            self._signs[pivot, variable] = True
+            return self.signs[pivot].copy()
+
+        # Determined: +-Z is the product of the stabilizers paired with the
+        # destabilizers that anticommute with it. Multiply them in order
+        # with one vectorized pass; each partial product is Hermitian, so
+        # the step exponents can be summed before taking them mod 4.
+        rows = n + np.flatnonzero(column[:n])
+        x_rows, z_rows = np.packbits(self.x_bits[rows], axis=-1), np.packbits(self.z_bits[rows], axis=-1)
+        x_before = np.bitwise_xor.accumulate(x_rows[:-1], axis=0)
+        z_before = np.bitwise_xor.accumulate(z_rows[:-1], axis=0)
+        exponent = self._product_exponent(x_rows[1:], z_rows[1:], x_before, z_before)
+        outcome = np.logical_xor.reduce(self.signs[rows], axis=0)
+        outcome[0] ^= exponent % 4 == 2
+        return outcome
+
+    def reset(self, qubit):
+        """
+        Measure ``qubit`` and flip it back to |0> where the outcome is 1
+        """
+        outcome = self.measure(qubit)
+        self.signs[...] ^= self.z_bits[:, qubit, None] & outcome
+        return self
+
+    def to_statevector(self):
+        """
+        Dense amplitudes in Qiskit's ordering, up to global phase, for a
+        state without free bits. Costs one pass over the 2**num_qubits
+        amplitudes per stabilizer with an independent X part.
+        """
+        if self.num_variables:
+            raise ValueError("State depends on random measurement outcomes")
+        n = self.num_qubits
+        # A basis state with nonzero amplitude: the outcomes of measuring
+        # every qubit with the free bits set to 0
+        probe = self.copy()
+        start = sum(int(probe.measure(qubit)[0]) << qubit for qubit in range(n))
+
+        # Row-reduce the stabilizers on their X parts; the rows without
+        # one are diagonal and already satisfied by the start state
+        state, rank = self.copy(), 0
+        for qubit in range(n):
+            candidates = np.flatnonzero(state.x_bits[n + rank:2 * n, qubit])
+            if not len(candidates):
+                continue
+            pivot, row = n + rank + candidates[0], n + rank
+            for table in (state.x_bits, state.z_bits, state._signs):
+                table[[row, pivot]] = table[[pivot, row]]
+            others = n + np.flatnonzero(state.x_bits[n:2 * n, qubit])
+            others = others[others != row]
+            if len(others):
+                state._rowsum(others, row)
+            rank += 1
+
+        # Project |start> with (I + g) for each of those stabilizers g
+        indices = np.arange(2 ** n)
+        amplitudes = np.zeros(2 ** n, dtype=complex)
+        amplitudes[start] = 1
+        weights = 1 << np.arange(n)
+        permuted = np.empty_like(amplitudes)
+        for row in range(n, n + rank):
+            x_mask, z_mask = int(weights[state.x_bits[row]].sum()), int(weights[state.z_bits[row]].sum())
+            # g = (-1)**sign * i**(number of Y factors) * X**x * Z**z
+            phase = (-1) ** int(state._signs[row, 0]) * 1j ** bin(x_mask & z_mask).count("1")
+            permuted[indices ^ x_mask] = (1 - 2 * (popcount(indices & z_mask) & 1)) * amplitudes
+            amplitudes += phase * permuted
+        return amplitudes / np.linalg.norm(amplitudes)
+
+
+def _row_basis(rows):
+    # Independent rows spanning the same space over GF(2)
+    rows, rank = rows.copy(), 0
+    for column in range(rows.shape[1]):
+        if rank == len(rows):
+            break
+        candidates = np.flatnonzero(rows[rank:, column])
+        if not len(candidates):
+            continue
+        pivot = rank + candidates[0]
+        rows[[rank, pivot]] = rows[[pivot, rank]]
+        others = np.flatnonzero(rows[:, column])
+        rows[others[others != rank]] ^= rows[rank]
+        rank += 1
+    return rows[:rank]
+
+
+def affine_outcomes(forms, max_outcomes=2 ** 27):
+    """
+    Exact distribution of bits given as affine forms of uniformly random
+    free bits, shape (num_bits, 1 + num_variables) as returned by
+    ``StabilizerState.measure``. Returns (outcomes, probabilities) with
+    outcomes of shape (2**rank, num_bits), all equally likely.
+    """
+    forms = np.asarray(forms, dtype=bool)
+    basis = _row_basis(forms[:, 1:].T)
+    if 2 ** len(basis) > max_outcomes:
+        raise ValueError(f"Distribution has 2**{len(basis)} outcomes, more than {max_outcomes}; sample shots instead")
+    outcomes = np.empty((2 ** len(basis), len(forms)), dtype=bool)
+    outcomes[0] = forms[:, 0]
+    # Each basis vector doubles the outcomes found so far
+    for index, vector in enumerate(basis):
+        np.bitwise_xor(outcomes[:2 ** index], vector, out=outcomes[2 ** index:2 ** (index + 1)])
+    return outcomes, np.full(len(outcomes), 0.5 ** len(basis))
+
+
+def sample_affine_outcomes(forms, shots, rng=None):
+    """
+    Draw shots samples of the bits described by ``forms`` (see
+    ``affine_outcomes``) without enumerating the distribution. Returns
+    the distinct outcomes, shape (k, num_bits), and their counts.
+    """
+    forms = np.asarray(forms, dtype=bool)
+    rng = np.random.default_rng(rng)
+    # XOR of the forms' columns picked by each sample's free bits, as a
+    # float matrix product (exact while the sums stay below 2**24)
+    variables = rng.integers(0, 2, (shots, forms.shape[1] - 1)).astype(np.float32)
+    samples = forms[:, 0] ^ ((variables @ forms[:, 1:].T.astype(np.float32)) % 2 == 1)
+    # Deduplicate whole rows as packed byte strings
+    packed = np.packbits(samples, axis=1)
+    keys = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    return samples[first], counts
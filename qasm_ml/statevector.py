@@ -0,0 +1,382 @@
+import math
+
+import numpy as np
+
+_SQRT_HALF = math.sqrt(0.5)
+
+# Amplitude types of the native engine: complex64 halves memory and bandwidth
+PRECISIONS = ("complex128", "complex64")
+
+
+def precision_dtype(precision):
+    """
+    NumPy dtype of a name in PRECISIONS (or a complex dtype)
+    """
+    try:
+        dtype = np.dtype(precision)
+    except TypeError:
+        dtype = None
+    if dtype is None or dtype.name not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+    return dtype
+
+
+def gate_matrix(name, theta=None):
+    """
+    Return the H matrix, or the RX, RY or RZ matrix at theta, as
+    ((a, b), (c, d)); entries are arrays for per-sample angles
+    """
+    if name == "h":
+        return ((_SQRT_HALF, _SQRT_HALF), (_SQRT_HALF, -_SQRT_HALF))
+    if np.ndim(theta) == 0:
+        # Plain Python arithmetic is far cheaper than NumPy for scalars
+        cos, sin = math.cos(theta / 2), math.sin(theta / 2)
+    else:
+        cos, sin = np.cos(np.divide(theta, 2)), np.sin(np.divide(theta, 2))
+    if name == "rx":
+        return ((cos, -1j * sin), (-1j * sin, cos))
+    if name == "ry":
+        return ((cos, -sin), (sin, cos))
+    if name == "rz":
+        return ((cos - 1j * sin, 0), (0, cos + 1j * sin))
+    raise ValueError(f"Unknown single-qubit gate '{name}'")
+
+
+def multiply_matrices(left, right):
+    """
+    Product of two 2x2 matrices given as ((a, b), (c, d)) with scalar or
+    per-sample array entries
+    """
+    (a, b), (c, d) = left
+    (e, f), (g, h) = right
+    return ((a * e + b * g, a * f + b * h), (c * e + d * g, c * f + d * h))
+
+
+class ProductState:
+    """
+    Unentangled registers held as one 2-vector per qubit, shape
+    (num_qubits, 2) or (batch_size, num_qubits, 2), with the single-qubit
+    part of the StatevectorSimulator gate API. A gate touches two numbers
+    per sample instead of all 2**num_qubits amplitudes;
+    ``StatevectorSimulator.load_product_state`` expands the result.
+    """
+
+    def __init__(self, num_qubits, batch_size=None, precision="complex128"):
+        self.num_qubits = num_qubits
+        self.batch_size = batch_size
+        batch_shape = () if batch_size is None else (batch_size,)
+        self.qubit_states = np.zeros(batch_shape + (num_qubits, 2), dtype=precision_dtype(precision))
+        self.reset()
+
+    def reset(self):
+        self.qubit_states.fill(0)
+        self.qubit_states[..., 0] = 1
+        return self
+
+    def apply_single_qubit(self, matrix, qubit):
+        (a, b), (c, d) = matrix
+        zero, one = self.qubit_states[..., qubit, 0], self.qubit_states[..., qubit, 1]
+        zero, one = a * zero + b * one, c * zero + d * one
+        self.qubit_states[..., qubit, 0] = zero
+        self.qubit_states[..., qubit, 1] = one
+        return self
+
+    def rx(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("rx", theta), qubit)
+
+    def ry(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("ry", theta), qubit)
+
+    def rz(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("rz", theta), qubit)
+
+    def h(self, qubit):
+        return self.apply_single_qubit(gate_matrix("h"), qubit)
+
+    def rotations(self, run, qubit):
+        matrix = None
+        for name, theta in run:
+            gate = gate_matrix(name, theta)
+            matrix = gate if matrix is None else multiply_matrices(gate, matrix)
+        return self.apply_single_qubit(matrix, qubit)
+
+
+class StatevectorSimulator:
+    """
+    In-place NumPy statevector simulator for the H, rotation (RX, RY, RZ)
+    and CX/CZ circuits used by the QASMNeuralNetwork scripts.
+
+    Gates are exposed with the same names and argument order as Qiskit's
+    ``QuantumCircuit`` (``rx(theta, qubit)``, ``cx(control, target)``) so the
+    same circuit-building code can target either one. Amplitudes follow
+    Qiskit's little-endian ordering, so ``statevector()`` matches
+    ``Statevector.from_instruction`` for the same circuit.
+
+    With ``batch_size`` set, the simulator holds one register per sample in
+    an array of shape (batch_size, 2**num_qubits). Gate angles may then be
+    scalars (shared by every sample) or arrays of length batch_size.
+
+    ``precision`` is "complex128" or "complex64" (see PRECISIONS); gate
+    coefficients are cast to it, so single precision halves the memory
+    and the bandwidth of every gate. All buffers are allocated once: the
+    register, two half-size scratch buffers and, on the first fused
+    permutation, a second register that ``entangle`` gathers into before
+    the two swap roles, so ``state`` may change identity after one.
+    """
+
+    def __init__(self, num_qubits, batch_size=None, precision="complex128"):
+        if num_qubits < 1:
+            raise ValueError("Number of qubits must be positive")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Batch size must be positive")
+
+        self.num_qubits = num_qubits
+        self.batch_size = batch_size
+        self.dtype = precision_dtype(precision)
+        self._real_dtype = np.finfo(self.dtype).dtype
+        self._batch_shape = () if batch_size is None else (batch_size,)
+        # Axis k of the qubit tensor holds qubit num_qubits - 1 - k (little-endian).
+        self.state = np.zeros(self._batch_shape + (2,) * num_qubits, dtype=self.dtype)
+        half_size = math.prod(self._batch_shape) * 2 ** (num_qubits - 1)
+        self._scratch = np.empty(half_size, dtype=self.dtype)
+        self._scratch_product = np.empty(half_size, dtype=self.dtype)
+        # Views into the state and scratch buffers are built once per qubit
+        # (and per CX pair on first use) so gates never allocate.
+        self._single_qubit_views = [self._single_qubit_view(q) for q in range(num_qubits)]
+        self._cx_views = {}
+        # Double buffer: the register, and the one fused permutations gather
+        # into (allocated on first use), each with its own views
+        self._buffers = [self.state, None]
+        self._views = [(self._single_qubit_views, self._cx_views), None]
+        self._active = 0
+        # Fused CZ signs cast to the register precision, per block
+        self._phases = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Reset every register to |0...0> and return the simulator for chaining
+        """
+        self.state.fill(0)
+        self.state.reshape(-1, 2 ** self.num_qubits)[:, 0] = 1
+        return self
+
+    def load_product_state(self, qubit_states):
+        """
+        Set every register to the tensor product of per-qubit states, shape
+        batch + (num_qubits, 2) as held by ProductState. The product is
+        built from the most significant qubit down, writing about twice
+        the register size in total, which is cheaper than one gate.
+        """
+        rows = np.reshape(qubit_states, (-1, self.num_qubits, 2))
+        amplitudes = self.state.reshape(len(rows), -1)
+        if self.num_qubits == 1:
+            np.copyto(amplitudes, rows[:, 0])
+            return self
+        product = rows[:, -1]
+        for qubit in range(self.num_qubits - 2, 0, -1):
+            product = (product[:, :, None] * rows[:, qubit, None, :]).reshape(len(rows), -1)
+        np.multiply(product[:, :, None], rows[:, 0, None, :], out=amplitudes.reshape(len(rows), -1, 2))
+        return self
+
+    def _validate_qubit(self, qubit):
+        if not 0 <= qubit < self.num_qubits:
+            raise ValueError(f"Qubit index {qubit} out of range for {self.num_qubits} qubits")
+
+    def _slice(self, qubit_bits):
+        # Slices (not integer indices) keep every selection a writable view.
+        index = [slice(None)] * (len(self._batch_shape) + self.num_qubits)
+        for qubit, bit in qubit_bits:
+            index[-1 - qubit] = slice(bit, bit + 1)
+        return tuple(index)
+
+    def _buffer(self, buffer, shape):
+        return buffer[:math.prod(shape)].reshape(shape)
+
+    def _coefficient(self, value):
+        # Per-sample angles broadcast along the batch axis only, in the
+        # register precision; NumPy scalars become Python numbers so they
+        # never promote the register
+        if np.ndim(value) > 0:
+            value = np.asarray(value)
+            value = value.astype(self.dtype if np.iscomplexobj(value) else self._real_dtype, copy=False)
+            if self.batch_size is not None:
+                return np.reshape(value, (self.batch_size,) + (1,) * self.num_qubits)
+            return value
+        return value.item() if isinstance(value, (np.generic, np.ndarray)) else value
+
+    def _single_qubit_view(self, qubit):
+        zero = self.state[self._slice([(qubit, 0)])]
+        one = self.state[self._slice([(qubit, 1)])]
+        return (zero, one, self._buffer(self._scratch, zero.shape),
+                self._buffer(self._scratch_product, zero.shape))
+
+    def _cx_view(self, control, target):
+        self._validate_qubit(control)
+        self._validate_qubit(target)
+        if control == target:
+            raise ValueError("Control and target qubits must differ")
+
+        flip_zero = self.state[self._slice([(control, 1), (target, 0)])]
+        flip_one = self.state[self._slice([(control, 1), (target, 1)])]
+        return flip_zero, flip_one, self._buffer(self._scratch, flip_zero.shape)
+
+    def apply_single_qubit(self, matrix, qubit):
+        """
+        Apply the 2x2 ``matrix`` to ``qubit`` in place. Entries may be
+        scalars or, in batch mode, arrays with one value per sample.
+        """
+        self._validate_qubit(qubit)
+        (a, b), (c, d) = [[self._coefficient(entry) for entry in row] for row in matrix]
+        zero, one, saved_zero, product = self._single_qubit_views[qubit]
+
+        np.copyto(saved_zero, zero)
+        zero *= a
+        np.multiply(one, b, out=product)
+        zero += product
+        one *= d
+        np.multiply(saved_zero, c, out=product)
+        one += product
+        return self
+
+    def rx(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("rx", theta), qubit)
+
+    def ry(self, theta, qubit):
+        return self.apply_single_qubit(gate_matrix("ry", theta), qubit)
+
+    def h(self, qubit):
+        return self.apply_single_qubit(gate_matrix("h"), qubit)
+
+    def rz(self, theta, qubit):
+        self._validate_qubit(qubit)
+        zero, one, _, _ = self._single_qubit_views[qubit]
+        zero *= self._coefficient(np.exp(-0.5j * np.asarray(theta)))
+        one *= self._coefficient(np.exp(0.5j * np.asarray(theta)))
+        return self
+
+    def rotations(self, run, qubit):
+        """
+        Apply a run of (name, theta) single-qubit gates on one qubit as a
+        single 2x2 product; theta is ignored for H
+        """
+        matrix = None
+        for name, theta in run:
+            gate = gate_matrix(name, theta)
+            matrix = gate if matrix is None else multiply_matrices(gate, matrix)
+        return self.apply_single_qubit(matrix, qubit)
+
+    def x(self, qubit):
+        self._validate_qubit(qubit)
+        zero, one, saved_zero, _ = self._single_qubit_views[qubit]
+        np.copyto(saved_zero, zero)
+        np.copyto(zero, one)
+        np.copyto(one, saved_zero)
+        return self
+
+    def p(self, theta, qubit):
+        """
+        Phase gate diag(1, exp(i theta)); Z, S and T are fixed angles of it
+        """
+        self._validate_qubit(qubit)
+        one = self._single_qubit_views[qubit][1]
+        one *= self._coefficient(np.exp(1j * np.asarray(theta)))
+        return self
+
+    def cx(self, control, target):
+        views = self._cx_views.get((control, target))
+        if views is None:
+            views = self._cx_views[(control, target)] = self._cx_view(control, target)
+        flip_zero, flip_one, saved = views
+
+        np.copyto(saved, flip_zero)
+        np.copyto(flip_zero, flip_one)
+        np.copyto(flip_one, saved)
+        return self
+
+    def cz(self, control, target):
+        # Reuse the CX views: the |11> block is the flip_one slice
+        views = self._cx_views.get((control, target))
+        if views is None:
+            views = self._cx_views[(control, target)] = self._cx_view(control, target)
+        flip_one = views[1]
+        flip_one *= -1
+        return self
+
+    def apply_controlled(self, matrix, controls, target):
+        """
+        Apply the 2x2 ``matrix`` to ``target`` on the part of the register
+        where every control qubit is |1> (CH, CRZ, CCX, ...). Unlike the
+        named gates this allocates its temporaries.
+        """
+        qubits = tuple(controls) + (target,)
+        for qubit in qubits:
+            self._validate_qubit(qubit)
+        if len(set(qubits)) != len(qubits):
+            raise ValueError("Control and target qubits must differ")
+        (a, b), (c, d) = [[self._coefficient(entry) for entry in row] for row in matrix]
+        controlled = [(control, 1) for control in controls]
+        zero = self.state[self._slice(controlled + [(target, 0)])]
+        one = self.state[self._slice(controlled + [(target, 1)])]
+        saved_zero = zero.copy()
+        zero *= a
+        zero += b * one
+        one *= d
+        one += c * saved_zero
+        return self
+
+    def entangle(self, block):
+        """
+        Apply a fused EntanglingBlock: all of its CX gates as one basis
+        permutation and all of its CZ gates as one diagonal phase
+        """
+        if block.num_qubits != self.num_qubits:
+            raise ValueError(f"Entangling block acts on {block.num_qubits} qubits, simulator has {self.num_qubits}")
+        amplitudes = self.statevector()
+        if block.permutation is not None:
+            # Gather into the other buffer and make it the register: no copy back
+            if self._buffers[1 - self._active] is None:
+                self._buffers[1 - self._active] = np.empty_like(self.state)
+            permuted = self._buffers[1 - self._active]
+            np.take(amplitudes, block.permutation, axis=-1, out=permuted.reshape(amplitudes.shape))
+            self._use_buffer(1 - self._active)
+            amplitudes = self.statevector()
+        if block.phases is not None:
+            if block not in self._phases:
+                self._phases[block] = block.phases.astype(self._real_dtype)
+            amplitudes *= self._phases[block]
+        return self
+
+    def _use_buffer(self, index):
+        self._active = index
+        self.state = self._buffers[index]
+        if self._views[index] is None:
+            self._single_qubit_views = [self._single_qubit_view(q) for q in range(self.num_qubits)]
+            self._cx_views = {}
+            self._views[index] = (self._single_qubit_views, self._cx_views)
+        self._single_qubit_views, self._cx_views = self._views[index]
+
+    def statevector(self):
+        """
+        Return the amplitudes as a view of the internal buffer, flattened to
+        (2**num_qubits,) or (batch_size, 2**num_qubits). The view is
+        overwritten by the next ``reset``.
+        """
+        return self.state.reshape(self._batch_shape + (2 ** self.num_qubits,))
+
+    def probabilities(self, out=None):
+        """
+        |amplitudes|**2 in the matching real precision, written to ``out``
+        when given so repeated readouts can reuse one buffer
+        """
+        out = np.abs(self.statevector(), out=out)
+        return np.square(out, out=out)
+
+    def qubit_probabilities(self, qubit):
+        """
+        Return P(|1>) on ``qubit``, one value per sample in batch mode
+        """
+        self._validate_qubit(qubit)
+        distribution = np.abs(self.state) ** 2
+        qubit_axes = tuple(range(len(self._batch_shape), distribution.ndim))
+        return distribution[self._slice([(qubit, 1)])].sum(axis=qubit_axes)
@@ -0,0 +1,284 @@
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+
+import numpy as np
+
+# Phases charged by QASMNeuralNetwork and its backends while a PhaseTimer is attached
+PHASES = ("construction", "simulation", "readout", "gradient")
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+def phase(timer, name):
+    """
+    Context manager charging its block to ``name`` on timer, or doing
+    nothing when timer is None
+    """
+    return _NO_PHASE if timer is None else timer.phase(name)
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process in MiB, or None where the
+    resource module is unavailable (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class _Phase:
+    __slots__ = ("timer", "name")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer._push(self.name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer._pop()
+        return False
+
+
+class PhaseTimer:
+    """
+    Wall time per named phase. Phases nest, and time is charged to the
+    innermost active phase only, so the totals never double-count: the
+    simulations inside a shift-rule gradient count as "simulation", and
+    "gradient" keeps the adjoint sweeps and the remaining bookkeeping.
+    """
+
+    def __init__(self):
+        self._phases = {}
+        self._stack = []
+        self._started = None
+        self.totals = collections.defaultdict(float)
+
+    def reset(self):
+        """
+        Return the totals so far as {phase: seconds} and start again from zero
+        """
+        totals = dict(self.totals)
+        self.totals = collections.defaultdict(float)
+        return totals
+
+    def phase(self, name):
+        if name not in self._phases:
+            self._phases[name] = _Phase(self, name)
+        return self._phases[name]
+
+    def _push(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self.totals[self._stack[-1]] += now - self._started
+        self._stack.append(name)
+        self._started = now
+
+    def _pop(self):
+        now = time.perf_counter()
+        self.totals[self._stack.pop()] += now - self._started
+        self._started = now
+
+
+class Callback:
+    """
+    Hooks called by QASMNeuralNetwork.train_network; override any of them.
+
+    ``on_step_end`` receives one record per optimizer step: epoch, step,
+    batch_size, loss (before the step), gradient_norm (of the last
+    gradient the optimizer requested, None for gradient-free optimizers)
+    and seconds. ``on_epoch_end`` receives one record per epoch: epoch,
+    loss, validation_loss, best_loss, seconds, phases ({phase: seconds},
+    with "other" for time outside the instrumented phases) and
+    peak_memory_mb.
+    """
+
+    def on_train_begin(self, network, state):
+        pass
+
+    def on_epoch_begin(self, epoch):
+        pass
+
+    def on_step_end(self, record):
+        pass
+
+    def on_epoch_end(self, record):
+        pass
+
+    def on_train_end(self, state):
+        pass
+
+
+class History(Callback):
+    """
+    Keeps every epoch record, and with steps=True every step record, in
+    memory
+    """
+
+    def __init__(self, steps=False):
+        self.steps = steps
+        self.epochs = []
+        self.step_records = []
+
+    def on_step_end(self, record):
+        if self.steps:
+            self.step_records.append(record)
+
+    def on_epoch_end(self, record):
+        self.epochs.append(record)
+
+    def __getitem__(self, key):
+        """
+        One field of every epoch record, e.g. history["loss"]
+        """
+        return [record[key] for record in self.epochs]
+
+
+class JSONLinesLogger(Callback):
+    """
+    Appends one JSON object per epoch, and with steps=True per step, to
+    path. Each line carries a "type" of "epoch" or "step"; the file is
+    flushed after every epoch so it can be followed while training runs.
+    """
+
+    def __init__(self, path, steps=False):
+        self.path = path
+        self.steps = steps
+        self._file = None
+
+    def _write(self, kind, record):
+        self._file.write(json.dumps({"type": kind, **record}) + "\n")
+
+    def on_train_begin(self, network, state):
+        self._file = open(self.path, "a")
+
+    def on_step_end(self, record):
+        if self.steps:
+            self._write("step", record)
+
+    def on_epoch_end(self, record):
+        self._write("epoch", record)
+        self._file.flush()
+
+    def on_train_end(self, state):
+        self._file.close()
+        self._file = None
+
+
+class ProfileEpoch(Callback):
+    """
+    Runs cProfile over one chosen epoch. The statistics are kept as
+    ``stats`` (a pstats.Stats), written to path when given (load with
+    pstats or snakeviz), and the top `limit` functions by cumulative time
+    are printed when limit is set. Work done inside process-pool workers
+    is not captured.
+    """
+
+    def __init__(self, epoch=0, path=None, limit=20, sort="cumulative"):
+        self.epoch = epoch
+        self.path = path
+        self.limit = limit
+        self.sort = sort
+        self.stats = None
+        self._profiler = None
+
+    def on_epoch_begin(self, epoch):
+        if epoch == self.epoch:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def on_epoch_end(self, record):
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        output = io.StringIO()
+        self.stats = pstats.Stats(self._profiler, stream=output).sort_stats(self.sort)
+        self._profiler = None
+        if self.path is not None:
+            self.stats.dump_stats(self.path)
+        if self.limit:
+            self.stats.print_stats(self.limit)
+            print(f"Profile of epoch {record['epoch']}:\n{output.getvalue()}")
+
+    def on_train_end(self, state):
+        # Training stopped inside the profiled epoch
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+
+
+class Telemetry:
+    """
+    Drives a list of callbacks from train_network: times epochs and steps,
+    owns the PhaseTimer attached to the network while training runs, and
+    records the norm of the gradients the optimizer requests.
+    """
+
+    def __init__(self, callbacks):
+        self.callbacks = list(callbacks)
+        self.timer = PhaseTimer()
+        self.last_gradient_norm = None
+        self._epoch_started = None
+        self._step_started = None
+        self._step = 0
+
+    def track_gradient(self, gradient):
+        """
+        Wrap an Objective gradient function to time it as the "gradient"
+        phase and remember its norm
+        """
+        def tracked(parameters):
+            with self.timer.phase("gradient"):
+                value = gradient(parameters)
+            self.last_gradient_norm = float(np.linalg.norm(value))
+            return value
+        return tracked
+
+    def train_begin(self, network, state):
+        for callback in self.callbacks:
+            callback.on_train_begin(network, state)
+
+    def epoch_begin(self, epoch):
+        for callback in self.callbacks:
+            callback.on_epoch_begin(epoch)
+        self._step = 0
+        self.timer.reset()
+        self._epoch_started = self._step_started = time.perf_counter()
+
+    def step_end(self, epoch, batch_size, loss):
+        now = time.perf_counter()
+        record = {"epoch": epoch, "step": self._step, "batch_size": batch_size, "loss": float(loss),
+                  "gradient_norm": self.last_gradient_norm, "seconds": now - self._step_started}
+        self.last_gradient_norm = None
+        self._step += 1
+        self._step_started = now
+        for callback in self.callbacks:
+            callback.on_step_end(record)
+
+    def epoch_end(self, epoch, loss, validation_loss, best_loss):
+        seconds = time.perf_counter() - self._epoch_started
+        phases = {name: 0.0 for name in PHASES}
+        phases.update(self.timer.reset())
+        phases["other"] = max(seconds - sum(phases.values()), 0.0)
+        record = {"epoch": epoch, "loss": float(loss),
+                  "validation_loss": None if validation_loss is None else float(validation_loss),
+                  "best_loss": float(best_loss), "seconds": seconds, "phases": phases,
+                  "peak_memory_mb": peak_memory_mb()}
+        for callback in self.callbacks:
+            callback.on_epoch_end(record)
+
+    def train_end(self, state):
+        for callback in self.callbacks:
+            callback.on_train_end(state)
@@ -1,18 +1,65 @@
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-import qiskit
+import os
+import sys
+import time
+
+# Make the repository-level qasm_ml package importable when run from tech_solution/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from qasm_ml import (
+    FeatureScaler,
+    GateTape,
+    HammingWeightReadout,
+    StatevectorSimulator,
+    WorkerPool,
+    iterate_row_batches,
+)
+
+EVALUATION_BACKENDS = ("numpy", "qiskit")
+# Default success levels as inclusive (min, max) ranges of measured 1s; None means no upper limit
+SUCCESS_LEVELS = {"high_success": (3, None), "medium_success": (1, 2), "low_success": (0, 0)}
 
 class QASMGenerator:
-    def __init__(self, num_qubits=4):
+    def __init__(self, num_qubits=4, scaler=None):
         self.num_qubits = num_qubits
-        self.scaler = MinMaxScaler()
+        # Fitted FeatureScaler shared by every solution; None scales each solution by its own range
+        self.scaler = scaler
+        
+    def rotation_angles(self, features):
+        """
+        Convert features, one solution or a (solutions, features) batch, to
+        the RX angle of every qubit
+        """
+        features = np.asarray(features, dtype=float)
+        if self.scaler is not None:
+            scaled_features = self.scaler.transform(features)
+        else:
+            # Min-max scale each solution's features to [0, 1]; constant features scale to 0
+            low = features.min(axis=-1, keepdims=True)
+            span = features.max(axis=-1, keepdims=True) - low
+            scaled_features = (features - low) / np.where(span == 0, 1, span)
+        return scaled_features[..., np.arange(self.num_qubits) % features.shape[-1]] * np.pi
+    
+    def apply_gates(self, qc, angles):
+        # qc is a QuantumCircuit, StatevectorSimulator or GateTape; all share the gate API
+        for i in range(self.num_qubits):
+            # Add Hadamard gates for superposition
+            qc.h(i)
+            
+            # Add rotation gates with parameters learned from features
+            qc.rx(angles[i], i)
+            
+            # Add entanglement
+            if i < self.num_qubits - 1:
+                qc.cx(i, i + 1)
         
+        return qc
+    
     def generate_circuit_template(self, features):
         """
         Generate QASM code based on input features using ML predictions
         """
         # Convert features to quantum gates parameters
-        scaled_features = self.scaler.fit_transform(features.reshape(-1, 1)).flatten()
+        angles = self.rotation_angles(features)
         
         # Generate QASM code
         qasm_code = [
@@ -27,7 +74,7 @@ class QASMGenerator:
             qasm_code.append(f"h q[{i}];")
             
             # Add rotation gates with parameters learned from features
-            qasm_code.append(f"rx({scaled_features[i % len(scaled_features)] * np.pi}) q[{i}];")
+            qasm_code.append(f"rx({angles[i]}) q[{i}];")
             
             # Add entanglement
             if i < self.num_qubits - 1:
@@ -39,9 +86,73 @@ class QASMGenerator:
         return "\n".join(qasm_code)
 
 class TechSolutionEvaluator:
-    def __init__(self):
-        self.qasm_generator = QASMGenerator()
+    def __init__(self, num_qubits=4, shots=1000, exact=False, backend="numpy", seed=None, success_levels=None,
+                 scaler=None):
+        if backend not in EVALUATION_BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {EVALUATION_BACKENDS}")
+        if not exact and shots < 1:
+            raise ValueError("Number of shots must be positive")
+        
+        self.num_qubits = num_qubits
+        self.shots = shots
+        # exact=True reads the outcome probabilities off the statevector instead of sampling shots
+        self.exact = exact
+        self.backend_name = backend
+        self.rng = np.random.default_rng(seed)
+        # Name -> Hamming weight range of each reported success level
+        self.success_levels = dict(SUCCESS_LEVELS if success_levels is None else success_levels)
+        if isinstance(scaler, (str, os.PathLike)):
+            scaler = FeatureScaler.load(scaler)
+        self.qasm_generator = QASMGenerator(num_qubits, scaler)
         self.feature_extractor = self.train_feature_extractor()
+        # Batched NumPy registers, keyed by batch size
+        self.batch_simulators = {}
+        # Progress of the latest evaluate_solutions stream
+        self.throughput = None
+        self.compile()
+    
+    def compile(self):
+        """
+        Build the evaluation circuit once as a template over the RX angles:
+        a fused gate tape for the NumPy engine and, only when sampling shots
+        with the qiskit backend, a Qiskit circuit over a ParameterVector
+        transpiled once for Aer. Each evaluation then only binds angles.
+        """
+        self._template = None
+        tape = GateTape(self.num_qubits, 0, num_inputs=self.num_qubits)
+        self.tape = self.qasm_generator.apply_gates(tape, tape.inputs).fused()
+        self.simulator = StatevectorSimulator(self.num_qubits)
+        # Buckets outcomes by their number of 1s, looked up once per outcome
+        self.success_readout = HammingWeightReadout(self.num_qubits, list(self.success_levels.values()))
+        
+        if self.backend_name == "qiskit" and not self.exact:
+            import qiskit
+            from qasm_ml.backends import aer_simulator
+            
+            self.backend = aer_simulator()
+            self.compiled_circuit = qiskit.transpile(self.template.measure_all(inplace=False), self.backend)
+        return self
+    
+    @property
+    def template(self):
+        """
+        Qiskit circuit over the angle ParameterVector, built on first use so
+        the NumPy backend never imports Qiskit
+        """
+        if self._template is None:
+            from qiskit import QuantumCircuit
+            from qiskit.circuit import ParameterVector
+            
+            self.angle_parameters = ParameterVector("theta", self.num_qubits)
+            self._template = self.qasm_generator.apply_gates(QuantumCircuit(self.num_qubits), self.angle_parameters)
+        return self._template
+    
+    def worker_config(self):
+        """
+        Constructor arguments that rebuild this evaluator inside a pool worker
+        """
+        return (self.num_qubits, self.shots, self.exact, self.backend_name, None, self.success_levels,
+                self.qasm_generator.scaler)
         
     def train_feature_extractor(self):
         """
@@ -49,13 +160,27 @@ class TechSolutionEvaluator:
         from technical solution parameters
         """
         # In a real implementation, this would be trained on historical data
-        # Here we'll use a simple transformation
-        return lambda x: np.array([
-            np.mean(x),          # Average of parameters
-            np.std(x),          # Variability of parameters
-            np.max(x),          # Maximum parameter value
-            np.min(x)           # Minimum parameter value
-        ])
+        # Here we'll use a simple transformation, applied to one solution or a (solutions, parameters) batch
+        return lambda x: np.stack([
+            np.mean(x, axis=-1),          # Average of parameters
+            np.std(x, axis=-1),          # Variability of parameters
+            np.max(x, axis=-1),          # Maximum parameter value
+            np.min(x, axis=-1)           # Minimum parameter value
+        ], axis=-1)
+    
+    def fit_scaler(self, reference_solutions, batch_size=1024, delimiter=",", skip_header=0):
+        """
+        Fit the feature scaling once on a reference set of solutions, read
+        like evaluate_solutions reads its input, and use it for every later
+        evaluation. Features are extracted and fitted chunk by chunk, so the
+        reference set never has to fit in memory. Returns the FeatureScaler,
+        which can be saved and passed back in as ``scaler``.
+        """
+        scaler = FeatureScaler(clip=True)
+        for batch in iterate_row_batches(reference_solutions, batch_size, delimiter, skip_header):
+            scaler.partial_fit(self.feature_extractor(batch))
+        self.qasm_generator.scaler = scaler
+        return scaler
     
     def evaluate_solution(self, solution_params):
         """
@@ -64,36 +189,169 @@ class TechSolutionEvaluator:
         # Extract features using ML
         features = self.feature_extractor(solution_params)
         
-        # Generate QASM code
-        qasm_code = self.qasm_generator.generate_circuit_template(features)
-        
-        # Create and run quantum circuit using Qiskit
-        circuit = qiskit.QuantumCircuit.from_qasm_str(qasm_code)
-        simulator = qiskit.Aer.get_backend('qasm_simulator')
-        job = qiskit.execute(circuit, simulator, shots=1000)
-        result = job.result()
-        counts = result.get_counts(circuit)
+        # Bind the feature angles into the compiled circuit
+        angles = self.qasm_generator.rotation_angles(features)
         
-        # Analyze results
-        success_probabilities = self.analyze_results(counts)
-        return success_probabilities
+        # Analyze exact outcome probabilities or sampled counts
+        if self.exact:
+            return self.analyze_probabilities(self.outcome_probabilities(angles))
+        return self.analyze_probabilities(self.sample_counts(angles))
     
-    def analyze_results(self, counts):
+    def outcome_probabilities(self, angles):
         """
-        Analyze quantum measurement results to determine success probabilities
+        Exact probability of every measurement outcome, indexed by the
+        integer value of the measured register
         """
-        total_shots = sum(counts.values())
+        if self.backend_name == "qiskit":
+            from qiskit.quantum_info import Statevector
+            
+            circuit = self.template.assign_parameters(dict(zip(self.angle_parameters, angles)))
+            return Statevector.from_instruction(circuit).probabilities()
+        self.tape.apply(self.simulator.reset(), (), self.tape.pad_inputs(angles))
+        return self.simulator.probabilities()
+    
+    def sample_counts(self, angles):
+        """
+        Counts of ``shots`` measurements indexed like outcome_probabilities.
+        The NumPy backend samples them from the exact distribution; the
+        Qiskit backend runs the compiled circuit on Aer.
+        """
+        if self.backend_name == "qiskit":
+            circuit = self.compiled_circuit.assign_parameters(dict(zip(self.angle_parameters, angles)))
+            return self.counts_array(self.backend.run(circuit, shots=self.shots).result().get_counts())
+        probabilities = self.outcome_probabilities(angles)
+        return self.rng.multinomial(self.shots, probabilities / probabilities.sum())
+    
+    def counts_array(self, counts):
+        """
+        Convert a Qiskit counts dict to counts indexed by outcome value
+        """
+        counts_array = np.zeros(2 ** self.num_qubits, dtype=np.int64)
+        for bitstring, count in counts.items():
+            counts_array[int(bitstring.replace(" ", ""), 2)] += count
+        return counts_array
+    
+    def batch_outcome_probabilities(self, angles):
+        """
+        outcome_probabilities for a (solutions, qubits) batch of angles
+        """
+        if self.backend_name == "qiskit":
+            return np.array([self.outcome_probabilities(row) for row in angles])
+        num_samples = len(angles)
+        if num_samples not in self.batch_simulators:
+            self.batch_simulators[num_samples] = StatevectorSimulator(self.num_qubits, batch_size=num_samples)
+        simulator = self.batch_simulators[num_samples]
+        self.tape.apply(simulator.reset(), (), self.tape.pad_inputs(angles))
+        return simulator.probabilities()
+    
+    def batch_sample_counts(self, angles, rng):
+        """
+        sample_counts for a (solutions, qubits) batch of angles, drawing
+        NumPy samples from rng; the Qiskit backend runs the batch as one job
+        """
+        if self.backend_name == "qiskit":
+            circuits = [self.compiled_circuit.assign_parameters(dict(zip(self.angle_parameters, row))) for row in angles]
+            result = self.backend.run(circuits, shots=self.shots).result()
+            return np.array([self.counts_array(result.get_counts(i)) for i in range(len(circuits))])
+        probabilities = self.batch_outcome_probabilities(angles)
+        return rng.multinomial(self.shots, probabilities / probabilities.sum(axis=1, keepdims=True))
+    
+    def success_probabilities(self, probabilities):
+        """
+        Map outcome probabilities or counts of shape (2**n,) or (batch, 2**n),
+        indexed by the integer value of the measured register, to the
+        probabilities of the success levels in one vectorized reduction
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        return self.success_readout(probabilities) / probabilities.sum(axis=-1, keepdims=True)
+    
+    def analyze_probabilities(self, probabilities):
+        """
+        Success probabilities dict from outcome probabilities or counts
+        indexed by the integer value of the measured register. A batch
+        gives one array per success level.
+        """
+        success = self.success_probabilities(probabilities)
+        if success.ndim == 1:
+            return dict(zip(self.success_levels, success.tolist()))
+        return {name: success[:, i] for i, name in enumerate(self.success_levels)}
+    
+    def evaluate_batch(self, solutions, seed=None):
+        """
+        Evaluate a (solutions, parameters) array in one vectorized pass and
+        return a (solutions, levels) array of success probabilities ordered
+        as success_levels. Shots are sampled from seed, or from the evaluator's
+        own generator when it is None.
+        """
+        solutions = np.asarray(solutions, dtype=float)
+        if solutions.ndim != 2:
+            raise ValueError("Solutions must be 2-dimensional (solutions, parameters)")
+        angles = self.qasm_generator.rotation_angles(self.feature_extractor(solutions))
+        if self.exact:
+            return self.success_probabilities(self.batch_outcome_probabilities(angles))
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        return self.success_probabilities(self.batch_sample_counts(angles, rng))
+    
+    def evaluate_solutions(self, solutions, batch_size=1024, executor=None, num_workers=None, delimiter=",",
+                           skip_header=0, report=False):
+        """
+        Stream success probabilities for many candidate solutions, yielding
+        one evaluate_solution-style dict per solution in input order.
+
+        solutions is an iterable of parameter rows (e.g. a generator), a 2-D
+        array or the path of a .npy or CSV file (read with delimiter, after
+        skip_header lines). Rows are consumed batch_size at a time and
+        evaluated with evaluate_batch, so memory stays bounded by a few
+        batches however long the stream is.
+
+        executor ("process", "thread" or None for serial) spreads batches
+        over a pool of num_workers evaluators. Every batch gets its own
+        sampling seed, so results do not depend on the executor.
+
+        ``throughput`` is updated after every batch, and a summary is
+        printed at the end when report is set.
+        """
+        batches = iterate_row_batches(solutions, batch_size, delimiter, skip_header)
+        # Seeds are drawn in stream order, before any batch is evaluated
+        tasks = ((batch, None if self.exact else int(self.rng.integers(2 ** 63))) for batch in batches)
+        
+        pool = None
+        if executor is not None:
+            # Workers rebuild the evaluator once from worker_config; tasks only carry arrays
+            pool = WorkerPool(type(self), self.worker_config(), kind=executor, max_workers=num_workers)
         
-        # Calculate success probabilities based on measurement outcomes
-        high_success = sum(counts.get(k, 0) for k in counts if k.count('1') >= 3) / total_shots
-        medium_success = sum(counts.get(k, 0) for k in counts if 1 <= k.count('1') < 3) / total_shots
-        low_success = sum(counts.get(k, 0) for k in counts if k.count('1') == 0) / total_shots
+        start_time = time.time()
+        self.throughput = {'solutions': 0, 'seconds': 0.0, 'solutions_per_second': 0.0}
+        try:
+            results = pool.imap("evaluate_batch", tasks) if pool is not None else (
+                self.evaluate_batch(*task) for task in tasks
+            )
+            for success in results:
+                elapsed_time = time.time() - start_time
+                self.throughput['solutions'] += len(success)
+                self.throughput['seconds'] = elapsed_time
+                self.throughput['solutions_per_second'] = self.throughput['solutions'] / max(elapsed_time, 1e-9)
+                for row in success.tolist():
+                    yield dict(zip(self.success_levels, row))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_pending=True)
         
-        return {
-            'high_success': high_success,
-            'medium_success': medium_success,
-            'low_success': low_success
-        }
+        if report:
+            print(f"Evaluated {self.throughput['solutions']} solutions in {self.throughput['seconds']:.2f}s "
+                  f"({self.throughput['solutions_per_second']:.0f} solutions/s)")
+    
+    def analyze_results(self, counts):
+        """
+        Analyze quantum measurement results to determine success probabilities.
+        counts is a Qiskit counts dict, a list of them, or counts indexed by
+        outcome value of shape (2**n,) or (batch, 2**n).
+        """
+        if isinstance(counts, dict):
+            counts = self.counts_array(counts)
+        elif len(counts) and isinstance(counts[0], dict):
+            counts = np.array([self.counts_array(result) for result in counts])
+        return self.analyze_probabilities(counts)
 
 # Example usage
 def main():
@@ -111,6 +369,14 @@ def main():
     print(f"High Success Probability: {results['high_success']:.2%}")
     print(f"Medium Success Probability: {results['medium_success']:.2%}")
     print(f"Low Success Probability: {results['low_success']:.2%}")
+    
+    # Fit the feature scaling on a reference set so the whole portfolio is encoded consistently
+    evaluator.fit_scaler(np.random.rand(1000, 4)).save("feature_scaler.npz")
+    
+    # Score a streamed portfolio of candidate solutions
+    portfolio = (np.random.rand(4) for _ in range(10000))
+    best = max(evaluator.evaluate_solutions(portfolio, report=True), key=lambda result: result['high_success'])
+    print(f"Best High Success Probability in portfolio: {best['high_success']:.2%}")
 
 if __name__ == "__main__":
     main()